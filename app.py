@@ -1,26 +1,173 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+from flask import Flask, Response, g, has_app_context, make_response, render_template, request, jsonify, redirect, url_for, flash, session, send_from_directory, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
+from sqlalchemy import event, exists, inspect, make_url, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import os
 import json
+import click
+import contextlib
+import multiprocessing
+import sys
+import uuid
+import base64
+import hashlib
+import hmac
+from functools import wraps
 import sqlite3
-from datetime import datetime
-from ocr import extract_text_from_image
+import time
+from datetime import datetime, timedelta
 from chatbot import get_chatbot_response
-from recommendation_engine import get_supplier_recommendations
+from recommendation_engine import (
+    get_supplier_recommendations, get_batch_recommendations, get_price_recommendations,
+    get_quality_recommendations, configure_engine, get_cache_stats, get_engine, location_score, iter_chunks
+)
+from item_matching import ItemMatcher
+from geo import normalize_location
+from recommendation_cache import RecommendationCache, MemoryCacheBackend, SQLiteCacheBackend
+from fast_json import FastJSONProvider, dumps as dumps_json
+from compression import compress_response, etag_variants
+from write_behind import WriteBehindBuffer
+from user_cache import UserCache
+from metrics import MetricsRegistry
+from profiler import RequestProfiler
+from chat_archive import append_archive, archive_path
+from bulk_load import ROLES, clean_account, file_format, hash_passwords, read_accounts, write_accounts
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.config['SECRET_KEY'] = 'your-secret-key-change-in-production'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///apna_saathi.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///apna_saathi.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# 'production' tunes SQLite for several gunicorn workers: WAL so reads run alongside the writer, a busy
+# timeout instead of immediate 'database is locked', memory-mapped reads and a larger page cache
+app.config['DATABASE_MODE'] = os.environ.get('DATABASE_MODE', 'default')
+app.config['SQLITE_PRAGMAS'] = {
+    'journal_mode': 'WAL',
+    # Durable at checkpoints rather than every commit; WAL keeps the database consistent either way
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    # Negative sizes are in KiB
+    'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024)),
+    'temp_store': 'MEMORY',
+}
+if app.config['DATABASE_MODE'] == 'production':
+    # Connections per worker; one per gunicorn thread plus headroom for streamed responses
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 5)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    }
+# Optional read-only database for GET routes marked @read_only: the main database opened read-only,
+# or DATABASE_READ_URL, e.g. a replica kept in sync by litestream
+if os.environ.get('DATABASE_READ_ONLY') or os.environ.get('DATABASE_READ_URL'):
+    main_url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_BINDS'] = {
+        'read_only': os.environ.get('DATABASE_READ_URL') or main_url.set(database=f'file:{main_url.database}')
+            .update_query_dict({'mode': 'ro', 'uri': 'true'}).render_as_string(hide_password=False)
+    }
 app.config['UPLOAD_FOLDER'] = 'static/uploads/'
+# Chat log persistence: 'sync' commits each message before answering; 'write-behind' answers first and
+# inserts messages in batches, so a crashed worker loses at most CHAT_FLUSH_INTERVAL_MS of them
+app.config['CHAT_PERSISTENCE'] = os.environ.get('CHAT_PERSISTENCE', 'write-behind')
+app.config['CHAT_FLUSH_INTERVAL_MS'] = int(os.environ.get('CHAT_FLUSH_INTERVAL_MS', 50))
+app.config['CHAT_FLUSH_BATCH_SIZE'] = int(os.environ.get('CHAT_FLUSH_BATCH_SIZE', 100))
+# 'flask archive-chats' moves chats older than CHAT_RETENTION_DAYS to gzipped monthly files in CHAT_ARCHIVE_DIR
+app.config['CHAT_RETENTION_DAYS'] = int(os.environ.get('CHAT_RETENTION_DAYS', 90))
+app.config['CHAT_ARCHIVE_DIR'] = os.environ.get('CHAT_ARCHIVE_DIR', os.path.join(app.instance_path, 'chat_archive'))
+# Seconds before a worker reloads its supplier index, so writes made in other workers show up
+app.config['RECOMMENDATION_INDEX_MAX_AGE'] = int(os.environ.get('RECOMMENDATION_INDEX_MAX_AGE', 300))
+# 'scalar' scores candidate suppliers one by one, 'vectorized' scores all of them with NumPy
+app.config['RECOMMENDATION_SCORING'] = os.environ.get('RECOMMENDATION_SCORING', 'scalar')
+# Distance in km at which a supplier's location score reaches 0
+app.config['RECOMMENDATION_RADIUS_KM'] = float(os.environ.get('RECOMMENDATION_RADIUS_KM', 150))
+# Fitted item matching model, reused across worker starts while the item vocabulary is unchanged
+app.config['ITEM_MATCHER_PATH'] = os.environ.get('ITEM_MATCHER_PATH', os.path.join(app.instance_path, 'item_matcher.pkl'))
+# Recommendation result cache: 'memory' per worker, 'sqlite' shared by the workers on a host, or 'off'
+app.config['RECOMMENDATION_CACHE'] = os.environ.get('RECOMMENDATION_CACHE', 'memory')
+app.config['RECOMMENDATION_CACHE_TTL'] = int(os.environ.get('RECOMMENDATION_CACHE_TTL', 300))
+app.config['RECOMMENDATION_CACHE_SIZE'] = int(os.environ.get('RECOMMENDATION_CACHE_SIZE', 10000))
+app.config['RECOMMENDATION_CACHE_PATH'] = os.environ.get(
+    'RECOMMENDATION_CACHE_PATH', os.path.join(app.instance_path, 'recommendation_cache.db'))
+# Worker processes for batch recommendations; 0 scores in the request process
+app.config['RECOMMENDATION_BATCH_PROCESSES'] = int(os.environ.get('RECOMMENDATION_BATCH_PROCESSES', 0))
+# Batch recommendations are for internal jobs: requests need an X-Batch-Token header equal to this; off when unset
+app.config['RECOMMENDATION_BATCH_TOKEN'] = os.environ.get('RECOMMENDATION_BATCH_TOKEN')
+# Default and largest page sizes of the supplier and vendor listings
+app.config['LISTING_PAGE_SIZE'] = int(os.environ.get('LISTING_PAGE_SIZE', 50))
+app.config['LISTING_MAX_PAGE_SIZE'] = int(os.environ.get('LISTING_MAX_PAGE_SIZE', 200))
+# Cache-Control sent with the conditional GET endpoints; the bodies carry ETags, so 'no-cache' revalidates cheaply
+app.config['CACHE_CONTROL'] = {
+    'api_suppliers': os.environ.get('CACHE_CONTROL_SUPPLIERS', 'public, no-cache'),
+    'api_vendors': os.environ.get('CACHE_CONTROL_VENDORS', 'public, no-cache'),
+    'api_recommendations': os.environ.get('CACHE_CONTROL_RECOMMENDATIONS', 'private, no-cache'),
+}
+# Prometheus metrics at /metrics: 'on' or 'off'. Each worker writes its values to a file in METRICS_DIR every
+# METRICS_FLUSH_INTERVAL seconds, and /metrics adds up the files of all workers of the same gunicorn master
+app.config['METRICS'] = os.environ.get('METRICS', 'on')
+app.config['METRICS_DIR'] = os.environ.get('METRICS_DIR', os.path.join(app.instance_path, 'metrics'))
+app.config['METRICS_FLUSH_INTERVAL'] = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+# Request profiling with cProfile: a PROFILE_SAMPLE_RATE fraction of requests, and requests whose X-Profile
+# header equals PROFILE_TOKEN, are captured to PROFILE_DIR, which keeps the newest PROFILE_MAX_FILES; off by default.
+# The captures are listed on /debug?token=<PROFILE_TOKEN> and downloaded with the same token
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN')
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+app.config['PROFILE_MAX_FILES'] = int(os.environ.get('PROFILE_MAX_FILES', 200))
+# Seconds a worker reuses a logged-in user's row instead of loading it on every request; 0 turns the cache off.
+# Changes committed in the same worker apply at once, changes from other workers within the TTL
+app.config['USER_CACHE_TTL'] = float(os.environ.get('USER_CACHE_TTL', 30))
+app.config['USER_CACHE_SIZE'] = int(os.environ.get('USER_CACHE_SIZE', 10000))
+# Response compression: encodings in order of preference (br needs the brotli package), levels, and the
+# smallest buffered body worth compressing; streamed bodies are always compressed
+app.config['COMPRESS_ALGORITHMS'] = os.environ.get('COMPRESS_ALGORITHMS', 'br,gzip').split(',')
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+app.config['COMPRESS_LEVELS'] = {
+    'gzip': int(os.environ.get('COMPRESS_GZIP_LEVEL', 6)),
+    'br': int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5)),
+}
 
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-db = SQLAlchemy(app)
+class RoutingSession(FlaskSQLAlchemySession):
+    """Session that sends the SELECTs of @read_only routes to the read-only database"""
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and clause is not None and clause.is_select and has_app_context() and \
+                g.get('read_only') and 'read_only' in db.engines:
+            return db.engines['read_only']
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+
+def sqlite_pragma_listener(pragmas):
+    """Make a connect event listener that sets pragmas on each new SQLite connection"""
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    return set_pragmas
+
+def configure_database_connections():
+    """Apply SQLITE_PRAGMAS in production mode, and keep read-only connections from writing"""
+    production = app.config['DATABASE_MODE'] == 'production'
+    if production and db.engine.dialect.name == 'sqlite':
+        event.listen(db.engine, 'connect', sqlite_pragma_listener(app.config['SQLITE_PRAGMAS']))
+    read_engine = db.engines.get('read_only')
+    if read_engine is not None and read_engine.dialect.name == 'sqlite':
+        # The journal mode belongs to the database file, so only the writer sets it
+        pragmas = {name: value for name, value in app.config['SQLITE_PRAGMAS'].items()
+                   if production and name != 'journal_mode'}
+        pragmas['query_only'] = 'ON'
+        event.listen(read_engine, 'connect', sqlite_pragma_listener(pragmas))
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -38,21 +185,54 @@ class User(UserMixin, db.Model):
 
 class Supplier(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     business_name = db.Column(db.String(100), nullable=False)
-    items = db.Column(db.Text)  # JSON string of items
+    # JSON string of items; the old value is loaded on change so removed items mark vendors stale
+    items = db.column_property(db.Column(db.Text), active_history=True)
     rating = db.Column(db.Float, default=0.0)
     total_ratings = db.Column(db.Integer, default=0)
     description = db.Column(db.Text)
     address = db.Column(db.String(200))
+    price_range = db.Column(db.String(20), default='medium')  # 'low', 'medium' or 'high'
+    delivery_time = db.Column(db.String(20), default='same_day')  # 'same_day', 'next_day' or 'within_week'
 
 class Vendor(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     business_name = db.Column(db.String(100), nullable=False)
     needs = db.Column(db.Text)  # JSON string of needs
     location = db.Column(db.String(100))
 
+class Item(db.Model):
+    """An item supplied or needed, by normalized name"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)  # lowercase, single-spaced
+
+class SupplierItem(db.Model):
+    """Items a supplier carries; kept in step with Supplier.items for indexed lookups"""
+    __tablename__ = 'supplier_item'
+    __table_args__ = (db.Index('ix_supplier_item_item_location', 'item_id', 'location'),)
+    supplier_id = db.Column(db.Integer, db.ForeignKey('supplier.id'), primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('item.id'), primary_key=True)
+    location = db.Column(db.String(100))  # the supplier's normalized location, copied from User
+
+class VendorNeed(db.Model):
+    """Items a vendor needs; kept in step with Vendor.needs for indexed lookups"""
+    __tablename__ = 'vendor_need'
+    __table_args__ = (db.Index('ix_vendor_need_item_location', 'item_id', 'location'),)
+    vendor_id = db.Column(db.Integer, db.ForeignKey('vendor.id'), primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('item.id'), primary_key=True)
+    location = db.Column(db.String(100))  # the vendor's normalized location
+
+class VendorRecommendation(db.Model):
+    """Materialized recommendations for a vendor, recomputed when marked stale"""
+    vendor_id = db.Column(db.Integer, db.ForeignKey('vendor.id'), primary_key=True)
+    recommendations = db.Column(db.Text, nullable=False)  # JSON response body
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    stale = db.Column(db.Boolean, default=False, nullable=False)
+    version = db.Column(db.Integer, default=0, nullable=False)  # bumped on every stale mark
+    suppliers_changed_at = db.Column(db.Float)  # epoch seconds of the last supplier change
+
 class Chat(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -60,9 +240,657 @@ class Chat(db.Model):
     response = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+class TableVersion(db.Model):
+    """Change counter per table, bumped in the same transaction as the change"""
+    __tablename__ = 'table_version'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.Float)  # epoch seconds of the last change
+
+# Columns added after the initial schema, applied to existing databases on startup
+SCHEMA_UPGRADES = {
+    'supplier': {
+        'price_range': "VARCHAR(20) DEFAULT 'medium'",
+        'delivery_time': "VARCHAR(20) DEFAULT 'same_day'",
+    },
+}
+
+# Indexes added after the initial schema, as (name, table, columns)
+SCHEMA_INDEXES = [
+    ('ix_vendor_user_id', 'vendor', 'user_id'),
+    ('ix_supplier_user_id', 'supplier', 'user_id'),
+    # Keyset pagination and filters of the supplier and vendor listings
+    ('ix_supplier_rating_id', 'supplier', 'rating, id'),
+    ('ix_supplier_price_range_id', 'supplier', 'price_range, id'),
+    ('ix_user_location', 'user', 'location COLLATE NOCASE'),
+    ('ix_vendor_location_id', 'vendor', 'location COLLATE NOCASE, id'),
+    # Chat history pages, newest first per user
+    ('ix_chat_user_id_timestamp', 'chat', 'user_id, timestamp'),
+]
+
+def upgrade_schema():
+    """Add any missing columns from SCHEMA_UPGRADES and indexes from SCHEMA_INDEXES to existing tables"""
+    inspector = inspect(db.engine)
+    with db.engine.begin() as connection:
+        for table, columns in SCHEMA_UPGRADES.items():
+            existing = {column['name'] for column in inspector.get_columns(table)}
+            for name, ddl in columns.items():
+                if name not in existing:
+                    connection.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}'))
+        for name, table, columns in SCHEMA_INDEXES:
+            connection.execute(db.text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})'))
+
+# Normalized item tables
+def normalize_item_name(name):
+    """Lowercase an item name and collapse whitespace, as stored in Item.name"""
+    return ' '.join(str(name).lower().split())
+
+def get_item_id_map(connection, names):
+    """Map the normalized item names in names to their Item ids, creating items that do not exist yet"""
+    names = sorted({normalize_item_name(name) for name in names} - {''})
+    if not names:
+        return {}
+    connection.execute(db.insert(Item).prefix_with('OR IGNORE'), [{'name': name} for name in names])
+    return dict(connection.execute(db.select(Item.name, Item.id).where(Item.name.in_(names))).all())
+
+def get_item_ids(connection, names):
+    """Get the Item ids for names, creating items that do not exist yet"""
+    return list(get_item_id_map(connection, names).values())
+
+def sync_supplier_items(connection, supplier_id, items, location):
+    """Replace a supplier's supplier_item rows with items at location"""
+    connection.execute(db.delete(SupplierItem).where(SupplierItem.supplier_id == supplier_id))
+    rows = [{'supplier_id': supplier_id, 'item_id': item_id, 'location': normalize_location(location)}
+            for item_id in get_item_ids(connection, items)]
+    if rows:
+        connection.execute(db.insert(SupplierItem), rows)
+
+def sync_vendor_needs(connection, vendor_id, needs, location):
+    """Replace a vendor's vendor_need rows with needs at location"""
+    connection.execute(db.delete(VendorNeed).where(VendorNeed.vendor_id == vendor_id))
+    rows = [{'vendor_id': vendor_id, 'item_id': item_id, 'location': normalize_location(location)}
+            for item_id in get_item_ids(connection, needs)]
+    if rows:
+        connection.execute(db.insert(VendorNeed), rows)
+
+def backfill_item_tables():
+    """Fill supplier_item and vendor_need for suppliers and vendors that have items but no rows yet"""
+    with db.engine.begin() as connection:
+        suppliers = connection.execute(
+            db.select(Supplier.id, Supplier.items, User.location)
+            .join(User, User.id == Supplier.user_id)
+            .where(Supplier.items.isnot(None), Supplier.items != '[]',
+                   ~exists().where(SupplierItem.supplier_id == Supplier.id))
+        ).all()
+        for row in suppliers:
+            sync_supplier_items(connection, row.id, json.loads(row.items), row.location)
+        vendors = connection.execute(
+            db.select(Vendor.id, Vendor.needs, Vendor.location)
+            .where(Vendor.needs.isnot(None), Vendor.needs != '[]',
+                   ~exists().where(VendorNeed.vendor_id == Vendor.id))
+        ).all()
+        for row in vendors:
+            sync_vendor_needs(connection, row.id, json.loads(row.needs), row.location)
+
+def supplier_ids_with_item(item, location=None):
+    """Select the ids of suppliers carrying item, optionally in location, through the (item_id, location) index"""
+    query = db.select(SupplierItem.supplier_id).join(Item, Item.id == SupplierItem.item_id) \
+        .where(Item.name == normalize_item_name(item))
+    if location:
+        query = query.where(SupplierItem.location == normalize_location(location))
+    return query
+
+def vendor_ids_needing(item, location=None):
+    """Select the ids of vendors needing item, optionally in location, through the (item_id, location) index"""
+    query = db.select(VendorNeed.vendor_id).join(Item, Item.id == VendorNeed.item_id) \
+        .where(Item.name == normalize_item_name(item))
+    if location:
+        query = query.where(VendorNeed.location == normalize_location(location))
+    return query
+
+@event.listens_for(Supplier, 'after_insert')
+@event.listens_for(Supplier, 'after_update')
+def sync_supplier_item_rows(mapper, connection, target):
+    """Rewrite a supplier's supplier_item rows when its items or owner change"""
+    state = inspect(target)
+    if state.attrs['items'].history.has_changes() or state.attrs.user_id.history.has_changes():
+        location = connection.execute(db.select(User.location).where(User.id == target.user_id)).scalar()
+        sync_supplier_items(connection, target.id, json.loads(target.items) if target.items else [], location)
+
+@event.listens_for(Supplier, 'before_delete')
+def delete_supplier_item_rows(mapper, connection, target):
+    connection.execute(db.delete(SupplierItem).where(SupplierItem.supplier_id == target.id))
+
+@event.listens_for(Vendor, 'after_insert')
+@event.listens_for(Vendor, 'after_update')
+def sync_vendor_need_rows(mapper, connection, target):
+    """Rewrite a vendor's vendor_need rows when its needs or location change"""
+    state = inspect(target)
+    if state.attrs.needs.history.has_changes() or state.attrs.location.history.has_changes():
+        sync_vendor_needs(connection, target.id, json.loads(target.needs) if target.needs else [], target.location)
+
+@event.listens_for(Vendor, 'before_delete')
+def delete_vendor_need_rows(mapper, connection, target):
+    connection.execute(db.delete(VendorNeed).where(VendorNeed.vendor_id == target.id))
+
+@event.listens_for(User, 'after_update')
+def move_supplier_item_rows(mapper, connection, target):
+    """Supplier locations live on User, so copy a changed location onto the user's supplier_item rows"""
+    if inspect(target).attrs.location.history.has_changes():
+        connection.execute(
+            db.update(SupplierItem)
+            .where(SupplierItem.supplier_id.in_(db.select(Supplier.id).where(Supplier.user_id == target.id)))
+            .values(location=normalize_location(target.location))
+        )
+
+# Recommendation engine wiring
+def supplier_to_record(supplier, location):
+    """Convert a Supplier row and its owner's location into the engine's supplier dict"""
+    return {
+        'id': supplier.id,
+        'name': supplier.business_name,
+        'location': location or '',
+        'items': json.loads(supplier.items) if supplier.items else [],
+        'rating': supplier.rating or 0.0,
+        'total_ratings': supplier.total_ratings or 0,
+        'price_range': supplier.price_range or 'medium',
+        'delivery_time': supplier.delivery_time or 'same_day',
+        'description': supplier.description
+    }
+
+def load_suppliers_for_engine():
+    """Load every supplier with its location in a single query for the recommendation engine"""
+    rows = db.session.query(
+        Supplier.id, Supplier.business_name, Supplier.items, Supplier.rating,
+        Supplier.total_ratings, Supplier.price_range, Supplier.delivery_time,
+        Supplier.description, User.location
+    ).join(User, User.id == Supplier.user_id).all()
+    return [supplier_to_record(row, row.location) for row in rows]
+
+def read_supplier_version():
+    """Get the supplier table's change counter, shared by every worker"""
+    return db.session.execute(db.select(TableVersion.version).where(TableVersion.name == 'supplier')).scalar() or 0
+
+def build_result_cache():
+    """Create the recommendation result cache selected by RECOMMENDATION_CACHE"""
+    kind = app.config['RECOMMENDATION_CACHE']
+    if kind == 'off':
+        return None
+    if kind == 'sqlite':
+        backend = SQLiteCacheBackend(app.config['RECOMMENDATION_CACHE_PATH'], app.config['RECOMMENDATION_CACHE_SIZE'])
+    else:
+        backend = MemoryCacheBackend(app.config['RECOMMENDATION_CACHE_SIZE'])
+    return RecommendationCache(backend, ttl=app.config['RECOMMENDATION_CACHE_TTL'],
+                               current_version=read_supplier_version if kind == 'sqlite' else None)
+
+configure_engine(
+    load_suppliers_for_engine,
+    max_age=app.config['RECOMMENDATION_INDEX_MAX_AGE'],
+    scoring=app.config['RECOMMENDATION_SCORING'],
+    radius_km=app.config['RECOMMENDATION_RADIUS_KM'],
+    item_matcher=ItemMatcher(app.config['ITEM_MATCHER_PATH']),
+    result_cache=build_result_cache(),
+    version_reader=read_supplier_version
+)
+
+# Materialized vendor recommendations
+def mark_vendors_stale(connection, changed_suppliers):
+    """
+    Mark the materialized recommendations of vendors a supplier change can affect
+    
+    Follows the engine's candidate rule: a supplier is scored for vendors that
+    need one of its items, at any distance, and for every vendor within range
+    of it. The first are selected through the vendor_need item index, the
+    second through the vendor location index, one query per vendor location
+    in range, and both are marked with batched updates, so the cost follows
+    the vendors affected rather than all vendors. Runs inside the flush, so
+    the marks commit or roll back with the change.
+    
+    Args:
+        connection: The flushing connection
+        changed_suppliers (list): (items, location) pairs, e.g. for a supplier's old and new state
+    """
+    if connection.execute(db.select(VendorRecommendation.vendor_id).limit(1)).first() is None:
+        return
+    engine = get_engine()
+    names = {normalize_item_name(item) for items, _ in changed_suppliers for item in items} - {''}
+    supplier_locations = {location or '' for _, location in changed_suppliers}
+    affected = set()
+    
+    if names:
+        # Needs are resolved onto supplier items by the item matcher, so other names can need the same
+        # item. The matcher is used as last fitted rather than refitted while the write lock is held
+        rows = connection.execute(db.select(Item.id, Item.name)).all()
+        names_to_resolve = [row.name for row in rows]
+        matcher = engine.item_matcher
+        need_ids = [
+            row.id for row, resolved in zip(rows, matcher.resolve_all(names_to_resolve) if matcher else names_to_resolve)
+            if row.name in names or normalize_item_name(resolved) in names
+        ]
+        for chunk in iter_chunks(need_ids, 500):
+            affected.update(connection.execute(
+                db.select(VendorNeed.vendor_id).distinct().where(VendorNeed.item_id.in_(chunk))
+            ).scalars())
+    
+    vendor_locations = connection.execute(
+        db.select(Vendor.location).group_by(db.collate(Vendor.location, 'NOCASE'))
+    ).scalars().all()
+    for vendor_location in vendor_locations:
+        if any(location_score(location, vendor_location or '', engine.radius_km) > 0 for location in supplier_locations):
+            affected.update(connection.execute(
+                db.select(Vendor.id).where(db.collate(Vendor.location, 'NOCASE') == vendor_location)
+            ).scalars())
+    
+    now = time.time()
+    for chunk in iter_chunks(sorted(affected), 500):
+        connection.execute(
+            db.update(VendorRecommendation)
+            .where(VendorRecommendation.vendor_id.in_(chunk))
+            .values(stale=True, version=VendorRecommendation.version + 1, suppliers_changed_at=now)
+        )
+
+def supplier_items_history(target):
+    """Get a flushed supplier's items before and after the change"""
+    history = inspect(target).attrs['items'].history
+    current = json.loads(target.items) if target.items else []
+    previous = [json.loads(value) for value in history.deleted if value] if history.deleted else []
+    return current, [item for items in previous for item in items]
+
+@event.listens_for(Supplier, 'after_insert')
+@event.listens_for(Supplier, 'after_update')
+def queue_supplier_upsert(mapper, connection, target):
+    """Remember a written supplier so the engine can be patched once the transaction commits"""
+    location = connection.execute(db.select(User.location).where(User.id == target.user_id)).scalar()
+    db_session = object_session(target)
+    db_session.info.setdefault('engine_upserts', []).append(supplier_to_record(target, location))
+    current, previous = supplier_items_history(target)
+    mark_vendors_stale(connection, [(current + previous, location)])
+
+@event.listens_for(Supplier, 'after_delete')
+def queue_supplier_removal(mapper, connection, target):
+    """Remember a deleted supplier so the engine can drop it once the transaction commits"""
+    object_session(target).info.setdefault('engine_removals', []).append(target.id)
+    location = connection.execute(db.select(User.location).where(User.id == target.user_id)).scalar()
+    current, previous = supplier_items_history(target)
+    mark_vendors_stale(connection, [(current + previous, location)])
+
+@event.listens_for(User, 'after_update')
+def queue_location_change(mapper, connection, target):
+    """Supplier locations live on User, so a moved supplier reloads the engine"""
+    history = inspect(target).attrs.location.history
+    if target.role == 'supplier' and history.has_changes():
+        object_session(target).info['engine_invalidate'] = True
+        items = [
+            item for (value,) in connection.execute(db.select(Supplier.items).where(Supplier.user_id == target.id))
+            for item in (json.loads(value) if value else [])
+        ]
+        mark_vendors_stale(connection, [(items, location) for location in list(history.deleted) + [target.location]])
+
+@event.listens_for(Vendor, 'after_update')
+def mark_vendor_stale(mapper, connection, target):
+    """A vendor's own needs or location changing invalidates its materialized recommendations"""
+    state = inspect(target)
+    if state.attrs.needs.history.has_changes() or state.attrs.location.history.has_changes():
+        connection.execute(
+            db.update(VendorRecommendation)
+            .where(VendorRecommendation.vendor_id == target.id)
+            .values(stale=True, version=VendorRecommendation.version + 1)
+        )
+
+@event.listens_for(Session, 'after_commit')
+def apply_engine_changes(db_session):
+    """Patch the process-wide engine with supplier writes from the committed transaction"""
+    upserts = db_session.info.pop('engine_upserts', [])
+    removals = db_session.info.pop('engine_removals', [])
+    invalidate = db_session.info.pop('engine_invalidate', False)
+    versions = db_session.info.pop('supplier_versions', None)
+    if not (upserts or removals or invalidate):
+        return
+    engine = get_engine()
+    if invalidate or (versions is not None and engine.index.version != versions[0]):
+        # A patch can't stand for changes other workers committed since the engine loaded
+        engine.invalidate()
+        return
+    engine.update_suppliers(upserts, removals, versions[1] if versions else None)
+
+@event.listens_for(Session, 'after_rollback')
+def discard_engine_changes(db_session):
+    """Forget supplier writes from a rolled back transaction"""
+    for key in ('engine_upserts', 'engine_removals', 'engine_invalidate', 'supplier_versions'):
+        db_session.info.pop(key, None)
+
+# Conditional GET
+# Models whose writes bump their table's TableVersion
+VERSIONED_MODELS = (User, Supplier, Vendor)
+
+@event.listens_for(Session, 'after_flush')
+def bump_table_versions(db_session, flush_context):
+    """
+    Bump the version of every versioned table the flush wrote to
+    
+    A supplier's location lives on User, so moving a supplier bumps the
+    supplier table too. The supplier versions before and after the
+    transaction are kept in db_session.info for apply_engine_changes.
+    """
+    written = list(db_session.new) + list(db_session.dirty) + list(db_session.deleted)
+    tables = {obj.__tablename__ for obj in written if isinstance(obj, VERSIONED_MODELS)}
+    if any(isinstance(obj, User) and obj.role == 'supplier' and inspect(obj).attrs.location.history.has_changes()
+           for obj in db_session.dirty):
+        tables.add('supplier')
+    if tables:
+        versions = bump_table_version(db_session.connection(), tables)
+        if 'supplier' in versions:
+            first = db_session.info.get('supplier_versions', (versions['supplier'] - 1, None))[0]
+            db_session.info['supplier_versions'] = (first, versions['supplier'])
+
+def bump_table_version(connection, tables):
+    """
+    Bump the versions of tables, for writes made outside the ORM as well
+    
+    Returns:
+        dict: The new version of each table
+    """
+    now = time.time()
+    versions = {}
+    for table in sorted(tables):
+        versions[table] = connection.execute(
+            sqlite_insert(TableVersion)
+            .values(name=table, version=1, updated_at=now)
+            .on_conflict_do_update(
+                index_elements=[TableVersion.name],
+                set_={'version': TableVersion.version + 1, 'updated_at': now}
+            )
+            .returning(TableVersion.version)
+        ).scalar()
+    return versions
+
+def read_table_versions(tables):
+    """
+    Get the change counters of tables
+    
+    Returns:
+        tuple: (versions, updated_at) with versions in the order of tables and
+            updated_at the latest change time, or None if none was recorded
+    """
+    rows = {row.name: row for row in db.session.execute(
+        db.select(TableVersion.name, TableVersion.version, TableVersion.updated_at).where(TableVersion.name.in_(tables))
+    )}
+    versions = tuple(rows[table].version if table in rows else 0 for table in tables)
+    updated = [row.updated_at for row in rows.values() if row.updated_at is not None]
+    return versions, max(updated) if updated else None
+
+def conditional_get(*tables, per_user=False):
+    """
+    Make a GET endpoint answer 304 Not Modified while tables are unchanged
+    
+    The strong ETag is derived from the endpoint, its query string, the
+    tables' change counters and, with per_user, the current user, so a
+    matching If-None-Match is answered before the view runs any query or
+    serialization. Last-Modified is only sent once the last change is over
+    a second old, so a later change always moves it forward. Cache-Control
+    comes from app.config['CACHE_CONTROL'] for the endpoint.
+    
+    Args:
+        tables (str): Tables the response is built from
+        per_user (bool): Whether the response differs per logged in user
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+            versions, updated_at = read_table_versions(tables)
+            key = [request.endpoint, request.query_string.decode(), versions]
+            if per_user:
+                key.append(current_user.get_id())
+            etag = hashlib.sha1(json.dumps(key).encode()).hexdigest()[:32]
+            last_modified = None
+            if updated_at is not None and time.time() - updated_at >= 1:
+                last_modified = datetime.utcfromtimestamp(int(updated_at))
+            
+            if request.if_none_match:
+                # The client may hold a compressed variant, whose ETag carries the encoding
+                matched = [tag for tag in etag_variants(etag, app.config['COMPRESS_ALGORITHMS'])
+                           if request.if_none_match.contains(tag)]
+                not_modified = bool(matched)
+            else:
+                not_modified = last_modified is not None and request.if_modified_since is not None and \
+                    last_modified.replace(tzinfo=request.if_modified_since.tzinfo) <= request.if_modified_since
+            if not_modified:
+                response = Response(status=304)
+                response.set_etag(matched[0] if request.if_none_match else etag)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            cache_control = app.config['CACHE_CONTROL'].get(request.endpoint)
+            if cache_control:
+                response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
+
+def has_token(config_key, header):
+    """Whether the request's header, or its token query argument, equals the token in app.config[config_key]"""
+    token = app.config[config_key]
+    given = request.headers.get(header) or request.args.get('token', '')
+    return bool(token) and hmac.compare_digest(given.encode(), token.encode())
+
+def token_required(config_key, header):
+    """Only allow requests carrying the token in app.config[config_key]; nobody while it is unset"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not has_token(config_key, header):
+                return jsonify({'error': 'A valid token is required'}), 403
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def read_only(view):
+    """Serve a view's GET requests from the read-only database, when one is configured"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method == 'GET':
+            g.read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.after_request
+def compress(response):
+    """Compress text responses with the best encoding the client accepts"""
+    return compress_response(
+        response,
+        request.accept_encodings,
+        app.config['COMPRESS_ALGORITHMS'],
+        app.config['COMPRESS_MIN_SIZE'],
+        app.config['COMPRESS_LEVELS']
+    )
+
+# Metrics
+metrics = MetricsRegistry(
+    app.config['METRICS_DIR'] if app.config['METRICS'] == 'on' else None,
+    flush_interval=app.config['METRICS_FLUSH_INTERVAL']
+)
+metrics.counter('http_requests_total', 'Requests by endpoint, method and status code')
+metrics.histogram('http_request_duration_seconds', 'Request latency by endpoint, until the response body is sent')
+metrics.histogram('http_request_db_queries', 'SQL statements executed per request by endpoint',
+                  buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+metrics.histogram('http_request_db_seconds', 'Time spent in SQL statements per request by endpoint')
+metrics.histogram('stage_duration_seconds', 'Time spent in OCR, the chatbot and recommendation scoring by stage')
+metrics.counter('user_cache_lookups_total', 'Logged-in user lookups by result; every hit is a query saved')
+metrics.counter('recommendation_cache_lookups_total', 'Recommendation result cache lookups by result')
+metrics.counter('chat_buffer_rows_total', 'Write-behind chat rows by outcome')
+
+def cache_counters():
+    """The process's cache and chat buffer totals, read whenever metrics are written"""
+    counters = []
+    if user_cache is not None:
+        stats = user_cache.stats()
+        counters += [('user_cache_lookups_total', {'result': 'hit'}, stats['hits']),
+                     ('user_cache_lookups_total', {'result': 'miss'}, stats['misses'])]
+    stats = get_cache_stats()
+    if stats is not None:
+        counters += [('recommendation_cache_lookups_total', {'result': 'hit'}, stats['hits']),
+                     ('recommendation_cache_lookups_total', {'result': 'miss'}, stats['misses'])]
+    stats = chat_buffer.stats()
+    counters += [('chat_buffer_rows_total', {'outcome': outcome}, stats[outcome])
+                 for outcome in ('written', 'dropped')]
+    return counters
+
+metrics.add_collector(cache_counters)
+
+class RequestMetrics:
+    """Start time, SQL statements and SQL time of one request"""
+    __slots__ = ('started', 'queries', 'sql_seconds')
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+def start_request_metrics():
+    metrics.ensure_flushing()
+    g.request_metrics = RequestMetrics()
+
+def record_request_metrics(response):
+    """Record the request once its response is closed, so streamed bodies are timed to the end"""
+    request_metrics = g.get('request_metrics')
+    if request_metrics is None:
+        return response
+    endpoint = request.endpoint or 'unmatched'
+    method = request.method
+    
+    def record():
+        metrics.inc('http_requests_total', endpoint=endpoint, method=method, status=response.status_code)
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - request_metrics.started, endpoint=endpoint)
+        metrics.observe('http_request_db_queries', request_metrics.queries, endpoint=endpoint)
+        metrics.observe('http_request_db_seconds', request_metrics.sql_seconds, endpoint=endpoint)
+    response.call_on_close(record)
+    return response
+
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    """Add a statement to the running request's counts, if it runs for a request"""
+    request_metrics = g.get('request_metrics') if has_app_context() else None
+    if request_metrics is not None:
+        request_metrics.queries += 1
+        request_metrics.sql_seconds += time.perf_counter() - conn.info['query_started']
+
+if app.config['METRICS'] == 'on':
+    app.before_request(start_request_metrics)
+    app.after_request(record_request_metrics)
+    event.listen(Engine, 'before_cursor_execute', start_query_timer)
+    event.listen(Engine, 'after_cursor_execute', count_query)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Metrics of every worker in the Prometheus text format"""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Request profiling
+request_profiler = RequestProfiler(
+    app.config['PROFILE_DIR'],
+    sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+    token=app.config['PROFILE_TOKEN'],
+    max_files=app.config['PROFILE_MAX_FILES']
+)
+
+def start_profile():
+    trigger = request_profiler.trigger(request.headers.get('X-Profile'))
+    if trigger is None:
+        return
+    profile = request_profiler.start()
+    if profile is not None:
+        g.profile = (profile, trigger, time.perf_counter())
+        g.profile_name = f'{int(time.time() * 1000)}-{os.getpid()}-{request.endpoint or "unmatched"}'
+
+def finish_profile(status):
+    """Take the running capture off the request, returning a callable that saves it"""
+    profiler, trigger, started = g.pop('profile')
+    name = g.profile_name
+    info = {
+        'endpoint': request.endpoint or 'unmatched',
+        'method': request.method,
+        'path': request.path,
+        'status': status,
+        'trigger': trigger,
+        'pid': os.getpid()
+    }
+    
+    def save():
+        info['duration_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        request_profiler.save(profiler, name, info)
+    return save
+
+def tag_profiled_response(response):
+    """Save the capture once the response is closed, after any streamed body, and name it in a header"""
+    if g.get('profile') is not None:
+        response.call_on_close(finish_profile(response.status_code))
+        response.headers['X-Profile-Id'] = g.profile_name
+    return response
+
+def save_unfinished_profile(exc):
+    # after_request does not run when an exception propagates
+    if g.get('profile') is not None:
+        finish_profile(500)()
+
+if request_profiler.enabled:
+    app.before_request(start_profile)
+    app.after_request(tag_profiled_response)
+    app.teardown_request(save_unfinished_profile)
+
+@app.route('/debug/profiles/<name>')
+@token_required('PROFILE_TOKEN', 'X-Profile')
+def download_profile(name):
+    """A captured profile as a pstats file"""
+    if name not in request_profiler.names():
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_from_directory(app.config['PROFILE_DIR'], f'{name}.prof', as_attachment=True)
+
+# Column values of a user as cached by user_cache
+USER_COLUMNS = [column.key for column in User.__table__.columns]
+user_cache = UserCache(ttl=app.config['USER_CACHE_TTL'], max_size=app.config['USER_CACHE_SIZE']) \
+    if app.config['USER_CACHE_TTL'] > 0 else None
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    """Load the logged-in user, from user_cache when it has the row"""
+    user_id = int(user_id)
+    if user_cache is None:
+        return db.session.get(User, user_id)
+    fields = user_cache.get(user_id)
+    if fields is None:
+        generation = user_cache.generation
+        user = db.session.get(User, user_id)
+        if user is not None:
+            user_cache.set(user_id, {column: getattr(user, column) for column in USER_COLUMNS}, generation)
+        return user
+    user = User(**fields)
+    make_transient_to_detached(user)
+    # Attach a copy to the request's session without a query, so changes to current_user still save
+    return db.session.merge(user, load=False)
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def queue_user_invalidation(mapper, connection, target):
+    """Remember a changed user so its cache entry is dropped once the transaction commits"""
+    object_session(target).info.setdefault('user_invalidations', set()).add(target.id)
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_cached_users(db_session):
+    for user_id in db_session.info.pop('user_invalidations', ()):
+        if user_cache is not None:
+            user_cache.invalidate(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def discard_user_invalidations(db_session):
+    db_session.info.pop('user_invalidations', None)
 
 # Routes
 @app.route('/')
@@ -130,15 +958,171 @@ def dashboard():
         vendor = Vendor.query.filter_by(user_id=current_user.id).first()
         return render_template('vendor_dashboard.html', vendor=vendor)
 
+# Supplier and vendor listings
+SUPPLIER_SORTS = {
+    # sort name: (keyset columns, descending)
+    'id': ((Supplier.id,), False),
+    'rating': ((Supplier.rating, Supplier.id), True),
+}
+
+def encode_cursor(values):
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor, columns):
+    """
+    Decode a cursor made by encode_cursor for a page ordered by columns
+    
+    Raises:
+        ValueError: If the cursor is malformed or its values do not fit the columns
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('Invalid cursor')
+    decoded = []
+    for value, column in zip(values, columns):
+        if isinstance(column.type, db.DateTime):
+            try:
+                decoded.append(datetime.fromisoformat(value))
+            except (ValueError, TypeError):
+                raise ValueError('Invalid cursor')
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            decoded.append(value)
+        else:
+            raise ValueError('Invalid cursor')
+    return decoded
+
+def listing_limit(args):
+    """Get the requested page size, clamped to LISTING_MAX_PAGE_SIZE"""
+    limit = args.get('limit', app.config['LISTING_PAGE_SIZE'], type=int)
+    return max(1, min(limit, app.config['LISTING_MAX_PAGE_SIZE']))
+
+def fetch_keyset_page(query, columns, descending, cursor, limit):
+    """
+    Fetch the page of query after cursor, ordered by columns
+    
+    The columns must end with a unique one so the order is total. The query
+    continues from the cursor with a row value comparison, so each page is
+    an index range scan however deep it is.
+    
+    Returns:
+        tuple: (rows, next_cursor), next_cursor being None on the last page
+    """
+    if cursor:
+        key = tuple_(*columns)
+        after = tuple_(*decode_cursor(cursor, columns), types=[column.type for column in columns])
+        query = query.filter(key < after if descending else key > after)
+    query = query.order_by(*[column.desc() if descending else column for column in columns])
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], column.key) for column in columns])
+
+def query_supplier_page(args):
+    """
+    Fetch one page of suppliers for the listings
+    
+    Args:
+        args: Request arguments. location, item, min_rating and price_range
+            filter the suppliers; sort is 'id' (default) or 'rating' (highest
+            first); cursor continues from a previous page; limit sets the page size
+    
+    Returns:
+        tuple: (rows, next_cursor)
+    
+    Raises:
+        ValueError: For an unknown sort, a malformed cursor or min_rating
+    """
+    sort = args.get('sort', 'id')
+    if sort not in SUPPLIER_SORTS:
+        raise ValueError(f"Unknown sort: {sort}")
+    columns, descending = SUPPLIER_SORTS[sort]
+    
+    query = db.session.query(
+        Supplier.id, Supplier.business_name, Supplier.items, Supplier.rating, Supplier.total_ratings,
+        Supplier.description, Supplier.address, Supplier.price_range, User.location
+    ).join(User, User.id == Supplier.user_id)
+    if args.get('location'):
+        query = query.filter(User.location.collate('NOCASE') == args['location'])
+    if args.get('item'):
+        query = query.filter(Supplier.id.in_(supplier_ids_with_item(args['item'], args.get('location'))))
+    if args.get('min_rating'):
+        try:
+            query = query.filter(Supplier.rating >= float(args['min_rating']))
+        except ValueError:
+            raise ValueError('min_rating must be a number')
+    if args.get('price_range'):
+        query = query.filter(Supplier.price_range == args['price_range'])
+    return fetch_keyset_page(query, columns, descending, args.get('cursor'), listing_limit(args))
+
+def query_vendor_page(args):
+    """
+    Fetch one page of vendors, in id order, for the listings
+    
+    Args:
+        args: Request arguments. location and item (a listed need) filter the
+            vendors; cursor continues from a previous page; limit sets the page size
+    
+    Returns:
+        tuple: (rows, next_cursor)
+    
+    Raises:
+        ValueError: For a malformed cursor
+    """
+    query = db.session.query(Vendor.id, Vendor.business_name, Vendor.needs, Vendor.location)
+    if args.get('location'):
+        query = query.filter(Vendor.location.collate('NOCASE') == args['location'])
+    if args.get('item'):
+        query = query.filter(Vendor.id.in_(vendor_ids_needing(args['item'], args.get('location'))))
+    return fetch_keyset_page(query, (Vendor.id,), False, args.get('cursor'), listing_limit(args))
+
+def next_page_url(next_cursor):
+    """URL of the current listing with the same filters, continuing from next_cursor"""
+    if next_cursor is None:
+        return None
+    args = request.args.to_dict()
+    args['cursor'] = next_cursor
+    return url_for(request.endpoint, **args)
+
 @app.route('/vendors')
+@read_only
 def vendors():
-    vendors = Vendor.query.all()
-    return render_template('vendors.html', vendors=vendors)
+    try:
+        rows, next_cursor = query_vendor_page(request.args)
+    except ValueError as e:
+        flash(str(e), 'error')
+        rows, next_cursor = [], None
+    vendors = [{
+        'business_name': row.business_name,
+        'location': row.location,
+        'needs_list': json.loads(row.needs) if row.needs else []
+    } for row in rows]
+    return render_template('vendors.html', vendors=vendors, filters=request.args, next_url=next_page_url(next_cursor))
 
 @app.route('/suppliers')
+@read_only
 def suppliers():
-    suppliers = Supplier.query.all()
-    return render_template('suppliers.html', suppliers=suppliers)
+    try:
+        rows, next_cursor = query_supplier_page(request.args)
+    except ValueError as e:
+        flash(str(e), 'error')
+        rows, next_cursor = [], None
+    suppliers = [{
+        'business_name': row.business_name,
+        'location': row.location,
+        'rating': row.rating,
+        'total_ratings': row.total_ratings,
+        'description': row.description,
+        'address': row.address,
+        'items_list': json.loads(row.items) if row.items else []
+    } for row in rows]
+    return render_template('suppliers.html', suppliers=suppliers, filters=request.args,
+                           next_url=next_page_url(next_cursor))
 
 @app.route('/about')
 def about():
@@ -150,31 +1134,89 @@ def contact():
 
 @app.route('/debug')
 def debug():
-    return render_template('debug.html')
+    # Profiles expose code paths, timings and request URLs, so they are only listed with the profiling token
+    show_profiles = has_token('PROFILE_TOKEN', 'X-Profile')
+    return render_template('debug.html', profiles=request_profiler.slowest() if show_profiles else [],
+                           profiling=request_profiler.enabled, show_profiles=show_profiles,
+                           profile_token=request.args.get('token') if show_profiles else None)
+
+@app.route('/debug/stats')
+def debug_stats():
+    """Counters of this worker's caches and chat buffer"""
+    return jsonify({
+        'pid': os.getpid(),
+        'user_cache': user_cache.stats() if user_cache is not None else None,
+        'recommendation_cache': get_cache_stats(),
+        'chat_buffer': chat_buffer.stats()
+    })
 
 @app.route('/test-static')
 def test_static():
     return render_template('test_static.html')
 
 # API Routes
+def stream_json_array(elements, chunk_size=500):
+    """
+    Yield a JSON array in chunks
+    
+    Args:
+        elements (iterable): Already encoded JSON values
+        chunk_size (int): Number of elements joined into each yielded chunk
+    """
+    yield '['
+    separator = ''
+    for chunk in iter_chunks(elements, chunk_size):
+        yield separator + ','.join(chunk)
+        separator = ','
+    yield ']'
+
+def json_list_column(value):
+    """Pass a JSON list column through as-is; the stored text is already encoded"""
+    return value or '[]'
+
+def iter_suppliers_json(rows):
+    """Encode supplier rows carrying their owner's location"""
+    dumps = dumps_json
+    for row in rows:
+        # Keys in sorted order, as jsonify writes them
+        yield (f'{{"business_name":{dumps(row.business_name)},"description":{dumps(row.description)},'
+               f'"id":{row.id},"items":{json_list_column(row.items)},"location":{dumps(row.location)},'
+               f'"rating":{dumps(row.rating)},"total_ratings":{dumps(row.total_ratings)}}}')
+
+def iter_vendors_json(rows):
+    """Encode vendor rows"""
+    dumps = dumps_json
+    for row in rows:
+        yield (f'{{"business_name":{dumps(row.business_name)},"id":{row.id},'
+               f'"location":{dumps(row.location)},"needs":{json_list_column(row.needs)}}}')
+
+def listing_response(rows, next_cursor, encode):
+    """
+    Stream a listing page as a JSON array
+    
+    The next page is advertised in a Link header and in X-Next-Cursor, so
+    the body keeps its plain array shape.
+    """
+    response = Response(stream_with_context(stream_json_array(encode(rows))), mimetype='application/json')
+    if next_cursor is not None:
+        response.headers['Link'] = f'<{next_page_url(next_cursor)}>; rel="next"'
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
 @app.route('/api/suppliers')
+@read_only
+@conditional_get('supplier', 'user')
 def api_suppliers():
-    suppliers = Supplier.query.all()
-    suppliers_data = []
-    for supplier in suppliers:
-        user = User.query.get(supplier.user_id)
-        suppliers_data.append({
-            'id': supplier.id,
-            'business_name': supplier.business_name,
-            'items': json.loads(supplier.items) if supplier.items else [],
-            'rating': supplier.rating,
-            'total_ratings': supplier.total_ratings,
-            'location': user.location,
-            'description': supplier.description
-        })
-    return jsonify(suppliers_data)
+    """One page of suppliers; see query_supplier_page for the filters"""
+    try:
+        rows, next_cursor = query_supplier_page(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return listing_response(rows, next_cursor, iter_suppliers_json)
 
 @app.route('/api/vendors', methods=['GET', 'POST'])
+@read_only
+@conditional_get('vendor')
 def api_vendors():
     if request.method == 'POST':
         data = request.json
@@ -192,17 +1234,11 @@ def api_vendors():
         db.session.commit()
         return jsonify({'message': 'Vendor needs updated successfully'})
     
-    vendors = Vendor.query.all()
-    vendors_data = []
-    for vendor in vendors:
-        user = User.query.get(vendor.user_id)
-        vendors_data.append({
-            'id': vendor.id,
-            'business_name': vendor.business_name,
-            'needs': json.loads(vendor.needs) if vendor.needs else [],
-            'location': vendor.location
-        })
-    return jsonify(vendors_data)
+    try:
+        rows, next_cursor = query_vendor_page(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return listing_response(rows, next_cursor, iter_vendors_json)
 
 
 
@@ -210,6 +1246,9 @@ def api_vendors():
 @login_required
 def api_upload():
     """Handle bill upload and OCR processing"""
+    # OpenCV and Tesseract load on the first upload rather than at worker startup
+    import ocr
+    
     if 'file' not in request.files:
         return jsonify({'error': 'No file uploaded'}), 400
     
@@ -217,8 +1256,8 @@ def api_upload():
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
     
-    # Save file temporarily
-    filename = secure_filename(file.filename)
+    # Save file temporarily, under a unique name so concurrent uploads of 'bill.jpg' do not clash
+    filename = f'{uuid.uuid4().hex}-{secure_filename(file.filename)}'
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     file.save(filepath)
     
@@ -230,7 +1269,8 @@ def api_upload():
             return jsonify({'error': error_msg}), 400
         
         # Extract text using OCR
-        extracted_text = ocr.extract_text_from_image(filepath)
+        with metrics.timer('stage_duration_seconds', stage='ocr'):
+            extracted_text = ocr.extract_text_from_image(filepath)
         
         # Parse raw materials from text
         raw_materials = ocr.parse_raw_materials(extracted_text)
@@ -250,6 +1290,18 @@ def api_upload():
             os.remove(filepath)
         return jsonify({'error': f'OCR processing failed: {str(e)}'}), 500
 
+def insert_chats(rows):
+    """Insert buffered Chat rows with one multi-row INSERT"""
+    with app.app_context():
+        db.session.execute(db.insert(Chat).values(rows))
+        db.session.commit()
+
+chat_buffer = WriteBehindBuffer(
+    insert_chats,
+    max_batch_size=app.config['CHAT_FLUSH_BATCH_SIZE'],
+    max_delay=app.config['CHAT_FLUSH_INTERVAL_MS'] / 1000
+)
+
 @app.route('/api/chat', methods=['POST'])
 @login_required
 def api_chat():
@@ -257,163 +1309,526 @@ def api_chat():
     message = data.get('message', '')
     
     # Get chatbot response
-    response = get_chatbot_response(message)
+    with metrics.timer('stage_duration_seconds', stage='chatbot'):
+        response = get_chatbot_response(message)
     
     # Save chat to database
-    chat = Chat(
-        user_id=current_user.id,
-        message=message,
-        response=response
-    )
-    db.session.add(chat)
-    db.session.commit()
+    if app.config['CHAT_PERSISTENCE'] == 'sync':
+        chat = Chat(
+            user_id=current_user.id,
+            message=message,
+            response=response
+        )
+        db.session.add(chat)
+        db.session.commit()
+    else:
+        chat_buffer.add({
+            'user_id': current_user.id,
+            'message': message,
+            'response': response,
+            'timestamp': datetime.utcnow()
+        })
     
     return jsonify({'response': response})
 
+def iter_chats_json(rows):
+    """Encode chat history rows"""
+    dumps = dumps_json
+    for row in rows:
+        yield (f'{{"id":{row.id},"message":{dumps(row.message)},"response":{dumps(row.response)},'
+               f'"timestamp":{dumps(row.timestamp.isoformat())}}}')
+
+@app.route('/api/chat/history')
+@login_required
+def api_chat_history():
+    """The current user's chats, newest first; ?cursor= continues from a page and ?limit= sets its size"""
+    # Chats this worker has not written yet would otherwise be missing. Flushing writes, and a read-only
+    # replica could still lag behind the flushed chats, so unlike the other listings this reads the primary
+    chat_buffer.flush()
+    query = db.session.query(Chat.id, Chat.message, Chat.response, Chat.timestamp).filter(Chat.user_id == current_user.id)
+    try:
+        rows, next_cursor = fetch_keyset_page(
+            query, (Chat.timestamp, Chat.id), True, request.args.get('cursor'), listing_limit(request.args)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return listing_response(rows, next_cursor, iter_chats_json)
+
+def archive_old_chats(cutoff, directory, batch_size=5000):
+    """
+    Move chats older than cutoff into gzipped monthly archive files
+    
+    Each batch is appended and fsynced to its month's file before it is
+    deleted, so an interrupted run at worst archives some rows twice, which
+    read_archive skips.
+    
+    Args:
+        cutoff (datetime): Chats with an earlier timestamp are archived
+        directory (str): Archive directory
+        batch_size (int): Chats archived and deleted per transaction
+    
+    Returns:
+        int: Number of chats archived
+    """
+    archived = 0
+    last_id = 0
+    while True:
+        # Old chats have the lowest ids, so a full batch only walks old rows; the
+        # newer rows are scanned once, by the short batch that ends the run
+        rows = db.session.query(Chat.id, Chat.user_id, Chat.message, Chat.response, Chat.timestamp).filter(
+            Chat.id > last_id, Chat.timestamp < cutoff
+        ).order_by(Chat.id).limit(batch_size).all()
+        if not rows:
+            return archived
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(row.timestamp.strftime('%Y-%m'), []).append({
+                'id': row.id,
+                'user_id': row.user_id,
+                'message': row.message,
+                'response': row.response,
+                'timestamp': row.timestamp.isoformat()
+            })
+        for month, month_rows in sorted(by_month.items()):
+            append_archive(archive_path(directory, month), month_rows)
+        db.session.execute(db.delete(Chat).where(Chat.id.in_([row.id for row in rows])))
+        db.session.commit()
+        archived += len(rows)
+        if len(rows) < batch_size:
+            return archived
+        last_id = rows[-1].id
+
+@app.cli.command('archive-chats')
+@click.option('--days', type=int, default=None, help='Archive chats older than this many days [CHAT_RETENTION_DAYS].')
+@click.option('--vacuum', is_flag=True, help='Rebuild the database file afterwards to give the freed pages back.')
+def archive_chats_command(days, vacuum):
+    """Move old chats to compressed monthly archive files."""
+    days = app.config['CHAT_RETENTION_DAYS'] if days is None else days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    archived = archive_old_chats(cutoff, app.config['CHAT_ARCHIVE_DIR'])
+    print(f"Archived {archived} chats older than {cutoff:%Y-%m-%d} to {app.config['CHAT_ARCHIVE_DIR']}")
+    if vacuum:
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.exec_driver_sql('VACUUM')
+
 @app.route('/api/recommendations')
 @login_required
+@conditional_get('supplier', 'user', 'vendor', per_user=True)
 def api_recommendations():
     if current_user.role != 'vendor':
         return jsonify({'error': 'Only vendors can get recommendations'}), 403
     
-    vendor = Vendor.query.filter_by(user_id=current_user.id).first()
-    if not vendor:
+    row = db.session.query(Vendor, VendorRecommendation).outerjoin(
+        VendorRecommendation, VendorRecommendation.vendor_id == Vendor.id
+    ).filter(Vendor.user_id == current_user.id).first()
+    if not row:
         return jsonify({'error': 'Vendor profile not found'}), 404
     
-    needs = json.loads(vendor.needs) if vendor.needs else []
-    recommendations = get_supplier_recommendations(needs, vendor.location)
+    vendor, materialized = row
+    if materialized is not None and not materialized.stale:
+        body = materialized.recommendations
+    else:
+        body = refresh_vendor_recommendation(vendor, materialized)
+    return Response(body, mimetype='application/json')
+
+def refresh_vendor_recommendation(vendor, materialized=None):
+    """
+    Recompute and store a vendor's materialized recommendations
+    
+    The stored row is only overwritten if nobody marked it stale again while
+    it was being computed, and nothing is stored if the engine's suppliers
+    changed meanwhile, since the result may predate the change.
+    
+    Returns:
+        str: The recommendations as a JSON response body
+    """
+    engine = get_engine()
+    if materialized is not None and materialized.suppliers_changed_at and \
+            (engine.loaded_time is None or engine.loaded_time < materialized.suppliers_changed_at):
+        # The change may have been committed by another worker
+        engine.invalidate()
+    engine.ensure_fresh()
+    generation = engine.generation
     
+    needs = json.loads(vendor.needs) if vendor.needs else []
+    with metrics.timer('stage_duration_seconds', stage='recommendations'):
+        body = dumps_json(get_supplier_recommendations(needs, vendor.location))
+    if engine.generation != generation:
+        # Left missing or stale, so the next request computes it again
+        return body
+    now = datetime.utcnow()
+    if materialized is None:
+        db.session.execute(
+            db.insert(VendorRecommendation).prefix_with('OR IGNORE')
+            .values(vendor_id=vendor.id, recommendations=body, computed_at=now, stale=False, version=0)
+        )
+    else:
+        db.session.execute(
+            db.update(VendorRecommendation)
+            .where(VendorRecommendation.vendor_id == vendor.id, VendorRecommendation.version == materialized.version)
+            .values(recommendations=body, computed_at=now, stale=False)
+        )
+    db.session.commit()
+    return body
+
+def refresh_stale_vendor_recommendations():
+    """Recompute every missing or stale materialization; returns the number refreshed"""
+    rows = db.session.query(Vendor, VendorRecommendation).outerjoin(
+        VendorRecommendation, VendorRecommendation.vendor_id == Vendor.id
+    ).filter(db.or_(VendorRecommendation.vendor_id.is_(None), VendorRecommendation.stale.is_(True))).all()
+    for vendor, materialized in rows:
+        refresh_vendor_recommendation(vendor, materialized)
+    return len(rows)
+
+@app.cli.command('refresh-recommendations')
+def refresh_recommendations_command():
+    """Recompute stale materialized vendor recommendations."""
+    print(f"Refreshed {refresh_stale_vendor_recommendations()} vendor recommendations")
+
+@app.route('/api/recommendations/price')
+@read_only
+@login_required
+def api_price_recommendations():
+    """Suppliers of ?item= in ?location= grouped by price range"""
+    item = request.args.get('item', '').strip()
+    location = request.args.get('location', '').strip()
+    if not item or not location:
+        return jsonify({'error': 'item and location are required'}), 400
+    with metrics.timer('stage_duration_seconds', stage='price_recommendations'):
+        recommendations = get_price_recommendations(item, location)
     return jsonify(recommendations)
 
+@app.route('/api/recommendations/quality')
+@read_only
+@login_required
+def api_quality_recommendations():
+    """Best rated suppliers of ?item= in ?location="""
+    item = request.args.get('item', '').strip()
+    location = request.args.get('location', '').strip()
+    if not item or not location:
+        return jsonify({'error': 'item and location are required'}), 400
+    with metrics.timer('stage_duration_seconds', stage='quality_recommendations'):
+        recommendations = get_quality_recommendations(item, location)
+    return jsonify(recommendations)
 
+def iter_vendor_requests():
+    """Stream every vendor as a batch recommendation request"""
+    rows = db.session.query(Vendor.id, Vendor.needs, Vendor.location).order_by(Vendor.id).yield_per(1000)
+    for row in rows:
+        yield {
+            'vendor_id': row.id,
+            'needs': json.loads(row.needs) if row.needs else [],
+            'location': row.location or ''
+        }
 
-# Initialize database
-with app.app_context():
+@app.route('/api/recommendations/batch', methods=['POST'])
+@token_required('RECOMMENDATION_BATCH_TOKEN', 'X-Batch-Token')
+def api_recommendations_batch():
+    """Stream recommendations for many vendors, or all of them, as JSON lines"""
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    try:
+        max_recommendations = int(data.get('max_recommendations', 5))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'max_recommendations must be a number'}), 400
+    
+    if data.get('all_vendors'):
+        vendor_requests = iter_vendor_requests()
+    else:
+        vendors = data.get('vendors')
+        if not isinstance(vendors, list):
+            return jsonify({'error': 'Provide a vendors list or all_vendors'}), 400
+        vendor_requests = []
+        for vendor in vendors:
+            if not isinstance(vendor, dict):
+                return jsonify({'error': 'Each vendor must be an object'}), 400
+            needs = vendor.get('needs', [])
+            if not isinstance(needs, list) or not all(isinstance(need, str) for need in needs):
+                return jsonify({'error': 'Vendor needs must be a list of item names'}), 400
+            if not isinstance(vendor.get('location', ''), str):
+                return jsonify({'error': 'Vendor location must be a string'}), 400
+            vendor_request = {'needs': needs, 'location': vendor.get('location', '')}
+            if 'vendor_id' in vendor:
+                vendor_request['vendor_id'] = vendor['vendor_id']
+            vendor_requests.append(vendor_request)
+    
+    results = get_batch_recommendations(
+        vendor_requests,
+        max_recommendations,
+        processes=app.config['RECOMMENDATION_BATCH_PROCESSES'] or None
+    )
+    
+    def lines():
+        # Results are scored as the response streams, so the stage lasts until the last line
+        with metrics.timer('stage_duration_seconds', stage='batch_recommendations'):
+            for result in results:
+                yield dumps_json(result) + '\n'
+    return Response(stream_with_context(lines()), mimetype='application/x-ndjson')
+
+
+
+# Database setup
+SAMPLE_USERS = [
+    # (user, profile); every sample account's password is 'password123'
+    ({'username': 'fresh_veggies', 'email': 'fresh@example.com', 'role': 'supplier', 'phone': '9876543210',
+      'location': 'Mumbai'},
+     {'business_name': 'Fresh Vegetables Co.', 'items': ['onion', 'tomato', 'potato', 'carrot'], 'rating': 4.5,
+      'total_ratings': 25, 'description': 'Fresh vegetables delivered daily', 'address': 'Mumbai Central, Mumbai'}),
+    ({'username': 'street_food_king', 'email': 'vendor@example.com', 'role': 'vendor', 'phone': '9876543211',
+      'location': 'Mumbai'},
+     {'business_name': 'Street Food King', 'needs': ['onion', 'tomato', 'potato'], 'location': 'Mumbai'}),
+    # West Bengal vendors
+    ({'username': 'siliguri_food_corner', 'email': 'siliguri@example.com', 'role': 'vendor', 'phone': '9876543212',
+      'location': 'Siliguri'},
+     {'business_name': 'Siliguri Food Corner', 'needs': ['rice', 'flour', 'oil', 'spices', 'onion', 'tomato'],
+      'location': 'Siliguri'}),
+    ({'username': 'darjeeling_street_food', 'email': 'darjeeling@example.com', 'role': 'vendor', 'phone': '9876543213',
+      'location': 'Darjeeling'},
+     {'business_name': 'Darjeeling Street Food', 'needs': ['potato', 'carrot', 'onion', 'tomato', 'spices'],
+      'location': 'Darjeeling'}),
+    ({'username': 'jalpaiguri_food_hub', 'email': 'jalpaiguri@example.com', 'role': 'vendor', 'phone': '9876543214',
+      'location': 'Jalpaiguri'},
+     {'business_name': 'Jalpaiguri Food Hub', 'needs': ['rice', 'flour', 'oil', 'onion', 'tomato', 'potato'],
+      'location': 'Jalpaiguri'}),
+    ({'username': 'cooch_behar_street_vendor', 'email': 'coochbehar@example.com', 'role': 'vendor',
+      'phone': '9876543215', 'location': 'Cooch Behar'},
+     {'business_name': 'Cooch Behar Street Vendor',
+      'needs': ['rice', 'flour', 'oil', 'spices', 'onion', 'tomato', 'potato'], 'location': 'Cooch Behar'}),
+]
+
+def init_database():
+    """Create missing tables, columns and indexes, and fill the item tables"""
     db.create_all()
+    upgrade_schema()
+    backfill_item_tables()
+
+def seed_sample_data():
+    """
+    Add the sample suppliers and vendors if there are no users yet
     
-    # Add sample data if database is empty
-    if not User.query.first():
-        # Create sample suppliers
-        supplier1 = User(
-            username='fresh_veggies',
-            email='fresh@example.com',
-            password_hash=generate_password_hash('password123'),
-            role='supplier',
-            phone='9876543210',
-            location='Mumbai'
-        )
-        db.session.add(supplier1)
-        db.session.commit()
-        
-        supplier_profile1 = Supplier(
-            user_id=supplier1.id,
-            business_name='Fresh Vegetables Co.',
-            items=json.dumps(['onion', 'tomato', 'potato', 'carrot']),
-            rating=4.5,
-            total_ratings=25,
-            description='Fresh vegetables delivered daily',
-            address='Mumbai Central, Mumbai'
-        )
-        db.session.add(supplier_profile1)
-        
-        # Create sample vendor
-        vendor1 = User(
-            username='street_food_king',
-            email='vendor@example.com',
-            password_hash=generate_password_hash('password123'),
-            role='vendor',
-            phone='9876543211',
-            location='Mumbai'
-        )
-        db.session.add(vendor1)
-        db.session.commit()
-        
-        vendor_profile1 = Vendor(
-            user_id=vendor1.id,
-            business_name='Street Food King',
-            needs=json.dumps(['onion', 'tomato', 'potato']),
-            location='Mumbai'
-        )
-        db.session.add(vendor_profile1)
-        
-        # Create West Bengal vendors
-        vendor2 = User(
-            username='siliguri_food_corner',
-            email='siliguri@example.com',
-            password_hash=generate_password_hash('password123'),
-            role='vendor',
-            phone='9876543212',
-            location='Siliguri'
-        )
-        db.session.add(vendor2)
-        db.session.commit()
-        
-        vendor_profile2 = Vendor(
-            user_id=vendor2.id,
-            business_name='Siliguri Food Corner',
-            needs=json.dumps(['rice', 'flour', 'oil', 'spices', 'onion', 'tomato']),
-            location='Siliguri'
-        )
-        db.session.add(vendor_profile2)
-        
-        vendor3 = User(
-            username='darjeeling_street_food',
-            email='darjeeling@example.com',
-            password_hash=generate_password_hash('password123'),
-            role='vendor',
-            phone='9876543213',
-            location='Darjeeling'
-        )
-        db.session.add(vendor3)
-        db.session.commit()
-        
-        vendor_profile3 = Vendor(
-            user_id=vendor3.id,
-            business_name='Darjeeling Street Food',
-            needs=json.dumps(['potato', 'carrot', 'onion', 'tomato', 'spices']),
-            location='Darjeeling'
-        )
-        db.session.add(vendor_profile3)
-        
-        vendor4 = User(
-            username='jalpaiguri_food_hub',
-            email='jalpaiguri@example.com',
-            password_hash=generate_password_hash('password123'),
-            role='vendor',
-            phone='9876543214',
-            location='Jalpaiguri'
-        )
-        db.session.add(vendor4)
-        db.session.commit()
-        
-        vendor_profile4 = Vendor(
-            user_id=vendor4.id,
-            business_name='Jalpaiguri Food Hub',
-            needs=json.dumps(['rice', 'flour', 'oil', 'onion', 'tomato', 'potato']),
-            location='Jalpaiguri'
-        )
-        db.session.add(vendor_profile4)
-        
-        vendor5 = User(
-            username='cooch_behar_street_vendor',
-            email='coochbehar@example.com',
-            password_hash=generate_password_hash('password123'),
-            role='vendor',
-            phone='9876543215',
-            location='Cooch Behar'
-        )
-        db.session.add(vendor5)
-        db.session.commit()
+    Returns:
+        bool: Whether the sample data was added
+    """
+    if User.query.first():
+        return False
+    # One slow password hash shared by the sample accounts
+    password_hash = generate_password_hash('password123')
+    for user_fields, profile in SAMPLE_USERS:
+        user = User(password_hash=password_hash, **user_fields)
+        db.session.add(user)
+        db.session.flush()
+        if user.role == 'supplier':
+            db.session.add(Supplier(user_id=user.id, **dict(profile, items=json.dumps(profile['items']))))
+        else:
+            db.session.add(Vendor(user_id=user.id, **dict(profile, needs=json.dumps(profile['needs']))))
+    db.session.commit()
+    return True
+
+@app.cli.command('init-db')
+@click.option('--sample-data/--no-sample-data', default=True, help='Add sample users to an empty database.')
+def init_db_command(sample_data):
+    """Create or upgrade the database schema and add sample data."""
+    init_database()
+    print("Database schema is up to date")
+    if sample_data and seed_sample_data():
+        print(f"Added {len(SAMPLE_USERS)} sample users")
+
+# Bulk import and export
+def taken_accounts(connection, accounts):
+    """Get the emails and usernames among accounts that are already registered"""
+    emails = [user['email'] for user, _ in accounts]
+    usernames = [user['username'] for user, _ in accounts]
+    rows = connection.execute(
+        db.select(User.email, User.username).where(db.or_(User.email.in_(emails), User.username.in_(usernames)))
+    )
+    taken = set()
+    for row in rows:
+        taken.update(row)
+    return taken
+
+def insert_accounts(connection, accounts):
+    """
+    Insert users and their profiles with multi-row inserts on connection
+    
+    Raw inserts skip the mapper events, so this writes the supplier_item and
+    vendor_need rows, marks affected materialized recommendations stale and
+    bumps the table versions itself.
+    
+    Args:
+        connection: Connection in the batch's transaction
+        accounts (list): (user, profile) pairs from clean_account, with password hashes
+    
+    Returns:
+        tuple: (suppliers, vendors) inserted
+    """
+    now = datetime.utcnow()
+    user_ids = connection.execute(
+        db.insert(User).returning(User.id, sort_by_parameter_order=True),
+        [dict(user, created_at=now) for user, _ in accounts]
+    ).scalars().all()
+    suppliers, vendors = [], []
+    for user_id, (user, profile) in zip(user_ids, accounts):
+        if profile is None:
+            continue
+        if user['role'] == 'supplier':
+            suppliers.append((dict(profile, user_id=user_id, items=json.dumps(profile['items'])), profile['items'], user['location']))
+        else:
+            vendors.append((dict(profile, user_id=user_id, needs=json.dumps(profile['needs']), location=user['location']),
+                            profile['needs'], user['location']))
+    item_ids = get_item_id_map(connection, [name for _, names, _ in suppliers + vendors for name in names])
+    
+    if suppliers:
+        supplier_ids = connection.execute(
+            db.insert(Supplier).returning(Supplier.id, sort_by_parameter_order=True), [row for row, _, _ in suppliers]
+        ).scalars().all()
+        item_rows = [
+            {'supplier_id': supplier_id, 'item_id': item_id, 'location': normalize_location(location)}
+            for supplier_id, (_, items, location) in zip(supplier_ids, suppliers)
+            for item_id in {item_ids[name] for name in map(normalize_item_name, items) if name}
+        ]
+        if item_rows:
+            connection.execute(db.insert(SupplierItem), item_rows)
+        mark_vendors_stale(connection, [(items, location) for _, items, location in suppliers])
+    if vendors:
+        vendor_ids = connection.execute(
+            db.insert(Vendor).returning(Vendor.id, sort_by_parameter_order=True), [row for row, _, _ in vendors]
+        ).scalars().all()
+        need_rows = [
+            {'vendor_id': vendor_id, 'item_id': item_id, 'location': normalize_location(location)}
+            for vendor_id, (_, needs, location) in zip(vendor_ids, vendors)
+            for item_id in {item_ids[name] for name in map(normalize_item_name, needs) if name}
+        ]
+        if need_rows:
+            connection.execute(db.insert(VendorNeed), need_rows)
+    
+    bump_table_version(connection, [table for table, rows in [('user', accounts), ('supplier', suppliers), ('vendor', vendors)] if rows])
+    return len(suppliers), len(vendors)
+
+def import_accounts(records, batch_size=1000, pool=None):
+    """
+    Load accounts in batches of one transaction each
+    
+    Accounts whose email or username is already registered are skipped, so a
+    file can be loaded again after an interrupted run. Plain passwords are
+    hashed before the batch's transaction starts, so the slow part does not
+    hold the database's write lock.
+    
+    Args:
+        records: (line_number, record) pairs, as read_accounts yields them
+        batch_size (int): Accounts per transaction
+        pool: Optional multiprocessing pool to hash passwords in
+    
+    Returns:
+        dict: Numbers of users, suppliers and vendors imported and rows skipped,
+            and the invalid rows as (line_number, message) pairs under 'errors'
+    """
+    result = {'users': 0, 'suppliers': 0, 'vendors': 0, 'skipped': 0, 'errors': []}
+    for batch in iter_chunks(records, batch_size):
+        accounts = []
+        for line_number, record in batch:
+            try:
+                accounts.append(clean_account(record))
+            except ValueError as e:
+                result['errors'].append((line_number, str(e)))
+        with db.engine.connect() as connection:
+            taken = taken_accounts(connection, accounts) if accounts else set()
         
-        vendor_profile5 = Vendor(
-            user_id=vendor5.id,
-            business_name='Cooch Behar Street Vendor',
-            needs=json.dumps(['rice', 'flour', 'oil', 'spices', 'onion', 'tomato', 'potato']),
-            location='Cooch Behar'
-        )
-        db.session.add(vendor_profile5)
+        # Keep the first of several rows for the same account
+        new_accounts = []
+        for user, profile in accounts:
+            if user['email'] in taken or user['username'] in taken:
+                continue
+            taken.update((user['email'], user['username']))
+            new_accounts.append((user, profile))
+        unhashed = [user for user, _ in new_accounts if not user['password_hash']]
+        for user, password_hash in zip(unhashed, hash_passwords([user['password'] for user in unhashed], pool)):
+            user['password_hash'] = password_hash
+        for user, _ in new_accounts:
+            del user['password']
         
-        db.session.commit()
+        if new_accounts:
+            with db.engine.begin() as connection:
+                # Accounts may have registered through the site while the passwords were hashed
+                registered = taken_accounts(connection, new_accounts)
+                new_accounts = [(user, profile) for user, profile in new_accounts
+                                if user['email'] not in registered and user['username'] not in registered]
+                if new_accounts:
+                    suppliers, vendors = insert_accounts(connection, new_accounts)
+                    result['suppliers'] += suppliers
+                    result['vendors'] += vendors
+        result['users'] += len(new_accounts)
+        result['skipped'] += len(accounts) - len(new_accounts)
+    return result
+
+def iter_account_export(role=None, batch_size=1000):
+    """Yield every user with their supplier or vendor profile as an account record, fetching batch_size rows at a time"""
+    query = db.select(
+        User.username, User.email, User.password_hash, User.role, User.phone, User.location,
+        db.func.coalesce(Supplier.business_name, Vendor.business_name).label('business_name'),
+        Supplier.items, Vendor.needs, Supplier.rating, Supplier.total_ratings, Supplier.description,
+        Supplier.address, Supplier.price_range, Supplier.delivery_time
+    ).outerjoin(Supplier, Supplier.user_id == User.id).outerjoin(Vendor, Vendor.user_id == User.id).order_by(User.id)
+    if role:
+        query = query.where(User.role == role)
+    for row in db.session.execute(query.execution_options(yield_per=batch_size)):
+        record = row._asdict()
+        for column in ('items', 'needs'):
+            record[column] = json.loads(record[column]) if record[column] else None
+        yield record
+
+def open_account_file(path, mode):
+    """Open an account file for csv and line-by-line use, or stdin/stdout for '-'"""
+    if path == '-':
+        return contextlib.nullcontext(sys.stdin if mode == 'r' else sys.stdout)
+    return open(path, mode, newline='', encoding='utf-8')
+
+def account_file_format(path, fmt):
+    try:
+        return file_format(path, fmt)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+@app.cli.command('import-accounts')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='File format [from the extension].')
+@click.option('--batch-size', type=int, default=1000, help='Accounts inserted per transaction.')
+@click.option('--hash-processes', type=int, default=0, help='Processes hashing plain passwords; 0 hashes in this one.')
+def import_accounts_command(path, fmt, batch_size, hash_processes):
+    """Bulk load users with their supplier or vendor profiles from CSV or JSON lines ('-' for stdin)."""
+    fmt = account_file_format(path, fmt)
+    started = time.perf_counter()
+    pool = multiprocessing.Pool(hash_processes) if hash_processes > 0 else contextlib.nullcontext()
+    with pool as pool, open_account_file(path, 'r') as f:
+        result = import_accounts(read_accounts(f, fmt), batch_size, pool)
+    elapsed = time.perf_counter() - started
+    
+    for line_number, message in result['errors']:
+        click.echo(f'{path}:{line_number}: {message}', err=True)
+    rows = result['users'] + result['skipped'] + len(result['errors'])
+    print(f"Imported {result['users']} accounts ({result['suppliers']} suppliers, {result['vendors']} vendors) "
+          f"and skipped {result['skipped']} already registered and {len(result['errors'])} invalid rows "
+          f"in {elapsed:.1f} s ({rows / elapsed:.0f} rows/s)")
+
+@app.cli.command('export-accounts')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True, allow_dash=True))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='File format [from the extension].')
+@click.option('--role', type=click.Choice(ROLES), help='Only export vendors or suppliers.')
+def export_accounts_command(path, fmt, role):
+    """Stream users with their supplier or vendor profiles to CSV or JSON lines ('-' for stdout)."""
+    fmt = account_file_format(path, fmt)
+    started = time.perf_counter()
+    with open_account_file(path, 'w') as f:
+        count = write_accounts(f, fmt, iter_account_export(role))
+    elapsed = time.perf_counter() - started
+    # The summary goes to stderr when the accounts go to stdout
+    click.echo(f"Exported {count} accounts in {elapsed:.1f} s ({count / elapsed:.0f} rows/s)", err=path == '-')
+
+with app.app_context():
+    configure_database_connections()
 
 if __name__ == '__main__':
+    with app.app_context():
+        init_database()
+        seed_sample_data()
     app.run(debug=True) 
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Load test the SQLite database modes with concurrent worker processes.
+
+Each configuration gets a fresh database seeded with synthetic suppliers.
+Worker processes then import the app as gunicorn workers would and send a
+mix of listing reads and chat/vendor writes through the test client for a
+fixed time, so reads and writes contend for the database file the same way
+they do in production. Throughput, latency and errors (mostly 'database is
+locked') are reported per configuration.
+
+    python -m benchmarks.bench_database --workers 8 --duration 10 --output bench.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.bench_recommendations import git_revision, summarize
+from benchmarks.synthetic import generate_suppliers
+
+CONFIGURATIONS = {
+    'default': {'DATABASE_MODE': 'default'},
+    'production': {'DATABASE_MODE': 'production'},
+    'production_read_only': {'DATABASE_MODE': 'production', 'DATABASE_READ_ONLY': '1'},
+}
+READS = ['/api/suppliers?limit=50', '/api/suppliers?limit=50&sort=rating', '/api/vendors?limit=50']
+PASSWORD = 'password123'
+
+def configuration_environment(name, directory):
+    """Environment the app reads its database settings from for one configuration"""
+    environment = dict(CONFIGURATIONS[name])
+    environment.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(directory, 'bench.db')}",
+        'ITEM_MATCHER_PATH': os.path.join(directory, 'item_matcher.pkl'),
+        'RECOMMENDATION_CACHE': 'off',
+    })
+    return environment
+
+def seed(suppliers, workers, seed_value):
+    """Create the schema, synthetic suppliers and one vendor login per worker; runs in its own process"""
+    from werkzeug.security import generate_password_hash
+    from app import app, db, init_database, Supplier, User, Vendor
+
+    password_hash = generate_password_hash(PASSWORD)
+    with app.app_context():
+        init_database()
+        for supplier in generate_suppliers(suppliers, seed=seed_value):
+            user = User(username=f"bench-supplier-{supplier['id']}", email=f"supplier{supplier['id']}@bench.test",
+                        password_hash=password_hash, role='supplier', location=supplier['location'])
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Supplier(user_id=user.id, business_name=supplier['name'], items=json.dumps(supplier['items']),
+                                    rating=supplier['rating'], total_ratings=supplier['total_ratings'],
+                                    description=supplier['description'], price_range=supplier['price_range']))
+        for worker in range(workers):
+            user = User(username=f'bench-vendor-{worker}', email=f'vendor{worker}@bench.test',
+                        password_hash=password_hash, role='vendor', location='Mumbai')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Vendor(user_id=user.id, business_name=f'Bench Vendor {worker}', needs='[]'))
+        db.session.commit()
+
+def run_worker(worker, duration, write_ratio, start, result_queue):
+    """Send requests until duration has passed; runs in its own process like a gunicorn worker"""
+    from app import app
+
+    app.logger.disabled = True
+    client = app.test_client()
+    client.post('/login', data={'email': f'vendor{worker}@bench.test', 'password': PASSWORD})
+    rng = random.Random(worker)
+    latencies = {'read': [], 'write': []}
+    errors = {'read': 0, 'write': 0}
+
+    start.wait()
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        kind = 'write' if rng.random() < write_ratio else 'read'
+        started = time.perf_counter()
+        if kind == 'read':
+            response = client.get(rng.choice(READS))
+        elif rng.random() < 0.5:
+            response = client.post('/api/chat', json={'message': 'how should I store onions'})
+        else:
+            response = client.post('/api/vendors', json={'needs': rng.sample(['onion', 'tomato', 'rice', 'oil', 'salt'], 2)})
+        response.close()
+        latencies[kind].append(time.perf_counter() - started)
+        if response.status_code >= 500:
+            errors[kind] += 1
+    result_queue.put((latencies, errors))
+
+def run_configuration(context, name, args):
+    """Seed a fresh database and run the workers against it with one configuration"""
+    directory = tempfile.mkdtemp(prefix='bench-db-')
+    saved = dict(os.environ)
+    # Spawned processes inherit the environment, which is where the app reads its settings
+    os.environ.update(configuration_environment(name, directory))
+    try:
+        process = context.Process(target=seed, args=(args.suppliers, args.workers, args.seed))
+        process.start()
+        process.join()
+
+        start = context.Event()
+        result_queue = context.Queue()
+        processes = [context.Process(target=run_worker, args=(worker, args.duration, args.write_ratio, start, result_queue))
+                     for worker in range(args.workers)]
+        for process in processes:
+            process.start()
+        # Give every worker time to import the app and log in before the clock starts
+        time.sleep(args.warmup)
+        start.set()
+        results = [result_queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+        shutil.rmtree(directory, ignore_errors=True)
+
+    report = {'configuration': name, 'settings': CONFIGURATIONS[name]}
+    for kind in ['read', 'write']:
+        latencies = [latency for worker_latencies, _ in results for latency in worker_latencies[kind]]
+        report[kind] = summarize(latencies, args.duration)
+        report[kind]['errors'] = sum(worker_errors[kind] for _, worker_errors in results)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--configurations', default=','.join(CONFIGURATIONS),
+                        help='Comma-separated configurations to compare')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent worker processes')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds of load per configuration')
+    parser.add_argument('--warmup', type=float, default=10, help='Seconds allowed for workers to start')
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='Fraction of requests that write')
+    parser.add_argument('--suppliers', type=int, default=2000, help='Synthetic suppliers to seed')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench_database.json', help='JSON file to write')
+    args = parser.parse_args(argv)
+
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for name in args.configurations.split(','):
+        result = run_configuration(context, name, args)
+        results.append(result)
+        print(f"{name:>22}: reads {result['read']['throughput_per_s']}/s p99 {result['read']['p99_ms']} ms "
+              f"({result['read']['errors']} errors), writes {result['write']['throughput_per_s']}/s "
+              f"p99 {result['write']['p99_ms']} ms ({result['write']['errors']} errors)")
+
+    report = {
+        'benchmark': 'database',
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'workers': args.workers,
+        'duration_s': args.duration,
+        'write_ratio': args.write_ratio,
+        'suppliers': args.suppliers,
+        'seed': args.seed,
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmark loading accounts: per-row ORM commits against the bulk importer.
+
+The per-row path adds each user and profile through the ORM and commits,
+as /signup does. The bulk path is the 'flask import-accounts' loader at
+several batch sizes. Both get the same synthetic suppliers and vendors with
+precomputed password hashes, each in a fresh database in its own process.
+Every load is run into an empty database and again into one already holding
+vendors with materialized recommendations, which new suppliers mark stale.
+Password hashing is timed separately, in this process and in a pool, since
+it dominates imports of plain passwords.
+
+    python -m benchmarks.bench_import --accounts 5000 --output bench.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+from werkzeug.security import generate_password_hash
+
+from benchmarks.bench_recommendations import git_revision
+from benchmarks.synthetic import generate_suppliers, generate_vendors
+
+def generate_accounts(count, seed):
+    """Account records for count suppliers and vendors, half each, sharing one password hash"""
+    password_hash = generate_password_hash('password123')
+    accounts = []
+    for supplier in generate_suppliers(count // 2, seed=seed):
+        accounts.append({
+            'username': f"supplier-{supplier['id']}", 'email': f"supplier{supplier['id']}@bench.test",
+            'password_hash': password_hash, 'role': 'supplier', 'location': supplier['location'],
+            'business_name': supplier['name'], 'items': supplier['items'], 'rating': supplier['rating'],
+            'total_ratings': supplier['total_ratings'], 'description': supplier['description'],
+            'price_range': supplier['price_range'], 'delivery_time': supplier['delivery_time']
+        })
+    for vendor in generate_vendors(count - count // 2, seed=seed + 1):
+        accounts.append({
+            'username': f"vendor-{vendor['vendor_id']}", 'email': f"vendor{vendor['vendor_id']}@bench.test",
+            'password_hash': password_hash, 'role': 'vendor', 'location': vendor['location'],
+            'business_name': f"Vendor {vendor['vendor_id']}", 'needs': vendor['needs']
+        })
+    return accounts
+
+def load_per_row(accounts):
+    """Add and commit one account at a time through the ORM"""
+    from app import db, Supplier, User, Vendor
+    from bulk_load import clean_account
+
+    for record in accounts:
+        user_fields, profile = clean_account(record)
+        del user_fields['password']
+        user = User(**user_fields)
+        db.session.add(user)
+        db.session.flush()
+        if user.role == 'supplier':
+            db.session.add(Supplier(user_id=user.id, **dict(profile, items=json.dumps(profile['items']))))
+        else:
+            db.session.add(Vendor(user_id=user.id, **dict(profile, needs=json.dumps(profile['needs']),
+                                                          location=user.location)))
+        db.session.commit()
+
+def materialize_vendors(count, seed):
+    """Import count vendors and give each a materialized recommendation, as if every one had been served"""
+    from app import db, import_accounts, Vendor, VendorRecommendation
+
+    vendors = [dict(account, username=f"materialized-{i}", email=f"materialized{i}@bench.test")
+               for i, account in enumerate(generate_accounts(count * 2, seed)[count:])]
+    import_accounts(enumerate(vendors, 1))
+    db.session.execute(db.insert(VendorRecommendation).from_select(
+        ['vendor_id', 'recommendations', 'stale', 'version'],
+        db.select(Vendor.id, db.literal('{}'), db.false(), db.literal(0))
+    ))
+    db.session.commit()
+
+def run_load(mode, batch_size, accounts, materialized, result_queue):
+    """Load accounts into a fresh database holding materialized vendors; runs in its own process"""
+    from app import app, import_accounts, init_database
+
+    with app.app_context():
+        init_database()
+        if materialized:
+            materialize_vendors(materialized, seed=len(accounts))
+        started = time.perf_counter()
+        if mode == 'per_row':
+            load_per_row(accounts)
+        else:
+            import_accounts(enumerate(accounts, 1), batch_size)
+        elapsed = time.perf_counter() - started
+    result_queue.put(elapsed)
+
+def time_load(context, mode, batch_size, accounts, materialized=0):
+    """Run one load in a spawned process against a fresh database, returning its result"""
+    directory = tempfile.mkdtemp(prefix='bench-import-')
+    saved = dict(os.environ)
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(directory, 'bench.db')}",
+        'ITEM_MATCHER_PATH': os.path.join(directory, 'item_matcher.pkl'),
+    })
+    try:
+        result_queue = context.Queue()
+        process = context.Process(target=run_load, args=(mode, batch_size, accounts, materialized, result_queue))
+        process.start()
+        elapsed = result_queue.get()
+        process.join()
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+        shutil.rmtree(directory, ignore_errors=True)
+    return {'mode': mode, 'batch_size': batch_size, 'accounts': len(accounts), 'materialized_vendors': materialized,
+            'elapsed_s': round(elapsed, 3), 'rows_per_s': round(len(accounts) / elapsed, 1)}
+
+def time_hashing(passwords, processes):
+    """Hash passwords serially and with a pool of processes, returning hashes per second"""
+    from bulk_load import hash_passwords
+
+    started = time.perf_counter()
+    hash_passwords(passwords)
+    results = {'serial_per_s': round(len(passwords) / (time.perf_counter() - started), 1)}
+    with multiprocessing.Pool(processes) as pool:
+        started = time.perf_counter()
+        hash_passwords(passwords, pool)
+        results[f'pool_{processes}_per_s'] = round(len(passwords) / (time.perf_counter() - started), 1)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=5000, help='Accounts per bulk load')
+    parser.add_argument('--per-row-accounts', type=int, default=500, help='Accounts for the slower per-row load')
+    parser.add_argument('--batch-sizes', default='100,1000,5000', help='Comma-separated bulk batch sizes')
+    parser.add_argument('--materialized-vendors', type=int, default=5000,
+                        help='Vendors with materialized recommendations in the second database of each load')
+    parser.add_argument('--passwords', type=int, default=40, help='Passwords hashed for the hashing timings')
+    parser.add_argument('--hash-processes', type=int, default=os.cpu_count(), help='Pool size for hashing')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench_import.json', help='JSON file to write')
+    args = parser.parse_args(argv)
+
+    accounts = generate_accounts(args.accounts, args.seed)
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for materialized in sorted({0, args.materialized_vendors}):
+        results.append(time_load(context, 'per_row', None, accounts[:args.per_row_accounts], materialized))
+        results += [time_load(context, 'bulk', int(size), accounts, materialized) for size in args.batch_sizes.split(',')]
+    for result in results:
+        batch = f" batch {result['batch_size']}" if result['batch_size'] else ''
+        print(f"{result['mode'] + batch:>16}: {result['accounts']} accounts in {result['elapsed_s']} s, "
+              f"{result['rows_per_s']} rows/s, {result['materialized_vendors']} materialized vendors")
+    hashing = time_hashing([f'password-{i}' for i in range(args.passwords)], args.hash_processes)
+    print(f"         hashing: {', '.join(f'{key} {value}' for key, value in hashing.items())}")
+
+    report = {
+        'benchmark': 'import',
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': args.seed,
+        'results': results,
+        'hashing': hashing
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+if __name__ == '__main__':
+    main()
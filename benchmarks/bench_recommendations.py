@@ -0,0 +1,146 @@
+"""
+Benchmark the recommendation engine over synthetic data.
+
+Each (size, scoring mode) runs in a fresh process so peak RSS is measured
+per configuration. Results are written as JSON for run-to-run comparison.
+
+    python -m benchmarks.bench_recommendations --sizes 1000,10000 --output bench.json
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.synthetic import generate_suppliers, generate_vendors
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def summarize(latencies, elapsed):
+    """Latency percentiles in milliseconds and throughput for one operation"""
+    ordered = sorted(latencies)
+    count = len(ordered)
+
+    def percentile(p):
+        return round(ordered[min(count - 1, int(p / 100 * count))] * 1000, 3) if count else None
+
+    return {
+        'count': count,
+        'p50_ms': percentile(50),
+        'p90_ms': percentile(90),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'max_ms': round(ordered[-1] * 1000, 3) if count else None,
+        'mean_ms': round(sum(ordered) / count * 1000, 3) if count else None,
+        'throughput_per_s': round(count / elapsed, 1) if elapsed else None
+    }
+
+def time_calls(calls):
+    """Run zero-argument callables, returning per-call latencies and total time"""
+    latencies = []
+    started = time.perf_counter()
+    for call in calls:
+        call_started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - call_started)
+    return latencies, time.perf_counter() - started
+
+def run_configuration(size, scoring, queries, seed, result_queue):
+    """Benchmark one supplier count and scoring mode; runs in its own process"""
+    from recommendation_engine import RecommendationEngine
+
+    rss_before = peak_rss_mb()
+    suppliers = generate_suppliers(size, seed=seed)
+    vendors = generate_vendors(queries, seed=seed + 1)
+
+    started = time.perf_counter()
+    engine = RecommendationEngine(loader=lambda: suppliers, scoring=scoring)
+    engine.ensure_fresh()
+    if scoring == 'vectorized':
+        engine.get_supplier_vectors()
+    build_seconds = time.perf_counter() - started
+
+    # One untimed call warms lazily built state such as memoized location scores
+    engine.get_supplier_recommendations(vendors[0]['needs'], vendors[0]['location'])
+
+    operations = {}
+    latencies, elapsed = time_calls(
+        lambda v=v: engine.get_supplier_recommendations(v['needs'], v['location']) for v in vendors
+    )
+    operations['get_supplier_recommendations'] = summarize(latencies, elapsed)
+    latencies, elapsed = time_calls(
+        lambda v=v: engine.get_price_recommendations(v['needs'][0], v['location']) for v in vendors
+    )
+    operations['get_price_recommendations'] = summarize(latencies, elapsed)
+    latencies, elapsed = time_calls(
+        lambda v=v: engine.get_quality_recommendations(v['needs'][0], v['location']) for v in vendors
+    )
+    operations['get_quality_recommendations'] = summarize(latencies, elapsed)
+
+    result_queue.put({
+        'suppliers': size,
+        'scoring': scoring,
+        'queries': queries,
+        'build_seconds': round(build_seconds, 3),
+        'rss_before_mb': round(rss_before, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'operations': operations
+    })
+
+def git_revision():
+    """Current commit hash, if run from a git checkout"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Comma-separated supplier counts')
+    parser.add_argument('--modes', default='scalar,vectorized', help='Comma-separated scoring modes')
+    parser.add_argument('--queries', type=int, default=200, help='Vendor queries per operation')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench_recommendations.json', help='JSON file to write')
+    args = parser.parse_args(argv)
+
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for size in [int(size) for size in args.sizes.split(',')]:
+        for scoring in args.modes.split(','):
+            result_queue = context.Queue()
+            process = context.Process(target=run_configuration, args=(size, scoring, args.queries, args.seed, result_queue))
+            process.start()
+            result = result_queue.get()
+            process.join()
+            results.append(result)
+            recommendations = result['operations']['get_supplier_recommendations']
+            print(f"{size:>8} suppliers {scoring:>10}: p50 {recommendations['p50_ms']} ms, "
+                  f"p99 {recommendations['p99_ms']} ms, {recommendations['throughput_per_s']}/s, "
+                  f"peak RSS {result['peak_rss_mb']} MB")
+
+    report = {
+        'benchmark': 'recommendations',
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark JSON encoding and response compression over synthetic payloads.
+
+Each payload is a supplier list served through a bare Flask app set up the
+way app.py sets up its own: once with jsonify and once streamed, with the
+stdlib and the fast JSON provider, for each content encoding the client can
+ask for. Latency is measured through the test client, so it covers
+encoding, compression and reading the body; bytes on wire are the body
+sizes, with transfer times estimated for slow mobile links.
+
+    python -m benchmarks.bench_serialization --sizes 50,1000 --output bench.json
+"""
+import argparse
+import json
+import platform
+from datetime import datetime
+
+from flask import Flask, Response, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+
+import compression
+import fast_json
+from benchmarks.bench_recommendations import git_revision, summarize, time_calls
+from benchmarks.synthetic import generate_suppliers
+from compression import compress_response
+from fast_json import FastJSONProvider
+from recommendation_engine import iter_chunks
+
+DEFAULT_SIZES = [10, 50, 200, 1000, 10000]
+# Sustained downlink throughput in kbit/s
+LINKS = {'2g': 50, '3g': 750, '4g': 10000}
+LEVELS = {'gzip': 6, 'br': 5}
+
+def make_app(provider, encode):
+    """
+    Build an app serving the payload with the given JSON provider
+
+    Args:
+        provider: FastJSONProvider or DefaultJSONProvider class
+        encode (callable): Encodes one list element for the streamed route
+    """
+    app = Flask(__name__)
+    app.json = provider(app)
+    app.config['PAYLOAD'] = []
+
+    @app.route('/buffered')
+    def buffered():
+        return jsonify(app.config['PAYLOAD'])
+
+    @app.route('/streamed')
+    def streamed():
+        # Chunked like app.stream_json_array
+        def chunks():
+            yield '['
+            separator = ''
+            for chunk in iter_chunks(map(encode, app.config['PAYLOAD']), 500):
+                yield separator + ','.join(chunk)
+                separator = ','
+            yield ']'
+        return Response(chunks(), mimetype='application/json')
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response, request.accept_encodings, ['br', 'gzip'], 1024, LEVELS)
+
+    return app
+
+def run_size(size, requests, seed):
+    """Benchmark every encoder, route and encoding for one payload size"""
+    payload = generate_suppliers(size, seed=seed)
+    encoders = {
+        'stdlib': make_app(DefaultJSONProvider, lambda obj: json.dumps(obj, separators=(',', ':'))),
+    }
+    if fast_json.orjson is not None:
+        encoders['orjson'] = make_app(FastJSONProvider, fast_json.dumps)
+    encodings = ['identity', 'gzip'] + (['br'] if compression.brotli is not None else [])
+
+    results = []
+    for encoder, app in encoders.items():
+        app.config['PAYLOAD'] = payload
+        client = app.test_client()
+        for route in ['buffered', 'streamed']:
+            for encoding in encodings:
+                headers = {'Accept-Encoding': encoding}
+                body = client.get(f'/{route}', headers=headers).data
+                latencies, elapsed = time_calls(
+                    lambda: client.get(f'/{route}', headers=headers).data for _ in range(requests)
+                )
+                results.append({
+                    'suppliers': size,
+                    'encoder': encoder,
+                    'route': route,
+                    'encoding': encoding,
+                    'bytes': len(body),
+                    'transfer_ms': {link: round(len(body) * 8 / kbps, 1) for link, kbps in LINKS.items()},
+                    'latency': summarize(latencies, elapsed)
+                })
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Comma-separated suppliers per response')
+    parser.add_argument('--requests', type=int, default=50, help='Requests per configuration')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench_serialization.json', help='JSON file to write')
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in [int(size) for size in args.sizes.split(',')]:
+        for result in run_size(size, args.requests, args.seed):
+            results.append(result)
+            print(f"{size:>6} suppliers {result['encoder']:>6} {result['route']:>8} {result['encoding']:>8}: "
+                  f"p50 {result['latency']['p50_ms']} ms, {result['bytes']} B, "
+                  f"2G {result['transfer_ms']['2g']} ms")
+
+    report = {
+        'benchmark': 'serialization',
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'orjson': fast_json.orjson is not None,
+        'brotli': compression.brotli is not None,
+        'links_kbps': LINKS,
+        'seed': args.seed,
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+if __name__ == '__main__':
+    main()
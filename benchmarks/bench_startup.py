@@ -0,0 +1,134 @@
+"""
+Benchmark worker startup: cold import of app.py and first-request latency.
+
+Every run is a fresh interpreter, as a newly booted gunicorn worker is,
+against a prepared copy of the database. --baseline also measures another
+revision, checked out into a temporary git worktree, for a before/after
+comparison.
+
+    python -m benchmarks.bench_startup --runs 5 --baseline HEAD~1 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from benchmarks.bench_recommendations import git_revision
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['sklearn', 'cv2', 'pytesseract', 'numpy', 'scipy']
+
+# Prepares the database: an explicit init where the tree has one, otherwise the import does it
+PREPARE = '''
+import app
+if hasattr(app, 'init_database'):
+    with app.app.app_context():
+        app.init_database()
+        app.seed_sample_data()
+'''
+
+# Times the import and the first requests a worker serves, printing the result as JSON
+MEASURE = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+result = {'import_s': time.perf_counter() - started}
+result['heavy_modules_after_import'] = [name for name in %(heavy)r if name in sys.modules]
+client = app.app.test_client()
+requests = [
+    ('index', lambda: client.get('/')),
+    ('api_suppliers', lambda: client.get('/api/suppliers')),
+    ('login', lambda: client.post('/login', data={'email': 'vendor@example.com', 'password': 'password123'})),
+    ('api_recommendations', lambda: client.get('/api/recommendations')),
+    ('api_price_recommendations', lambda: client.get('/api/recommendations/price?item=onion&location=Mumbai')),
+]
+for name, request in requests:
+    started = time.perf_counter()
+    response = request()
+    response.close()
+    result[name + '_s'] = time.perf_counter() - started
+    result[name + '_status'] = response.status_code
+result['total_s'] = sum(value for key, value in result.items() if key.endswith('_s'))
+print(json.dumps(result))
+''' % {'heavy': HEAVY_MODULES}
+
+def run_python(tree, code, environment):
+    """Run code with a fresh interpreter in tree, returning its stdout"""
+    completed = subprocess.run([sys.executable, '-c', code], cwd=tree, env=environment,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True)
+    return completed.stdout
+
+def measure_tree(tree, runs):
+    """Prepare a database for tree, then time runs fresh worker starts"""
+    directory = tempfile.mkdtemp(prefix='bench-startup-')
+    environment = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'app.db')}",
+                       ITEM_MATCHER_PATH=os.path.join(directory, 'item_matcher.pkl'))
+    try:
+        run_python(tree, PREPARE, environment)
+        # One untimed start fits and persists the item matcher, as an earlier worker would have
+        run_python(tree, MEASURE, environment)
+        samples = [json.loads(run_python(tree, MEASURE, environment).strip().splitlines()[-1]) for _ in range(runs)]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    summary = {'runs': runs, 'heavy_modules_after_import': samples[-1]['heavy_modules_after_import']}
+    for key in samples[0]:
+        if key.endswith('_s'):
+            values = [sample[key] for sample in samples]
+            summary[key[:-2] + '_ms'] = {'median': round(statistics.median(values) * 1000, 1),
+                                         'min': round(min(values) * 1000, 1), 'max': round(max(values) * 1000, 1)}
+        elif key.endswith('_status'):
+            summary[key] = samples[-1][key]
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='Fresh worker starts per tree')
+    parser.add_argument('--baseline', help='Also measure this git revision, e.g. HEAD~1')
+    parser.add_argument('--output', default='bench_startup.json', help='JSON file to write')
+    args = parser.parse_args(argv)
+
+    trees = {'current': REPO_ROOT}
+    worktree = None
+    if args.baseline:
+        worktree = tempfile.mkdtemp(prefix='bench-baseline-')
+        subprocess.run(['git', 'worktree', 'add', '--detach', worktree, args.baseline], cwd=REPO_ROOT,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        trees = {'baseline': worktree, 'current': REPO_ROOT}
+
+    results = {}
+    try:
+        for name, tree in trees.items():
+            results[name] = measure_tree(tree, args.runs)
+            result = results[name]
+            print(f"{name:>8}: import {result['import_ms']['median']} ms, "
+                  f"first /api/suppliers {result['api_suppliers_ms']['median']} ms, "
+                  f"first /api/recommendations {result['api_recommendations_ms']['median']} ms, "
+                  f"total {result['total_ms']['median']} ms, heavy modules at import: "
+                  f"{', '.join(result['heavy_modules_after_import']) or 'none'}")
+    finally:
+        if worktree:
+            subprocess.run(['git', 'worktree', 'remove', '--force', worktree], cwd=REPO_ROOT,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    report = {
+        'benchmark': 'startup',
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'git_revision': git_revision(),
+        'baseline': args.baseline,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+if __name__ == '__main__':
+    main()
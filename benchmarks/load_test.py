@@ -0,0 +1,365 @@
+"""
+Load test a local server with simulated vendor and supplier traffic.
+
+Seeds a fresh database with synthetic suppliers and vendors, starts the app
+under gunicorn (or the werkzeug server where gunicorn is not installed),
+logs in virtual vendors and suppliers, and has each replay a weighted mix
+of dashboard loads, recommendations, chat messages, supplier listings and
+bill uploads for a fixed time. Throughput, latency percentiles and error
+rates are reported per action, for sizing deployments.
+
+    python -m benchmarks.load_test --workers 4 --vendors 40 --suppliers 10 --duration 60 --output load.json
+"""
+import argparse
+import http.client
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from urllib.parse import urlencode
+
+from benchmarks.bench_import import generate_accounts
+from benchmarks.bench_recommendations import git_revision, summarize
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'password123'
+ACTIONS = ['dashboard', 'recommendations', 'chat', 'suppliers', 'upload']
+DEFAULT_VENDOR_MIX = 'dashboard=20,recommendations=40,chat=25,suppliers=10,upload=5'
+DEFAULT_SUPPLIER_MIX = 'dashboard=40,chat=30,suppliers=20,upload=10'
+CHAT_MESSAGES = [
+    'Where can I buy onions near me?', 'What is the price of tomatoes today?', 'How should I store potatoes?',
+    'Which supplier delivers rice the same day?', 'Suggest suppliers for spices and oil', 'hello'
+]
+BILL_ITEMS = ['Onion', 'Tomato', 'Potato', 'Rice', 'Flour', 'Oil', 'Spices', 'Chili', 'Garlic', 'Ginger', 'Paneer']
+
+def parse_mix(text):
+    """Parse 'action=weight,...' into a dict of weights"""
+    mix = {}
+    for part in text.split(','):
+        action, _, weight = part.partition('=')
+        if action.strip() not in ACTIONS:
+            raise ValueError(f"Unknown action {action.strip()!r}; choose from {', '.join(ACTIONS)}")
+        mix[action.strip()] = float(weight or 1)
+    return mix
+
+def generate_bill_images(count, seed):
+    """PNG bills with random item lines, as vendors photograph them"""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    images = []
+    for _ in range(count):
+        lines = [f'{item} {rng.randint(1, 20)} kg Rs {rng.randint(20, 900)}' for item in rng.sample(BILL_ITEMS, 6)]
+        image = Image.new('RGB', (640, 80 + 40 * len(lines)), 'white')
+        draw = ImageDraw.Draw(image)
+        draw.text((40, 30), 'BILL', fill='black')
+        for number, line in enumerate(lines):
+            draw.text((40, 70 + 40 * number), line, fill='black')
+        data = io.BytesIO()
+        image.save(data, format='PNG')
+        images.append(data.getvalue())
+    return images
+
+class VirtualUser:
+    """One logged-in browser: a keep-alive connection and the session cookie"""
+
+    def __init__(self, port, email, role, rng, bill_images, timeout):
+        self.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        self.email = email
+        self.role = role
+        self.rng = rng
+        self.bill_images = bill_images
+        self.cookie = None
+
+    def request(self, method, path, body=None, headers=None):
+        """Send a request and read the whole body; returns the status code"""
+        headers = dict(headers or {}, **{'Accept-Encoding': 'gzip'})
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            # Let the next request reconnect
+            self.connection.close()
+            raise
+        cookie = response.getheader('Set-Cookie')
+        if cookie:
+            self.cookie = cookie.split(';', 1)[0]
+        return response.status
+
+    def login(self):
+        body = urlencode({'email': self.email, 'password': PASSWORD})
+        status = self.request('POST', '/login', body, {'Content-Type': 'application/x-www-form-urlencoded'})
+        if status != 302:
+            raise RuntimeError(f'Login of {self.email} failed with status {status}')
+
+    def dashboard(self):
+        return self.request('GET', '/dashboard')
+
+    def recommendations(self):
+        return self.request('GET', '/api/recommendations')
+
+    def chat(self):
+        body = json.dumps({'message': self.rng.choice(CHAT_MESSAGES)})
+        return self.request('POST', '/api/chat', body, {'Content-Type': 'application/json'})
+
+    def suppliers(self):
+        return self.request('GET', '/api/suppliers?limit=50')
+
+    def upload(self):
+        boundary = uuid.uuid4().hex
+        body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="bill.png"\r\n'
+                f'Content-Type: image/png\r\n\r\n').encode() + self.rng.choice(self.bill_images) + \
+            f'\r\n--{boundary}--\r\n'.encode()
+        return self.request('POST', '/api/upload', body, {'Content-Type': f'multipart/form-data; boundary={boundary}'})
+
+def run_user(user, mix, think_time, measure_from, deadline, results):
+    """Replay mix until deadline, recording requests that finish after measure_from"""
+    actions = list(mix)
+    weights = [mix[action] for action in actions]
+    while time.perf_counter() < deadline:
+        action = user.rng.choices(actions, weights)[0]
+        started = time.perf_counter()
+        try:
+            status = getattr(user, action)()
+            error = None if status < 400 else str(status)
+        except Exception as e:
+            error = type(e).__name__
+        finished = time.perf_counter()
+        if finished >= measure_from:
+            record = results.setdefault(action, {'latencies': [], 'errors': {}})
+            record['latencies'].append(finished - started)
+            if error:
+                record['errors'][error] = record['errors'].get(error, 0) + 1
+        if think_time:
+            time.sleep(user.rng.expovariate(1 / think_time))
+
+def run_client(port, users, args, start, result_queue):
+    """Log in this process's share of virtual users and run each in a thread; runs in its own process"""
+    bill_images = generate_bill_images(args.bill_images, args.seed)
+    mixes = {'vendor': parse_mix(args.vendor_mix), 'supplier': parse_mix(args.supplier_mix)}
+    virtual_users = []
+    try:
+        for email, role, seed in users:
+            user = VirtualUser(port, email, role, random.Random(seed), bill_images, args.timeout)
+            user.login()
+            virtual_users.append(user)
+    except Exception as e:
+        result_queue.put(f'{type(e).__name__}: {e}')
+        return
+    result_queue.put('ready')
+
+    start.wait()
+    measure_from = time.perf_counter() + args.warmup
+    deadline = measure_from + args.duration
+    results = [{} for _ in virtual_users]
+    threads = [threading.Thread(target=run_user, args=(user, mixes[user.role], args.think_time, measure_from, deadline, result))
+               for user, result in zip(virtual_users, results)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    merged = {}
+    for result in results:
+        merge_results(merged, result)
+    result_queue.put(merged)
+
+def merge_results(target, results):
+    """Add per-action latencies and error counts from results into target"""
+    for action, record in results.items():
+        merged = target.setdefault(action, {'latencies': [], 'errors': {}})
+        merged['latencies'].extend(record['latencies'])
+        for error, count in record['errors'].items():
+            merged['errors'][error] = merged['errors'].get(error, 0) + count
+
+def seed_database(accounts, seed):
+    """Create the schema and load synthetic accounts; runs in its own process"""
+    from app import app, import_accounts, init_database
+
+    with app.app_context():
+        init_database()
+        import_accounts(enumerate(generate_accounts(accounts, seed), 1), batch_size=5000)
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def server_command(args, port):
+    """Command line that serves the app on port"""
+    if args.server == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', 'app:app', '--bind', f'127.0.0.1:{port}',
+                '--workers', str(args.workers), '--threads', str(args.threads), '--log-level', 'warning']
+    return [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--port', str(port), '--with-threads',
+            '--no-reload', '--no-debugger']
+
+def wait_for_server(port, process, timeout=60):
+    """Wait until the server answers, raising if it exits first"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Server exited with status {process.returncode}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/about')
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server did not answer within {timeout} s')
+
+def virtual_user_accounts(args):
+    """(email, role, seed) of every virtual user; accounts come from generate_accounts"""
+    users = [(f'vendor{number}@bench.test', 'vendor', args.seed + number) for number in range(1, args.vendors + 1)]
+    users += [(f'supplier{number}@bench.test', 'supplier', args.seed + args.vendors + number)
+              for number in range(1, args.suppliers + 1)]
+    return users
+
+def summarize_results(results, duration):
+    """Per-action and overall latency, throughput and error rate"""
+    report = {}
+    for action in ACTIONS + ['all']:
+        if action == 'all':
+            latencies = [latency for record in results.values() for latency in record['latencies']]
+            errors = {}
+            for record in results.values():
+                for error, count in record['errors'].items():
+                    errors[error] = errors.get(error, 0) + count
+        elif action in results:
+            latencies, errors = results[action]['latencies'], results[action]['errors']
+        else:
+            continue
+        summary = summarize(latencies, duration)
+        summary['errors'] = sum(errors.values())
+        summary['error_rate'] = round(summary['errors'] / len(latencies), 4) if latencies else None
+        summary['errors_by_kind'] = errors
+        report[action] = summary
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--server', choices=['gunicorn', 'werkzeug'], default='gunicorn', help='Server to run the app under')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='Threads per gunicorn worker')
+    parser.add_argument('--accounts', type=int, default=2000, help='Synthetic accounts to seed, half suppliers, half vendors')
+    parser.add_argument('--vendors', type=int, default=20, help='Virtual vendors')
+    parser.add_argument('--suppliers', type=int, default=5, help='Virtual suppliers')
+    parser.add_argument('--vendor-mix', default=DEFAULT_VENDOR_MIX, help='Weighted actions of virtual vendors')
+    parser.add_argument('--supplier-mix', default=DEFAULT_SUPPLIER_MIX, help='Weighted actions of virtual suppliers')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='Mean seconds a virtual user waits between requests; 0 sends them back to back')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of measured load')
+    parser.add_argument('--warmup', type=float, default=5, help='Seconds of load before measuring starts')
+    parser.add_argument('--client-processes', type=int, default=min(4, os.cpu_count() or 1),
+                        help='Processes the virtual users are spread over')
+    parser.add_argument('--bill-images', type=int, default=5, help='Distinct bill images uploaded')
+    parser.add_argument('--timeout', type=float, default=30, help='Seconds before a request counts as failed')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench_load.json', help='JSON file to write')
+    args = parser.parse_args(argv)
+    for mix in (args.vendor_mix, args.supplier_mix):
+        try:
+            parse_mix(mix)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.server == 'gunicorn' and importlib.util.find_spec('gunicorn') is None:
+        parser.error('gunicorn is not installed; install it or pass --server werkzeug')
+    if max(args.vendors, args.suppliers) > args.accounts // 2:
+        parser.error('--accounts must seed at least as many vendors and suppliers as are simulated')
+
+    directory = tempfile.mkdtemp(prefix='bench-load-')
+    environment = dict(os.environ, DATABASE_MODE='production',
+                       DATABASE_URL=f"sqlite:///{os.path.join(directory, 'load.db')}",
+                       ITEM_MATCHER_PATH=os.path.join(directory, 'item_matcher.pkl'),
+                       METRICS_DIR=os.path.join(directory, 'metrics'))
+    context = multiprocessing.get_context('spawn')
+    saved = dict(os.environ)
+    server = None
+    clients = []
+    try:
+        # Spawned processes inherit the environment, which is where the app reads its settings
+        os.environ.update(environment)
+        process = context.Process(target=seed_database, args=(args.accounts, args.seed))
+        process.start()
+        process.join()
+        if process.exitcode:
+            raise RuntimeError('Seeding the database failed')
+
+        port = free_port()
+        server = subprocess.Popen(server_command(args, port), cwd=REPO_ROOT, env=environment,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wait_for_server(port, server)
+
+        users = virtual_user_accounts(args)
+        shares = [users[index::args.client_processes] for index in range(args.client_processes)]
+        shares = [share for share in shares if share]
+        start = context.Event()
+        result_queue = context.Queue()
+        clients = [context.Process(target=run_client, args=(port, share, args, start, result_queue)) for share in shares]
+        for client in clients:
+            client.start()
+        for _ in clients:
+            message = result_queue.get()
+            if message != 'ready':
+                raise RuntimeError(f'A client process failed to log in its users: {message}')
+        start.set()
+        client_results = [result_queue.get() for _ in clients]
+        for client in clients:
+            client.join()
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+        for client in clients:
+            if client.is_alive():
+                client.terminate()
+        if server is not None:
+            server.terminate()
+            server.wait()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    results = {}
+    for client_result in client_results:
+        merge_results(results, client_result)
+    report_results = summarize_results(results, args.duration)
+    for action, summary in report_results.items():
+        print(f"{action:>15}: {summary['throughput_per_s']}/s, p50 {summary['p50_ms']} ms, p95 {summary['p95_ms']} ms, "
+              f"p99 {summary['p99_ms']} ms, errors {summary['errors']} ({summary['error_rate']})")
+
+    report = {
+        'benchmark': 'load',
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'server': {'kind': args.server, 'workers': args.workers, 'threads': args.threads},
+        'accounts': args.accounts,
+        'virtual_users': {'vendors': args.vendors, 'suppliers': args.suppliers},
+        'mix': {'vendor': parse_mix(args.vendor_mix), 'supplier': parse_mix(args.supplier_mix)},
+        'think_time_s': args.think_time,
+        'duration_s': args.duration,
+        'warmup_s': args.warmup,
+        'seed': args.seed,
+        'results': report_results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import itertools
+import random
+from geo import GAZETTEER
+
+# Real ingredient names, most popular first; synthetic ones are appended to reach larger vocabularies
+COMMON_ITEMS = [
+    'onion', 'tomato', 'potato', 'rice', 'flour', 'oil', 'spices', 'chili', 'garlic', 'ginger',
+    'coriander', 'lemon', 'salt', 'sugar', 'milk', 'ghee', 'butter', 'paneer', 'eggs', 'chicken',
+    'carrot', 'cabbage', 'cauliflower', 'peas', 'lentils', 'chickpeas', 'bread', 'cheese', 'mint', 'tea',
+    'cardamom', 'mustard oil', 'besan', 'semolina', 'noodles', 'soy sauce', 'vinegar', 'ketchup', 'mayonnaise', 'fish'
+]
+PRICE_RANGES = ['low', 'medium', 'high']
+DELIVERY_TIMES = ['same_day', 'next_day', 'within_week']
+
+def zipf_weights(count, exponent=1.1):
+    """Cumulative Zipf weights for choosing rank-ordered values with a long tail"""
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+def item_vocabulary(count):
+    """Get count item names: the common ones first, then synthetic ones"""
+    extra = [f'item-{i}' for i in range(max(0, count - len(COMMON_ITEMS)))]
+    return (COMMON_ITEMS + extra)[:count]
+
+def city_names():
+    """Cities from the gazetteer, so generated locations geocode"""
+    return [name.title() for name in GAZETTEER]
+
+def generate_suppliers(count, seed=42, item_count=500, items_per_supplier=(2, 12)):
+    """
+    Generate supplier dicts in the engine's format
+
+    Items and cities are drawn from Zipf distributions, so a few are very
+    common and most are rare, as in real catalogues.
+
+    Args:
+        count (int): Number of suppliers
+        seed (int): Random seed; the same seed gives the same suppliers
+        item_count (int): Size of the item vocabulary
+        items_per_supplier (tuple): Inclusive range of items per supplier
+
+    Returns:
+        list: Supplier dicts
+    """
+    rng = random.Random(seed)
+    items = item_vocabulary(item_count)
+    item_weights = zipf_weights(len(items))
+    cities = city_names()
+    city_weights = zipf_weights(len(cities), exponent=0.9)
+
+    suppliers = []
+    for supplier_id in range(1, count + 1):
+        supplier_items = set(rng.choices(items, cum_weights=item_weights, k=rng.randint(*items_per_supplier)))
+        suppliers.append({
+            'id': supplier_id,
+            'name': f'Supplier {supplier_id}',
+            'location': rng.choices(cities, cum_weights=city_weights)[0],
+            'items': sorted(supplier_items),
+            'rating': round(rng.uniform(2.5, 5.0), 1),
+            'total_ratings': rng.randint(0, 80),
+            'price_range': rng.choice(PRICE_RANGES),
+            'delivery_time': rng.choice(DELIVERY_TIMES),
+            'description': f'Synthetic supplier {supplier_id}'
+        })
+    return suppliers
+
+def generate_vendors(count, seed=43, item_count=500, needs_per_vendor=(1, 8)):
+    """
+    Generate vendor requests as dicts with 'vendor_id', 'needs' and 'location'
+
+    Uses the same skewed item and city distributions as generate_suppliers.
+    """
+    rng = random.Random(seed)
+    items = item_vocabulary(item_count)
+    item_weights = zipf_weights(len(items))
+    cities = city_names()
+    city_weights = zipf_weights(len(cities), exponent=0.9)
+
+    vendors = []
+    for vendor_id in range(1, count + 1):
+        needs = set(rng.choices(items, cum_weights=item_weights, k=rng.randint(*needs_per_vendor)))
+        vendors.append({
+            'vendor_id': vendor_id,
+            'needs': sorted(needs),
+            'location': rng.choices(cities, cum_weights=city_weights)[0]
+        })
+    return vendors
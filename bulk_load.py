@@ -0,0 +1,149 @@
+import csv
+import json
+import os
+
+from werkzeug.security import generate_password_hash
+
+# Columns of an account file: one user per row, with the supplier or vendor profile flattened alongside
+ACCOUNT_COLUMNS = [
+    'username', 'email', 'password_hash', 'role', 'phone', 'location',
+    'business_name', 'items', 'needs', 'rating', 'total_ratings', 'description', 'address',
+    'price_range', 'delivery_time'
+]
+LIST_COLUMNS = ('items', 'needs')
+ROLES = ('vendor', 'supplier')
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+def file_format(path, name=None):
+    """
+    Format of an account file: name if given, otherwise from the extension
+
+    Raises:
+        ValueError: If the extension is not one of FORMATS
+    """
+    if name:
+        return name
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Cannot tell the format of {path}; use a .csv or .jsonl file or pass the format")
+    return FORMATS[extension]
+
+def parse_list(value):
+    """A CSV list cell: a JSON array, or names separated by ';'"""
+    value = value.strip()
+    if value.startswith('['):
+        return json.loads(value)
+    return [name.strip() for name in value.split(';') if name.strip()]
+
+def read_accounts(f, fmt):
+    """
+    Yield (line_number, record) for each account in an open file, one at a time
+
+    Empty CSV cells are left out of the record. A JSON line that does not
+    parse is yielded as its error message instead of a record.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(f)
+        for row in reader:
+            record = {key: value for key, value in row.items() if key and value not in (None, '')}
+            for column in LIST_COLUMNS:
+                if column in record:
+                    try:
+                        record[column] = parse_list(record[column])
+                    except ValueError as e:
+                        record = f'{column} is not a list: {e}'
+                        break
+            yield reader.line_num, record
+    else:
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as e:
+                    yield line_number, f'invalid JSON: {e}'
+
+def clean_account(record):
+    """
+    Validate an account record and split it into user and profile fields
+
+    Args:
+        record (dict): Account fields; a plain 'password' is accepted in place of password_hash
+
+    Returns:
+        tuple: (user, profile); profile is None for a user without a business_name
+
+    Raises:
+        ValueError: If a field is missing or malformed
+    """
+    if not isinstance(record, dict):
+        raise ValueError(record if isinstance(record, str) else 'not an object')
+    for field in ('username', 'email', 'role'):
+        if not record.get(field):
+            raise ValueError(f'{field} is required')
+    if record['role'] not in ROLES:
+        raise ValueError(f"role must be 'vendor' or 'supplier', not {record['role']!r}")
+    if not record.get('password_hash') and not record.get('password'):
+        raise ValueError('password or password_hash is required')
+    user = {
+        'username': str(record['username']),
+        'email': str(record['email']),
+        'password_hash': record.get('password_hash'),
+        'password': record.get('password'),
+        'role': record['role'],
+        'phone': record.get('phone'),
+        'location': record.get('location')
+    }
+    if not record.get('business_name'):
+        return user, None
+
+    column = 'items' if record['role'] == 'supplier' else 'needs'
+    names = record.get(column) or []
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        raise ValueError(f'{column} must be a list of names')
+    profile = {'business_name': str(record['business_name']), column: names}
+    if record['role'] == 'supplier':
+        try:
+            profile['rating'] = float(record.get('rating') or 0.0)
+            profile['total_ratings'] = int(record.get('total_ratings') or 0)
+        except (TypeError, ValueError):
+            raise ValueError('rating and total_ratings must be numbers')
+        profile.update({
+            'description': record.get('description'),
+            'address': record.get('address'),
+            'price_range': record.get('price_range') or 'medium',
+            'delivery_time': record.get('delivery_time') or 'same_day'
+        })
+    return user, profile
+
+def hash_passwords(passwords, pool=None):
+    """
+    Hash passwords, spread over a multiprocessing pool if given
+
+    Each hash is deliberately slow, so this dominates importing new accounts.
+    """
+    if pool is None:
+        return [generate_password_hash(password) for password in passwords]
+    return pool.map(generate_password_hash, passwords)
+
+def write_accounts(f, fmt, records):
+    """
+    Write account records to an open file as they are produced
+
+    Returns:
+        int: Number of records written
+    """
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(f, fieldnames=ACCOUNT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for record in records:
+            writer.writerow({
+                key: ';'.join(value) if key in LIST_COLUMNS and value is not None else value
+                for key, value in record.items()
+            })
+            count += 1
+    else:
+        for record in records:
+            f.write(json.dumps({key: value for key, value in record.items() if value is not None}) + '\n')
+            count += 1
+    return count
@@ -0,0 +1,46 @@
+import gzip
+import json
+import os
+
+def archive_path(directory, month):
+    """
+    Path of the archive file for a month
+
+    Args:
+        directory (str): Archive directory
+        month (str): 'YYYY-MM'
+    """
+    return os.path.join(directory, f'chat-{month}.jsonl.gz')
+
+def append_archive(path, rows):
+    """
+    Append rows to a gzipped JSON lines archive and fsync it
+
+    Each call adds a gzip member; gzip readers decompress the members of a
+    file in sequence, so the result reads back as one stream of lines.
+
+    Args:
+        path (str): Archive file, created if missing
+        rows (list): JSON-serializable dicts
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    data = ''.join(json.dumps(row, separators=(',', ':')) + '\n' for row in rows).encode()
+    with open(path, 'ab') as f:
+        f.write(gzip.compress(data, mtime=0))
+        f.flush()
+        os.fsync(f.fileno())
+
+def read_archive(path):
+    """
+    Yield the rows of an archive file, oldest first
+
+    A run interrupted between archiving and pruning archives its rows again
+    on the next run, so rows already seen by id are skipped.
+    """
+    seen = set()
+    with gzip.open(path, 'rt') as f:
+        for line in f:
+            row = json.loads(line)
+            if row['id'] not in seen:
+                seen.add(row['id'])
+                yield row
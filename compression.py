@@ -0,0 +1,125 @@
+"""
+Negotiated gzip and brotli compression of responses.
+
+Text responses are compressed with the best encoding the client accepts.
+Buffered bodies under a size threshold go out as they are, since the
+encoding overhead outweighs the saving; streamed bodies are compressed
+chunk by chunk and flushed as they go, so clients still receive the
+first rows before the last are encoded. brotli is only offered when the
+brotli package is installed.
+"""
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/javascript',
+    'image/svg+xml',
+}
+
+def available_encodings(algorithms):
+    """Filter configured encoding names to the ones this process can produce"""
+    return [name for name in algorithms if name == 'gzip' or (name == 'br' and brotli is not None)]
+
+def encoded_etag(etag, encoding):
+    """ETag of the encoded variant of a representation"""
+    return f'{etag}-{encoding}'
+
+def etag_variants(etag, algorithms):
+    """Every ETag a client may hold for a representation: identity and each encoding"""
+    return [etag] + [encoded_etag(etag, encoding) for encoding in available_encodings(algorithms)]
+
+def choose_encoding(accept_encodings, algorithms):
+    """
+    Pick the encoding to send
+
+    Args:
+        accept_encodings: The request's parsed Accept-Encoding header
+        algorithms (list): Encoding names in order of preference
+
+    Returns:
+        str: The first acceptable encoding, or None to send identity
+    """
+    for encoding in available_encodings(algorithms):
+        if accept_encodings[encoding]:
+            return encoding
+    return None
+
+def compress_body(data, encoding, level):
+    """Compress a whole body"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    # mtime=0 keeps the output identical for identical bodies
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+def compress_stream(chunks, encoding, level):
+    """Compress a streamed body, flushing after each chunk so it reaches the client"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        # wbits 31 writes a gzip header and trailer
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            if chunk:
+                yield process(chunk) + flush()
+        yield finish()
+    finally:
+        # Lets stream_with_context pop its request context if the client goes away
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+def compress_response(response, accept_encodings, algorithms, min_size, levels):
+    """
+    Compress a response if the client accepts it and it is worth it
+
+    Args:
+        response: The outgoing response
+        accept_encodings: The request's parsed Accept-Encoding header
+        algorithms (list): Encoding names in order of preference, e.g. ['br', 'gzip']
+        min_size (int): Smallest buffered body in bytes that is compressed
+        levels (dict): Compression level by encoding name
+
+    Returns:
+        The same response, compressed in place when an encoding was applied
+    """
+    if response.status_code != 200 or response.direct_passthrough or \
+            'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(accept_encodings, algorithms)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding, levels[encoding])
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        compressed = compress_body(data, encoding, levels[encoding])
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(encoded_etag(etag, encoding), weak)
+    return response
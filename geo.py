@@ -0,0 +1,177 @@
+import math
+from functools import lru_cache
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+# Offline gazetteer of (latitude, longitude) for the cities we serve
+GAZETTEER = {
+    # Maharashtra
+    'mumbai': (19.0760, 72.8777),
+    'thane': (19.2183, 72.9781),
+    'navi mumbai': (19.0330, 73.0297),
+    'kalyan': (19.2403, 73.1305),
+    'pune': (18.5204, 73.8567),
+    # Delhi NCR
+    'delhi': (28.7041, 77.1025),
+    'new delhi': (28.6139, 77.2090),
+    'noida': (28.5355, 77.3910),
+    'gurgaon': (28.4595, 77.0266),
+    'ghaziabad': (28.6692, 77.4538),
+    # Karnataka
+    'bangalore': (12.9716, 77.5946),
+    'mysore': (12.2958, 76.6394),
+    'mandya': (12.5218, 76.8951),
+    'tumkur': (13.3379, 77.1173),
+    # West Bengal
+    'kolkata': (22.5726, 88.3639),
+    'howrah': (22.5958, 88.2636),
+    'siliguri': (26.7271, 88.3953),
+    'darjeeling': (27.0410, 88.2663),
+    'kurseong': (26.8806, 88.2775),
+    'kalimpong': (27.0594, 88.4695),
+    'mirik': (26.8870, 88.1870),
+    'jalpaiguri': (26.5435, 88.7205),
+    'dhupguri': (26.5920, 89.0070),
+    'cooch behar': (26.3452, 89.4482),
+    'alipurduar': (26.4835, 89.5223),
+    'islampur': (26.2650, 88.1898),
+    'raiganj': (25.6185, 88.1256),
+    'balurghat': (25.2373, 88.7831),
+    'malda': (25.0108, 88.1411),
+    'baharampur': (24.1048, 88.2515),
+    'krishnanagar': (23.4058, 88.4900),
+    'bardhaman': (23.2324, 87.8615),
+    'durgapur': (23.5204, 87.3119),
+    'asansol': (23.6739, 86.9524),
+    'bolpur': (23.6693, 87.6851),
+    'bankura': (23.2324, 87.0716),
+    'purulia': (23.3321, 86.3652),
+    'midnapore': (22.4257, 87.3199),
+    'kharagpur': (22.3460, 87.2320),
+    'haldia': (22.0667, 88.0698),
+    # Other metros
+    'chennai': (13.0827, 80.2707),
+    'hyderabad': (17.3850, 78.4867),
+    'ahmedabad': (23.0225, 72.5714),
+    'jaipur': (26.9124, 75.7873),
+    'lucknow': (26.8467, 80.9462),
+    'patna': (25.5941, 85.1376),
+    'guwahati': (26.1445, 91.7362),
+    'bhubaneswar': (20.2961, 85.8245),
+}
+
+# Alternate spellings mapped to their gazetteer name
+ALIASES = {
+    'bombay': 'mumbai',
+    'bengaluru': 'bangalore',
+    'mysuru': 'mysore',
+    'tumakuru': 'tumkur',
+    'gurugram': 'gurgaon',
+    'calcutta': 'kolkata',
+    'koch bihar': 'cooch behar',
+    'coochbehar': 'cooch behar',
+    'english bazar': 'malda',
+    'burdwan': 'bardhaman',
+    'berhampore': 'baharampur',
+    'medinipur': 'midnapore',
+}
+
+def normalize_location(location):
+    """Lowercase a location and collapse whitespace"""
+    return ' '.join((location or '').lower().split())
+
+@lru_cache(maxsize=4096)
+def geocode(location):
+    """
+    Resolve a free-text location to coordinates using the bundled gazetteer
+
+    Addresses like "Mumbai Central, Mumbai" are tried whole and then one
+    comma-separated part at a time from the end.
+
+    Args:
+        location (str): Location as entered by the user
+
+    Returns:
+        tuple: (latitude, longitude), or None if the location is unknown
+    """
+    name = normalize_location(location)
+    candidates = [name] + [part.strip() for part in reversed(name.split(','))]
+    for candidate in candidates:
+        candidate = ALIASES.get(candidate, candidate)
+        if candidate in GAZETTEER:
+            return GAZETTEER[candidate]
+    return None
+
+def haversine_km(origin, destination):
+    """Great-circle distance in kilometres between two (latitude, longitude) points"""
+    lat1, lon1 = map(math.radians, origin)
+    lat2, lon2 = map(math.radians, destination)
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+class LocationGrid:
+    """
+    Uniform latitude/longitude grid over named points.
+
+    A radius query only visits the cells overlapping the search box, so its
+    cost depends on how many points are near the origin rather than on how
+    many points are indexed.
+    """
+
+    def __init__(self, cell_km=50.0):
+        self.cell_degrees = cell_km / KM_PER_DEGREE
+        self.cells = {}
+        self.points = {}
+
+    def copy(self):
+        """Get an independent copy of the grid"""
+        grid = LocationGrid()
+        grid.cell_degrees = self.cell_degrees
+        grid.cells = {cell: set(keys) for cell, keys in self.cells.items()}
+        grid.points = dict(self.points)
+        return grid
+
+    def cell_for(self, point):
+        """Get the grid cell containing a point"""
+        return (math.floor(point[0] / self.cell_degrees), math.floor(point[1] / self.cell_degrees))
+
+    def add(self, key, point):
+        """Index a point under key, replacing any previous point for it"""
+        if key in self.points:
+            self.remove(key)
+        self.points[key] = point
+        self.cells.setdefault(self.cell_for(point), set()).add(key)
+
+    def remove(self, key):
+        """Drop the point indexed under key"""
+        point = self.points.pop(key, None)
+        if point is None:
+            return
+        cell = self.cell_for(point)
+        keys = self.cells.get(cell)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.cells[cell]
+
+    def within(self, origin, radius_km):
+        """
+        Find indexed points within radius_km of origin
+
+        Returns:
+            list: (key, distance_km) pairs
+        """
+        lat_span = radius_km / KM_PER_DEGREE
+        lon_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(origin[0])), 0.01))
+        min_row, min_col = self.cell_for((origin[0] - lat_span, origin[1] - lon_span))
+        max_row, max_col = self.cell_for((origin[0] + lat_span, origin[1] + lon_span))
+
+        found = []
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                for key in self.cells.get((row, col), ()):
+                    distance = haversine_km(origin, self.points[key])
+                    if distance <= radius_km:
+                        found.append((key, distance))
+        return found
@@ -0,0 +1,206 @@
+import os
+import pickle
+import tempfile
+import threading
+
+def normalize_name(name):
+    """Lowercase a name and collapse whitespace"""
+    return ' '.join(str(name).lower().split())
+
+class FittedModel:
+    """
+    One fitted vocabulary with its TF-IDF model and memoized matches.
+
+    The matcher swaps whole models, so a resolve that holds one never mixes
+    one model's match indices with another model's vocabulary.
+    """
+    __slots__ = ('vocabulary', 'vocabulary_set', 'pickled', 'vectorizer', 'matrix', 'groups', 'cache')
+
+    def __init__(self, vocabulary, vectorizer=None, matrix=None, pickled=None):
+        self.vocabulary = vocabulary
+        self.vocabulary_set = frozenset(vocabulary)
+        # Pickled (vectorizer, matrix) read from disk but not unpickled yet
+        self.pickled = pickled
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        # Vocabulary entries equal after normalizing ("Rice", "rice") share a group, built with the model
+        self.groups = None
+        self.cache = {}
+
+class ItemMatcher:
+    """
+    Resolve free-text item names to the canonical supplier item vocabulary.
+
+    A character n-gram TF-IDF model is fitted over the vocabulary, so plurals,
+    capitalisation and small typos ("Tomatoes", "onions", "sugr") land on the
+    closest supplier item. A fuzzy match must be similar enough and clearly
+    closer than the next different item, since short names share many
+    n-grams ("spices" and "rice"). The fitted model is persisted to disk and
+    reused while the vocabulary is unchanged, and every resolved name is
+    memoized. The persisted model is read on first use, and the scikit-learn
+    part of it is only unpickled when a name is not in the vocabulary, so
+    workers that only see exact item names never import scikit-learn.
+    """
+
+    def __init__(self, path=None, threshold=0.6, margin=0.1, max_cache_size=10000):
+        """
+        Args:
+            path (str): File to persist the fitted model to; kept in memory only if None
+            threshold (float): Minimum cosine similarity for a fuzzy match
+            margin (float): Minimum lead in similarity over the best match to a different item
+            max_cache_size (int): Number of resolved names to memoize
+        """
+        self.path = path
+        self.threshold = threshold
+        self.margin = margin
+        self.max_cache_size = max_cache_size
+        self.model = FittedModel([])
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self.loaded = not path
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock'], state['load_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+
+    def ensure_loaded(self):
+        """Load the persisted model the first time the matcher is used"""
+        if not self.loaded:
+            with self.load_lock:
+                if not self.loaded:
+                    self.load()
+                    self.loaded = True
+    
+    def load(self):
+        """Load a previously fitted model from path, if there is one"""
+        try:
+            with open(self.path, 'rb') as f:
+                vocabulary, pickled_model = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            return False
+        self.set_model(FittedModel(vocabulary, pickled=pickled_model))
+        return True
+
+    def get_snapshot(self):
+        """Get the current model; everything one resolve reads comes from it"""
+        with self.lock:
+            return self.model
+
+    def get_model(self, model):
+        """Get a model's fitted (vectorizer, matrix, groups), unpickling a loaded model on first use"""
+        if model.groups is None:
+            with self.load_lock:
+                if model.groups is None:
+                    import numpy as np
+                    if model.pickled is not None:
+                        model.vectorizer, model.matrix = pickle.loads(model.pickled)
+                        model.pickled = None
+                    model.groups = np.unique([normalize_name(name) for name in model.vocabulary],
+                                             return_inverse=True)[1]
+        return model.vectorizer, model.matrix, model.groups
+
+    def save(self, model):
+        """Write a fitted model to path atomically"""
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                # The vocabulary is readable without unpickling, and so importing, scikit-learn
+                pickle.dump((model.vocabulary, pickle.dumps((model.vectorizer, model.matrix))), f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def set_model(self, model):
+        """Swap in a fitted model, with no memoized matches"""
+        with self.lock:
+            self.model = model
+
+    def fit(self, vocabulary):
+        """
+        Fit the model over a vocabulary, unless it is the one already fitted
+
+        Args:
+            vocabulary (iterable): Canonical item names
+        """
+        self.ensure_loaded()
+        vocabulary = sorted(set(vocabulary))
+        if vocabulary == self.get_snapshot().vocabulary:
+            return
+        if not vocabulary:
+            self.set_model(FittedModel([]))
+            return
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 4), sublinear_tf=True)
+        model = FittedModel(vocabulary, vectorizer, vectorizer.fit_transform(vocabulary))
+        self.set_model(model)
+        if self.path:
+            self.save(model)
+
+    def resolve(self, name):
+        """
+        Get the canonical item for a name
+
+        Returns:
+            str: The closest vocabulary item, or the lowercased name if nothing is close enough
+        """
+        return self.resolve_all([name])[0]
+
+    def resolve_all(self, names):
+        """Resolve a list of names, keeping their order; names that need the model are matched in one pass"""
+        self.ensure_loaded()
+        model = self.get_snapshot()
+        vocabulary_set = model.vocabulary_set
+        cache = model.cache
+        resolved = {}
+        learned = {}
+        unmatched = {}
+        for name in names:
+            if name in resolved or name in unmatched:
+                continue
+            if name in vocabulary_set:
+                resolved[name] = name
+                continue
+            cached = cache.get(name)
+            if cached is not None:
+                resolved[name] = cached
+                continue
+            normalized = normalize_name(name)
+            if normalized in vocabulary_set:
+                resolved[name] = learned[name] = normalized
+            else:
+                unmatched[name] = normalized
+
+        if unmatched and model.vocabulary:
+            matches = list(unmatched.values())
+            vectorizer, matrix, groups = self.get_model(model)
+            from sklearn.metrics.pairwise import cosine_similarity
+            similarities = cosine_similarity(vectorizer.transform(matches), matrix)
+            best = similarities.argmax(axis=1)
+            for i, column in enumerate(best):
+                row = similarities[i]
+                if row[column] < self.threshold:
+                    continue
+                others = row[groups != groups[column]]
+                if others.size and row[column] - others.max() < self.margin:
+                    continue
+                matches[i] = model.vocabulary[column]
+            learned.update(zip(unmatched, matches))
+            resolved.update(learned)
+        else:
+            learned.update(unmatched)
+            resolved.update(unmatched)
+
+        for name, match in learned.items():
+            if len(cache) >= self.max_cache_size:
+                cache.clear()
+            cache[name] = match
+        return [resolved[name] for name in names]
@@ -0,0 +1,257 @@
+import atexit
+import bisect
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no gunicorn workers to aggregate, so metrics stay per process
+    fcntl = None
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ARCHIVE_FILE = 'archived.json'
+
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label(value)}"' for key, value in pairs) + '}'
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class MetricsRegistry:
+    """
+    Counters and histograms of one process, shared with its sibling workers.
+
+    Updates only touch in-process dicts under a lock, so they are cheap on
+    the request path. When a directory is given, a background thread writes
+    the process's values to a file every flush_interval seconds; collect()
+    adds up the files of every worker started by the same parent, i.e. the
+    gunicorn master, so any worker can serve the totals. Files of workers
+    that exited are folded into one archive so their counts are kept.
+    """
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        """
+        Args:
+            directory (str): Directory shared by the workers, or None to report this process only
+            flush_interval (float): Seconds between writes of this process's values
+        """
+        self.directory = directory if fcntl is not None else None
+        self.flush_interval = flush_interval
+        self.definitions = {}
+        self.counters = {}
+        self.histograms = {}
+        self.collectors = []
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.pid = None
+        self.path = None
+        self.thread = None
+        atexit.register(self.flush)
+
+    def counter(self, name, help):
+        """Declare a counter"""
+        self.definitions[name] = ('counter', help, None)
+
+    def histogram(self, name, help, buckets=DEFAULT_BUCKETS):
+        """Declare a histogram with upper bucket bounds"""
+        self.definitions[name] = ('histogram', help, tuple(buckets))
+
+    def add_collector(self, collect):
+        """
+        Add a source of counters read when values are written or collected
+
+        Args:
+            collect (callable): Returns (name, labels, value) tuples of declared counters,
+                with value the process's total so far
+        """
+        self.collectors.append(collect)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, label_key(labels))
+        buckets = self.definitions[name][2]
+        with self.lock:
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the seconds spent in a with block in histogram name"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self):
+        """This process's values in the JSON form written to the shared directory"""
+        with self.lock:
+            counters = [[name, labels, value] for (name, labels), value in self.counters.items()]
+            histograms = [[name, labels, list(counts), total, count]
+                          for (name, labels), (counts, total, count) in self.histograms.items()]
+        for collect in self.collectors:
+            counters.extend([name, label_key(labels), value] for name, labels, value in collect())
+        return {'counters': counters, 'histograms': histograms}
+
+    def ensure_flushing(self):
+        """Start the thread writing this process's values; call from every process that records any"""
+        if self.directory is None or self.pid == os.getpid():
+            return
+        if self.pid is not None:
+            # A forked worker inherits the parent's values and thread object but not the thread
+            with self.lock:
+                self.counters.clear()
+                self.histograms.clear()
+        self.pid = os.getpid()
+        os.makedirs(self.directory, exist_ok=True)
+        # Values are grouped by parent process; a new gunicorn master starts from zero
+        for name in os.listdir(self.directory):
+            if name.isdigit() and not process_alive(int(name)):
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+        group = os.path.join(self.directory, str(os.getppid()))
+        os.makedirs(group, exist_ok=True)
+        self.path = os.path.join(group, f'{self.pid}-{time.time_ns()}.json')
+        self.thread = threading.Thread(target=self._run, name='metrics-flush', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write this process's values to its file in the shared directory"""
+        if self.path is None or self.pid != os.getpid():
+            return
+        with self.flush_lock:
+            temporary = self.path + '.tmp'
+            with open(temporary, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(temporary, self.path)
+
+    def collect(self):
+        """
+        Add up the values of every worker
+
+        Returns:
+            tuple: (counters, histograms) dicts keyed on (name, labels)
+        """
+        counters, histograms = {}, {}
+        if self.path is None:
+            self.merge(self.snapshot(), counters, histograms)
+            return counters, histograms
+
+        self.flush()
+        group = os.path.dirname(self.path)
+        with open(os.path.join(group, '.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self.archive_exited_workers(group)
+                for name in os.listdir(group):
+                    if name.endswith('.json'):
+                        snapshot = self.read_snapshot(os.path.join(group, name))
+                        if snapshot is not None:
+                            self.merge(snapshot, counters, histograms)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return counters, histograms
+
+    def archive_exited_workers(self, group):
+        """Fold the files of exited workers into the group's archive; call with the group locked"""
+        exited = [name for name in os.listdir(group) if name.endswith('.json') and name != ARCHIVE_FILE
+                  and not process_alive(int(name.split('-')[0]))]
+        if not exited:
+            return
+        archive_path = os.path.join(group, ARCHIVE_FILE)
+        counters, histograms = {}, {}
+        for name in [ARCHIVE_FILE] + exited:
+            snapshot = self.read_snapshot(os.path.join(group, name))
+            if snapshot is not None:
+                self.merge(snapshot, counters, histograms)
+        archive = {
+            'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+            'histograms': [[name, labels, counts, total, count]
+                           for (name, labels), (counts, total, count) in histograms.items()]
+        }
+        with open(archive_path + '.tmp', 'w') as f:
+            json.dump(archive, f)
+        os.replace(archive_path + '.tmp', archive_path)
+        for name in exited:
+            os.remove(os.path.join(group, name))
+
+    @staticmethod
+    def read_snapshot(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def merge(self, snapshot, counters, histograms):
+        """Add a snapshot's values into counters and histograms"""
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, counts, total, count in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            series = histograms.get(key)
+            if series is None:
+                histograms[key] = [list(counts), total, count]
+            elif len(series[0]) == len(counts):
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+                series[2] += count
+
+    def render(self):
+        """Every worker's values in the Prometheus text exposition format"""
+        counters, histograms = self.collect()
+        lines = []
+        for name, (kind, help, buckets) in self.definitions.items():
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (series_name, labels), value in sorted(counters.items()):
+                    if series_name == name:
+                        lines.append(f'{name}{format_labels(labels)} {format_value(value)}')
+                continue
+            for (series_name, labels), (counts, total, count) in sorted(histograms.items()):
+                if series_name != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{format_labels(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{name}_sum{format_labels(labels)} {format_value(total)}')
+                lines.append(f'{name}_count{format_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
@@ -1,20 +1,27 @@
 import cv2
 import numpy as np
 import os
+from functools import lru_cache
 from PIL import Image
 import pytesseract
 
-# Check if Tesseract is available
-TESSERACT_AVAILABLE = True
-try:
-    pytesseract.get_tesseract_version()
-except:
-    TESSERACT_AVAILABLE = False
-    print("Warning: Tesseract OCR is not installed. OCR functionality will be limited.")
-    print("To install Tesseract on Windows:")
-    print("1. Download from: https://github.com/UB-Mannheim/tesseract/wiki")
-    print("2. Install and add to PATH")
-    print("3. Or use: pip install tesseract-ocr")
+@lru_cache(maxsize=None)
+def tesseract_available():
+    """
+    Check if Tesseract is available
+    
+    Runs the tesseract binary once, on first use rather than at import.
+    """
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except:
+        print("Warning: Tesseract OCR is not installed. OCR functionality will be limited.")
+        print("To install Tesseract on Windows:")
+        print("1. Download from: https://github.com/UB-Mannheim/tesseract/wiki")
+        print("2. Install and add to PATH")
+        print("3. Or use: pip install tesseract-ocr")
+        return False
 
 def extract_text_from_image(image_path):
     """
@@ -26,7 +33,7 @@ def extract_text_from_image(image_path):
     Returns:
         str: Extracted text from the image
     """
-    if not TESSERACT_AVAILABLE:
+    if not tesseract_available():
         return "OCR not available. Please install Tesseract OCR."
     
     try:
@@ -62,7 +69,7 @@ def preprocess_image_for_better_ocr(image_path):
     Returns:
         numpy.ndarray: Preprocessed image
     """
-    if not TESSERACT_AVAILABLE:
+    if not tesseract_available():
         return None
     
     try:
@@ -103,7 +110,7 @@ def extract_text_with_preprocessing(image_path):
     Returns:
         str: Extracted text from the image
     """
-    if not TESSERACT_AVAILABLE:
+    if not tesseract_available():
         return "OCR not available. Please install Tesseract OCR."
     
     try:
@@ -161,7 +168,7 @@ def parse_raw_materials(text):
     Returns:
         list: List of raw material names
     """
-    if not TESSERACT_AVAILABLE:
+    if not tesseract_available():
         return ["Sample: Onions", "Sample: Tomatoes", "Sample: Potatoes"]
     
     # Common raw materials for street food vendors
@@ -192,7 +199,7 @@ def test_ocr():
     """
     Test OCR functionality.
     """
-    if not TESSERACT_AVAILABLE:
+    if not tesseract_available():
         print("Tesseract not available. OCR functionality disabled.")
         return False
     
@@ -0,0 +1,130 @@
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import random
+from datetime import datetime
+
+def function_label(function):
+    """'path:line(name)' for a pstats function key, with paths relative to site-packages or the app"""
+    filename, line, name = function
+    if filename == '~':
+        return name  # A builtin
+    if 'site-packages' in filename:
+        filename = filename.split('site-packages' + os.sep, 1)[-1]
+    elif filename.startswith(os.getcwd()):
+        filename = os.path.relpath(filename)
+    return f'{filename}:{line}({name})'
+
+class RequestProfiler:
+    """
+    Capture cProfile profiles of chosen requests into a rotating directory.
+
+    A request is profiled when it is picked by sample_rate, or when its
+    profile header matches token. Each capture is a .prof file, readable
+    with pstats or snakeviz, and a .json summary with the route, timing and
+    the functions with the most cumulative time. Only the newest max_files
+    captures are kept.
+    """
+
+    def __init__(self, directory, sample_rate=0.0, token=None, max_files=200, top=25):
+        """
+        Args:
+            directory (str): Directory the captures are written to
+            sample_rate (float): Fraction of requests profiled at random
+            token (str): Header value that asks for a request to be profiled, or None
+            max_files (int): Captures kept before the oldest are deleted
+            top (int): Functions listed in each summary
+        """
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.token = token
+        self.max_files = max_files
+        self.top = top
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0 or bool(self.token)
+
+    def trigger(self, header_value):
+        """Why a request should be profiled: 'header', 'sample', or None to leave it alone"""
+        if self.token and header_value and hmac.compare_digest(header_value, self.token):
+            return 'header'
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sample'
+        return None
+
+    def start(self):
+        """Start profiling the current thread; returns the profiler, or None if another one is running"""
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return None
+        return profiler
+
+    def save(self, profiler, name, info):
+        """
+        Stop profiler and write its capture and summary
+
+        Args:
+            profiler: Profiler returned by start
+            name (str): File name of the capture, without extension
+            info (dict): Request details stored in the summary
+
+        Returns:
+            dict: The summary
+        """
+        profiler.disable()
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        profiler.dump_stats(path + '.prof')
+
+        stats = pstats.Stats(profiler).sort_stats('cumulative')
+        functions = []
+        for function in stats.fcn_list[:self.top]:
+            primitive_calls, calls, total_time, cumulative_time, _ = stats.stats[function]
+            functions.append({
+                'function': function_label(function),
+                'calls': calls,
+                'total_ms': round(total_time * 1000, 2),
+                'cumulative_ms': round(cumulative_time * 1000, 2)
+            })
+        summary = dict(info, name=name, captured_at=datetime.utcnow().isoformat() + 'Z', functions=functions)
+        with open(path + '.json.tmp', 'w') as f:
+            json.dump(summary, f)
+        os.replace(path + '.json.tmp', path + '.json')
+        self.rotate()
+        return summary
+
+    def rotate(self):
+        """Delete the oldest captures beyond max_files"""
+        names = sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith('.json'))
+        for name in names[:max(0, len(names) - self.max_files)]:
+            for extension in ('.json', '.prof'):
+                try:
+                    os.remove(os.path.join(self.directory, name + extension))
+                except FileNotFoundError:
+                    pass  # Rotated by another worker
+
+    def names(self):
+        """Names of the kept captures"""
+        if not os.path.isdir(self.directory):
+            return set()
+        return {name[:-5] for name in os.listdir(self.directory) if name.endswith('.json')}
+
+    def slowest(self, limit=20):
+        """Summaries of the slowest kept captures, slowest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        summaries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        summaries.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        summaries.sort(key=lambda summary: summary['duration_ms'], reverse=True)
+        return summaries[:limit]
@@ -0,0 +1,300 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+class MemoryCacheBackend:
+    """Per-process LRU store with expiry, tagged by needed items and vendor location"""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.keys_by_item = {}
+        self.keys_by_location = {}
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, now, min_version=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, items, location, expires_at, version = entry
+            if expires_at <= now:
+                self._delete(key)
+                return None
+            if min_version is not None and version < min_version:
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, items, location, expires_at, version=0):
+        with self.lock:
+            if key in self.entries:
+                self._delete(key)
+            self.entries[key] = (value, items, location, expires_at, version)
+            for item in items:
+                self.keys_by_item.setdefault(item, set()).add(key)
+            self.keys_by_location.setdefault(location, set()).add(key)
+            while len(self.entries) > self.max_size:
+                self._delete(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _delete(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        _, items, location, _, _ = entry
+        for tag, index in [(item, self.keys_by_item) for item in items] + [(location, self.keys_by_location)]:
+            keys = index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[tag]
+
+    def delete_tagged(self, items, locations):
+        """Delete entries needing any of items or keyed on any of locations"""
+        with self.lock:
+            keys = set()
+            for item in items:
+                keys.update(self.keys_by_item.get(item, ()))
+            for location in locations:
+                keys.update(self.keys_by_location.get(location, ()))
+            for key in keys:
+                self._delete(key)
+            return len(keys)
+
+    def locations(self):
+        with self.lock:
+            return list(self.keys_by_location)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.keys_by_item.clear()
+            self.keys_by_location.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+class SQLiteCacheBackend:
+    """
+    Store shared by every worker on the host through a local SQLite file.
+
+    Eviction is first-in first-out, not LRU: once max_size is exceeded the
+    entries written longest ago go first, so hits do not have to write to
+    the shared file. The size is only counted every check_interval writes
+    of this process, so the file can briefly hold up to check_interval
+    extra entries per worker. Each entry keeps the
+    supplier data version it was computed from, so readers can skip entries
+    written by a worker whose suppliers were out of date.
+    """
+
+    def __init__(self, path, max_size=10000, check_interval=100):
+        self.path = path
+        self.max_size = max_size
+        self.check_interval = max(1, min(check_interval, max_size // 10))
+        self.writes = 0
+        self.evictions = 0
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self.connection() as connection:
+            columns = [row[1] for row in connection.execute('PRAGMA table_info(recommendation_cache)')]
+            if columns and 'version' not in columns:
+                # Written before entries were versioned; the cache can simply start again
+                connection.executescript('''
+                    DROP TABLE recommendation_cache;
+                    DROP TABLE IF EXISTS recommendation_cache_item;
+                ''')
+            connection.executescript('''
+                CREATE TABLE IF NOT EXISTS recommendation_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    location TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS ix_recommendation_cache_location ON recommendation_cache (location);
+                CREATE INDEX IF NOT EXISTS ix_recommendation_cache_expires_at ON recommendation_cache (expires_at);
+                CREATE TABLE IF NOT EXISTS recommendation_cache_item (
+                    key TEXT NOT NULL,
+                    item TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_recommendation_cache_item_item ON recommendation_cache_item (item);
+                CREATE INDEX IF NOT EXISTS ix_recommendation_cache_item_key ON recommendation_cache_item (key);
+            ''')
+
+    def connection(self):
+        """Get this thread's connection to the cache file"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self.local.connection = connection
+        return connection
+
+    def get(self, key, now, min_version=None):
+        row = self.connection().execute(
+            'SELECT value FROM recommendation_cache WHERE key = ? AND expires_at > ? AND version >= ?',
+            (key, now, min_version if min_version is not None else 0)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, items, location, expires_at, version=0):
+        with self.connection() as connection:
+            connection.execute('DELETE FROM recommendation_cache_item WHERE key = ?', (key,))
+            connection.execute(
+                'INSERT OR REPLACE INTO recommendation_cache (key, value, location, expires_at, version) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, json.dumps(value), location, expires_at, version)
+            )
+            connection.executemany(
+                'INSERT INTO recommendation_cache_item (key, item) VALUES (?, ?)',
+                [(key, item) for item in set(items)]
+            )
+            self.writes += 1
+            if self.writes % self.check_interval:
+                return
+            count = connection.execute('SELECT COUNT(*) FROM recommendation_cache').fetchone()[0]
+            if count > self.max_size:
+                # Every entry has the same TTL, so the earliest expiry is the oldest write
+                overflow = count - self.max_size
+                stale = [row[0] for row in connection.execute(
+                    'SELECT key FROM recommendation_cache ORDER BY expires_at LIMIT ?', (overflow,)
+                )]
+                self._delete(connection, stale)
+                self.evictions += len(stale)
+
+    def _delete(self, connection, keys):
+        connection.executemany('DELETE FROM recommendation_cache WHERE key = ?', [(key,) for key in keys])
+        connection.executemany('DELETE FROM recommendation_cache_item WHERE key = ?', [(key,) for key in keys])
+
+    def delete_tagged(self, items, locations):
+        """Delete entries needing any of items or keyed on any of locations"""
+        with self.connection() as connection:
+            keys = set()
+            for item in items:
+                keys.update(row[0] for row in connection.execute(
+                    'SELECT key FROM recommendation_cache_item WHERE item = ?', (item,)))
+            for location in locations:
+                keys.update(row[0] for row in connection.execute(
+                    'SELECT key FROM recommendation_cache WHERE location = ?', (location,)))
+            self._delete(connection, keys)
+            return len(keys)
+
+    def locations(self):
+        return [row[0] for row in self.connection().execute('SELECT DISTINCT location FROM recommendation_cache')]
+
+    def clear(self):
+        with self.connection() as connection:
+            connection.execute('DELETE FROM recommendation_cache')
+            connection.execute('DELETE FROM recommendation_cache_item')
+
+    def __len__(self):
+        return self.connection().execute('SELECT COUNT(*) FROM recommendation_cache').fetchone()[0]
+
+class RecommendationCache:
+    """
+    Size-bounded TTL cache of engine recommendations.
+
+    Entries are keyed on the sorted needs, the lowercased location and the
+    number of recommendations, and tagged with the needed items and the
+    location so a supplier change only drops the entries it could affect.
+
+    A backend shared by several workers also needs current_version: entries
+    are stored with the supplier data version they were computed from and
+    only served while no supplier change has been committed since, so a
+    worker whose suppliers are behind neither serves nor stores stale results.
+    """
+
+    def __init__(self, backend=None, ttl=300, current_version=None):
+        """
+        Args:
+            backend: MemoryCacheBackend (default, evicts least recently used) or
+                SQLiteCacheBackend (evicts oldest written)
+            ttl (int): Seconds an entry stays valid
+            current_version (callable): Returns the latest committed supplier data version;
+                None when the backend is private to this process
+        """
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl = ttl
+        self.current_version = current_version
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.generation = 0
+
+    @staticmethod
+    def make_key(vendor_needs, vendor_location, max_recommendations):
+        return json.dumps([sorted(vendor_needs), vendor_location.lower(), max_recommendations])
+
+    def get(self, vendor_needs, vendor_location, max_recommendations):
+        """Get cached recommendations, or None on a miss"""
+        key = self.make_key(vendor_needs, vendor_location, max_recommendations)
+        min_version = self.current_version() if self.current_version is not None else None
+        value = self.backend.get(key, time.time(), min_version)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, vendor_needs, vendor_location, max_recommendations, value, generation=None, version=None):
+        """
+        Cache recommendations computed for a request
+
+        Args:
+            generation (int): The cache generation read before computing value;
+                the value is dropped if an invalidation happened since
+            version (int): Supplier data version value was computed from; with
+                current_version, the value is dropped if newer changes were committed
+        """
+        if generation is not None and generation != self.generation:
+            return
+        if self.current_version is not None and (version is None or version < self.current_version()):
+            return
+        key = self.make_key(vendor_needs, vendor_location, max_recommendations)
+        self.backend.set(key, value, list(vendor_needs), vendor_location.lower(), time.time() + self.ttl, version or 0)
+
+    def invalidate_supplier(self, suppliers, is_in_range):
+        """
+        Drop entries a changed supplier could appear in
+
+        Args:
+            suppliers (list): The supplier's previous and/or new record
+            is_in_range (callable): is_in_range(supplier_location, vendor_location)
+                tells whether the supplier is near enough to score for the vendor
+        """
+        self.generation += 1
+        items = set()
+        locations = set()
+        cached_locations = self.backend.locations()
+        for supplier in suppliers:
+            items.update(supplier['items'])
+            locations.update(location for location in cached_locations if is_in_range(supplier['location'], location))
+        self.invalidations += self.backend.delete_tagged(items, locations)
+
+    def clear(self):
+        """
+        Drop every entry after this process reloaded its suppliers
+
+        Versioned entries are left alone: other workers may still be using
+        them, and any computed from older suppliers are skipped anyway.
+        """
+        self.generation += 1
+        if self.current_version is None:
+            self.backend.clear()
+
+    def stats(self):
+        """Get hit/miss counters and size"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'invalidations': self.invalidations,
+            'evictions': self.backend.evictions,
+            'size': len(self.backend)
+        }
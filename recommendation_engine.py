@@ -1,162 +1,597 @@
+import collections
+import heapq
 import json
+import multiprocessing
 import sqlite3
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+import threading
+import time
+from functools import lru_cache
+from array import array
+from geo import LocationGrid, geocode, haversine_km
+from supplier_records import SupplierInterner, insert_sorted, remove_sorted
 from datetime import datetime
 
+# Sample supplier data used when the engine runs without a database loader
+SAMPLE_SUPPLIERS = [
+    {
+        'id': 1,
+        'name': 'Fresh Vegetables Co.',
+        'location': 'Mumbai',
+        'items': ['onion', 'tomato', 'potato', 'carrot'],
+        'rating': 4.5,
+        'total_ratings': 25,
+        'price_range': 'medium',
+        'delivery_time': 'same_day',
+        'description': 'Fresh vegetables delivered daily'
+    },
+    {
+        'id': 2,
+        'name': 'Quality Foods Ltd.',
+        'location': 'Mumbai',
+        'items': ['rice', 'flour', 'oil', 'spices'],
+        'rating': 4.2,
+        'total_ratings': 18,
+        'price_range': 'low',
+        'delivery_time': 'next_day',
+        'description': 'Quality dry goods and spices'
+    },
+    {
+        'id': 3,
+        'name': 'Mumbai Market Hub',
+        'location': 'Mumbai',
+        'items': ['onion', 'tomato', 'potato', 'rice', 'flour'],
+        'rating': 4.8,
+        'total_ratings': 42,
+        'price_range': 'medium',
+        'delivery_time': 'same_day',
+        'description': 'One-stop shop for all ingredients'
+    },
+    {
+        'id': 4,
+        'name': 'Delhi Fresh Foods',
+        'location': 'Delhi',
+        'items': ['onion', 'tomato', 'potato', 'carrot'],
+        'rating': 4.3,
+        'total_ratings': 31,
+        'price_range': 'low',
+        'delivery_time': 'same_day',
+        'description': 'Fresh vegetables from Delhi markets'
+    },
+    {
+        'id': 5,
+        'name': 'Capital Vegetables',
+        'location': 'Delhi',
+        'items': ['rice', 'flour', 'oil', 'spices'],
+        'rating': 4.6,
+        'total_ratings': 28,
+        'price_range': 'medium',
+        'delivery_time': 'next_day',
+        'description': 'Premium quality dry goods'
+    },
+    {
+        'id': 6,
+        'name': 'Bangalore Fresh',
+        'location': 'Bangalore',
+        'items': ['onion', 'tomato', 'potato', 'carrot'],
+        'rating': 4.4,
+        'total_ratings': 22,
+        'price_range': 'medium',
+        'delivery_time': 'same_day',
+        'description': 'Fresh vegetables from Bangalore farms'
+    },
+    # West Bengal Suppliers
+    {
+        'id': 7,
+        'name': 'Siliguri Fresh Market',
+        'location': 'Siliguri',
+        'items': ['onion', 'tomato', 'potato', 'carrot', 'rice', 'flour'],
+        'rating': 4.6,
+        'total_ratings': 35,
+        'price_range': 'low',
+        'delivery_time': 'same_day',
+        'description': 'Fresh vegetables and grains from Siliguri markets'
+    },
+    {
+        'id': 8,
+        'name': 'Darjeeling Organic Foods',
+        'location': 'Darjeeling',
+        'items': ['potato', 'carrot', 'onion', 'tomato', 'spices', 'tea'],
+        'rating': 4.8,
+        'total_ratings': 28,
+        'price_range': 'medium',
+        'delivery_time': 'next_day',
+        'description': 'Organic vegetables and premium Darjeeling spices'
+    },
+    {
+        'id': 9,
+        'name': 'Jalpaiguri Wholesale Hub',
+        'location': 'Jalpaiguri',
+        'items': ['rice', 'flour', 'oil', 'spices', 'onion', 'tomato'],
+        'rating': 4.3,
+        'total_ratings': 19,
+        'price_range': 'low',
+        'delivery_time': 'same_day',
+        'description': 'Wholesale supplier for all food ingredients'
+    },
+    {
+        'id': 10,
+        'name': 'Cooch Behar Food Supply',
+        'location': 'Cooch Behar',
+        'items': ['rice', 'flour', 'oil', 'spices', 'onion', 'tomato', 'potato'],
+        'rating': 4.5,
+        'total_ratings': 31,
+        'price_range': 'medium',
+        'delivery_time': 'same_day',
+        'description': 'Complete food supply for street vendors'
+    },
+    {
+        'id': 11,
+        'name': 'North Bengal Fresh Vegetables',
+        'location': 'Siliguri',
+        'items': ['onion', 'tomato', 'potato', 'carrot', 'cabbage', 'cauliflower'],
+        'rating': 4.7,
+        'total_ratings': 42,
+        'price_range': 'medium',
+        'delivery_time': 'same_day',
+        'description': 'Fresh vegetables from North Bengal farms'
+    },
+    {
+        'id': 12,
+        'name': 'Darjeeling Spice Traders',
+        'location': 'Darjeeling',
+        'items': ['spices', 'tea', 'cardamom', 'ginger', 'garlic'],
+        'rating': 4.9,
+        'total_ratings': 38,
+        'price_range': 'high',
+        'delivery_time': 'next_day',
+        'description': 'Premium Darjeeling spices and tea'
+    }
+]
+
+
+# Cities considered close enough to serve each other
+NEARBY_MAPPINGS = {
+    'mumbai': ['thane', 'navi mumbai', 'kalyan'],
+    'delhi': ['noida', 'gurgaon', 'ghaziabad'],
+    'bangalore': ['mysore', 'mandya', 'tumkur'],
+    'siliguri': ['darjeeling', 'jalpaiguri', 'cooch behar', 'alipurduar'],
+    'darjeeling': ['siliguri', 'jalpaiguri', 'kurseong', 'kalimpong'],
+    'jalpaiguri': ['siliguri', 'cooch behar', 'alipurduar', 'darjeeling'],
+    'cooch behar': ['jalpaiguri', 'alipurduar', 'siliguri']
+}
+
+def build_nearby_locations(mappings):
+    """Expand the mappings into a symmetric city -> set of nearby cities lookup"""
+    nearby_locations = {}
+    for city, nearby in mappings.items():
+        for other in nearby:
+            nearby_locations.setdefault(city, set()).add(other)
+            nearby_locations.setdefault(other, set()).add(city)
+    return nearby_locations
+
+NEARBY_LOCATIONS = build_nearby_locations(NEARBY_MAPPINGS)
+
+# Suppliers farther than this from the vendor get no location score
+DEFAULT_RADIUS_KM = 150
+
+@lru_cache(maxsize=65536)
+def location_score(supplier_location, vendor_location, radius_km=DEFAULT_RADIUS_KM):
+    """
+    Location term of a supplier's score for a vendor
+    
+    Same location scores 40. When both places are in the gazetteer the score
+    falls off linearly with distance, reaching 0 at radius_km. Otherwise, or
+    when radius_km is None, a nearby city from NEARBY_MAPPINGS scores 20.
+    """
+    supplier_loc = supplier_location.lower()
+    vendor_loc = vendor_location.lower()
+    if supplier_loc == vendor_loc:
+        return 40
+    if radius_km is not None:
+        origin = geocode(vendor_location)
+        destination = geocode(supplier_location)
+        if origin is not None and destination is not None:
+            distance = haversine_km(origin, destination)
+            return 40 * (1 - distance / radius_km) if distance < radius_km else 0
+    return 20 if supplier_loc in NEARBY_LOCATIONS.get(vendor_loc, ()) else 0
+
+SCORING_MODES = ('scalar', 'vectorized')
+
+def iter_chunks(iterable, size):
+    """Yield lists of up to size consecutive items"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class SupplierIndex:
+    """
+    Supplier records with their posting lists, rankings and location grid.
+    
+    The engine publishes one index at a time and never changes a published
+    index: a reload builds a new one and supplier changes are applied to a
+    copy, which then replaces it. A reader that takes the published index
+    once per call sees one consistent set of suppliers whatever the engine
+    does meanwhile.
+    """
+    
+    def __init__(self, radius_km=DEFAULT_RADIUS_KM, interner=None):
+        """
+        Args:
+            radius_km (float): Distance at which the location score reaches 0
+            interner (SupplierInterner): Vocabularies to intern records into;
+                a new one if None. Interners only ever grow, so indexes can share one
+        """
+        self.radius_km = radius_km
+        self.interner = interner if interner is not None else SupplierInterner()
+        self.records = {}
+        self.next_order = 0
+        self.item_index = {}
+        self.location_index = {}
+        self.item_location_index = {}
+        self.rating_rankings = {}
+        self.location_grid = LocationGrid(cell_km=radius_km or 50)
+        self.vectors = None
+        # Version of the supplier data the index reflects, when the engine tracks one
+        self.version = None
+        # Replaced whenever the set of item names changes, so the item matcher knows to refit
+        self.vocabulary = object()
+        # Set on copies, whose posting arrays are shared with the published index until replaced
+        self.shared = False
+    
+    def load(self, suppliers):
+        """
+        Add suppliers to a new index and build its posting lists and rankings
+        
+        Args:
+            suppliers (list): Supplier dicts; a repeated id replaces the earlier
+                one but keeps its position in load order
+        """
+        # Suppliers are held as compact records; dicts are only built for results
+        for supplier in suppliers:
+            existing = self.records.get(supplier['id'])
+            order = existing.order if existing is not None else len(self.records)
+            self.records[supplier['id']] = self.interner.record(supplier, order)
+        self.next_order = len(self.records)
+        # Records are visited in load order, so every posting list is built by
+        # appending; only the rating rankings need sorting afterwards
+        for record in self.records.values():
+            self.index_supplier(record, rank=False)
+        for key, ranking in self.rating_rankings.items():
+            self.rating_rankings[key] = array('q', sorted(ranking, key=self.rating_key))
+        # Copying drops the spare capacity the arrays grew while appending
+        for index in (self.item_index, self.location_index, self.item_location_index):
+            for key, postings in index.items():
+                index[key] = array('q', postings)
+    
+    def copy(self):
+        """Get a copy to apply supplier changes to before it replaces this index"""
+        index = SupplierIndex(self.radius_km, self.interner)
+        index.records = dict(self.records)
+        index.next_order = self.next_order
+        index.item_index = dict(self.item_index)
+        index.location_index = dict(self.location_index)
+        index.item_location_index = dict(self.item_location_index)
+        index.rating_rankings = dict(self.rating_rankings)
+        index.location_grid = self.location_grid.copy()
+        index.version = self.version
+        index.vocabulary = self.vocabulary
+        index.shared = True
+        return index
+    
+    def postings(self, index, key):
+        """Get the array under key in one of the posting dicts for changing, copying it if it may be shared"""
+        postings = index.get(key)
+        if postings is None:
+            postings = index[key] = array('q')
+        elif self.shared:
+            postings = index[key] = array('q', postings)
+        return postings
+    
+    def order_key(self, supplier_id):
+        """Sort key keeping supplier ids in load order"""
+        return self.records[supplier_id].order
+    
+    def rating_key(self, supplier_id):
+        """Sort key ranking supplier ids by rating, highest first, then load order"""
+        record = self.records[supplier_id]
+        return (-record.rating, record.order)
+    
+    def upsert(self, supplier):
+        """
+        Add a supplier or replace an existing one with the same id
+        
+        Returns:
+            SupplierRecord: The replaced record, or None
+        """
+        supplier_id = supplier['id']
+        existing = self.records.get(supplier_id)
+        if existing is not None:
+            self.unindex_supplier(existing)
+            # Replacing the value keeps the dict, and so the vectors' rows, in load order
+            record = self.interner.record(supplier, existing.order)
+        else:
+            record = self.interner.record(supplier, self.next_order)
+            self.next_order += 1
+        self.records[supplier_id] = record
+        self.index_supplier(record)
+        return existing
+    
+    def remove(self, supplier_id):
+        """
+        Drop a supplier
+        
+        Returns:
+            SupplierRecord: The removed record, or None if there was none
+        """
+        record = self.records.get(supplier_id)
+        if record is not None:
+            self.unindex_supplier(record)
+            del self.records[supplier_id]
+        return record
+    
+    def index_supplier(self, record, rank=True):
+        """
+        Add a record to the posting lists and its (item, location) rankings
+        
+        Posting lists are arrays of supplier ids kept in load order.
+        
+        Args:
+            record (SupplierRecord): Record already stored in self.records
+            rank (bool): Insert into the rating rankings in place; when False
+                the id is appended and the caller must sort the rankings
+        """
+        supplier_id = record.id
+        location = self.interner.location_name(record)
+        for item in self.interner.item_names(record.item_ids):
+            if item not in self.item_index:
+                self.vocabulary = object()
+            insert_sorted(self.postings(self.item_index, item), supplier_id, self.order_key)
+            insert_sorted(self.postings(self.item_location_index, (item, location)), supplier_id, self.order_key)
+            ranking = self.postings(self.rating_rankings, (item, location))
+            if rank:
+                insert_sorted(ranking, supplier_id, self.rating_key)
+            else:
+                ranking.append(supplier_id)
+        if location not in self.location_index:
+            point = geocode(location)
+            if point is not None:
+                self.location_grid.add(location, point)
+        insert_sorted(self.postings(self.location_index, location), supplier_id, self.order_key)
+    
+    def unindex_supplier(self, record):
+        """Remove a record, still stored in self.records, from the posting lists and rankings"""
+        supplier_id = record.id
+        location = self.interner.location_name(record)
+        for item in self.interner.item_names(record.item_ids):
+            for index, key, sort_key in ((self.item_index, item, self.order_key),
+                                         (self.item_location_index, (item, location), self.order_key),
+                                         (self.rating_rankings, (item, location), self.rating_key)):
+                if key not in index:
+                    continue
+                postings = self.postings(index, key)
+                remove_sorted(postings, supplier_id, sort_key)
+                if not postings:
+                    del index[key]
+            if item not in self.item_index:
+                self.vocabulary = object()
+        if location in self.location_index:
+            postings = self.postings(self.location_index, location)
+            remove_sorted(postings, supplier_id, self.order_key)
+            if not postings:
+                del self.location_index[location]
+                self.location_grid.remove(location)
+    
+    def get_candidate_ids(self, vendor_needs, vendor_location):
+        """
+        Get ids of suppliers worth scoring: those carrying at least one needed
+        item or located in or near the vendor's location
+        """
+        candidates = set()
+        for need in vendor_needs:
+            candidates.update(self.item_index.get(need, ()))
+        for location in self.get_locations_in_range(vendor_location):
+            candidates.update(self.location_index.get(location, ()))
+        return candidates
+    
+    def get_locations_in_range(self, vendor_location):
+        """Get the indexed supplier locations with a positive location score for a vendor"""
+        vendor_loc = vendor_location.lower()
+        locations = set()
+        if vendor_loc in self.location_index:
+            locations.add(vendor_loc)
+        origin = geocode(vendor_location) if self.radius_km is not None else None
+        if origin is not None:
+            locations.update(location for location, _ in self.location_grid.within(origin, self.radius_km))
+        # Places missing from the gazetteer fall back to the hand-maintained mapping
+        locations.update(location for location in NEARBY_LOCATIONS.get(vendor_loc, ()) if location in self.location_index)
+        return [location for location in locations if location_score(location, vendor_location, self.radius_km) > 0]
+    
+    def suppliers_for_ids(self, supplier_ids):
+        """Look up suppliers by id as dicts, in load order"""
+        records = self.records
+        ordered = sorted((records[i] for i in supplier_ids if i in records), key=lambda record: record.order)
+        return [self.interner.to_dict(record) for record in ordered]
+
 class RecommendationEngine:
-    def __init__(self):
-        self.suppliers_data = []
-        self.load_suppliers_data()
+    def __init__(self, loader=None, max_age=None, scoring='scalar', radius_km=DEFAULT_RADIUS_KM, item_matcher=None,
+                 version_reader=None):
+        """
+        Args:
+            loader (callable): Returns a list of supplier dicts; defaults to sample data
+            max_age (int): Seconds before the loaded data is considered stale and reloaded
+            scoring (str): 'scalar' to score candidates one by one, 'vectorized' to
+                score every supplier at once with NumPy
+            radius_km (float): Distance at which the location score reaches 0;
+                None keeps the same/nearby city step scores
+            item_matcher (ItemMatcher): Resolves vendor needs to supplier items;
+                needs must match items exactly if None
+            version_reader (callable): Returns the version of the loader's data,
+                read before each load and kept as the index's version
+        """
+        if scoring not in SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode: {scoring}")
+        self.loader = loader
+        self.max_age = max_age
+        self.scoring = scoring
+        self.radius_km = radius_km
+        self.item_matcher = item_matcher
+        self.version_reader = version_reader
+        self.fitted_vocabulary = None
+        self.listeners = []
+        self.index = SupplierIndex(radius_km)
+        # Counts published indexes, so callers can tell whether suppliers changed while they worked
+        self.generation = 0
+        self.loaded_at = None
+        self.loaded_time = None
+        self.lock = threading.RLock()
+        if loader is None:
+            self.load_suppliers_data()
     
     def load_suppliers_data(self):
-        """Load suppliers data from database or sample data"""
-        # Sample supplier data - in real app, this would come from database
-        self.suppliers_data = [
-            {
-                'id': 1,
-                'name': 'Fresh Vegetables Co.',
-                'location': 'Mumbai',
-                'items': ['onion', 'tomato', 'potato', 'carrot'],
-                'rating': 4.5,
-                'total_ratings': 25,
-                'price_range': 'medium',
-                'delivery_time': 'same_day',
-                'description': 'Fresh vegetables delivered daily'
-            },
-            {
-                'id': 2,
-                'name': 'Quality Foods Ltd.',
-                'location': 'Mumbai',
-                'items': ['rice', 'flour', 'oil', 'spices'],
-                'rating': 4.2,
-                'total_ratings': 18,
-                'price_range': 'low',
-                'delivery_time': 'next_day',
-                'description': 'Quality dry goods and spices'
-            },
-            {
-                'id': 3,
-                'name': 'Mumbai Market Hub',
-                'location': 'Mumbai',
-                'items': ['onion', 'tomato', 'potato', 'rice', 'flour'],
-                'rating': 4.8,
-                'total_ratings': 42,
-                'price_range': 'medium',
-                'delivery_time': 'same_day',
-                'description': 'One-stop shop for all ingredients'
-            },
-            {
-                'id': 4,
-                'name': 'Delhi Fresh Foods',
-                'location': 'Delhi',
-                'items': ['onion', 'tomato', 'potato', 'carrot'],
-                'rating': 4.3,
-                'total_ratings': 31,
-                'price_range': 'low',
-                'delivery_time': 'same_day',
-                'description': 'Fresh vegetables from Delhi markets'
-            },
-            {
-                'id': 5,
-                'name': 'Capital Vegetables',
-                'location': 'Delhi',
-                'items': ['rice', 'flour', 'oil', 'spices'],
-                'rating': 4.6,
-                'total_ratings': 28,
-                'price_range': 'medium',
-                'delivery_time': 'next_day',
-                'description': 'Premium quality dry goods'
-            },
-            {
-                'id': 6,
-                'name': 'Bangalore Fresh',
-                'location': 'Bangalore',
-                'items': ['onion', 'tomato', 'potato', 'carrot'],
-                'rating': 4.4,
-                'total_ratings': 22,
-                'price_range': 'medium',
-                'delivery_time': 'same_day',
-                'description': 'Fresh vegetables from Bangalore farms'
-            },
-            # West Bengal Suppliers
-            {
-                'id': 7,
-                'name': 'Siliguri Fresh Market',
-                'location': 'Siliguri',
-                'items': ['onion', 'tomato', 'potato', 'carrot', 'rice', 'flour'],
-                'rating': 4.6,
-                'total_ratings': 35,
-                'price_range': 'low',
-                'delivery_time': 'same_day',
-                'description': 'Fresh vegetables and grains from Siliguri markets'
-            },
-            {
-                'id': 8,
-                'name': 'Darjeeling Organic Foods',
-                'location': 'Darjeeling',
-                'items': ['potato', 'carrot', 'onion', 'tomato', 'spices', 'tea'],
-                'rating': 4.8,
-                'total_ratings': 28,
-                'price_range': 'medium',
-                'delivery_time': 'next_day',
-                'description': 'Organic vegetables and premium Darjeeling spices'
-            },
-            {
-                'id': 9,
-                'name': 'Jalpaiguri Wholesale Hub',
-                'location': 'Jalpaiguri',
-                'items': ['rice', 'flour', 'oil', 'spices', 'onion', 'tomato'],
-                'rating': 4.3,
-                'total_ratings': 19,
-                'price_range': 'low',
-                'delivery_time': 'same_day',
-                'description': 'Wholesale supplier for all food ingredients'
-            },
-            {
-                'id': 10,
-                'name': 'Cooch Behar Food Supply',
-                'location': 'Cooch Behar',
-                'items': ['rice', 'flour', 'oil', 'spices', 'onion', 'tomato', 'potato'],
-                'rating': 4.5,
-                'total_ratings': 31,
-                'price_range': 'medium',
-                'delivery_time': 'same_day',
-                'description': 'Complete food supply for street vendors'
-            },
-            {
-                'id': 11,
-                'name': 'North Bengal Fresh Vegetables',
-                'location': 'Siliguri',
-                'items': ['onion', 'tomato', 'potato', 'carrot', 'cabbage', 'cauliflower'],
-                'rating': 4.7,
-                'total_ratings': 42,
-                'price_range': 'medium',
-                'delivery_time': 'same_day',
-                'description': 'Fresh vegetables from North Bengal farms'
-            },
-            {
-                'id': 12,
-                'name': 'Darjeeling Spice Traders',
-                'location': 'Darjeeling',
-                'items': ['spices', 'tea', 'cardamom', 'ginger', 'garlic'],
-                'rating': 4.9,
-                'total_ratings': 38,
-                'price_range': 'high',
-                'delivery_time': 'next_day',
-                'description': 'Premium Darjeeling spices and tea'
-            }
-        ]
+        """Load suppliers data from the configured loader or sample data"""
+        # Read first, so the version can only be older than the data, never newer
+        version = self.version_reader() if self.version_reader else None
+        suppliers = self.loader() if self.loader else SAMPLE_SUPPLIERS
+        with self.lock:
+            index = SupplierIndex(self.radius_km)
+            index.load(suppliers)
+            index.version = version
+            self.publish(index)
+            self.loaded_at = time.monotonic()
+            self.loaded_time = time.time()
+        self.notify_listeners(None, None)
+    
+    def publish(self, index):
+        """Make index the one readers use; call with the lock held"""
+        self.generation += 1
+        self.index = index
+    
+    def add_listener(self, listener):
+        """
+        Register a callback for supplier changes
+        
+        The callback is called as listener(previous, current) with the old and
+        new supplier dicts, either of which is None for an insert or removal.
+        Both are None when all suppliers were reloaded.
+        """
+        self.listeners.append(listener)
+    
+    def notify_listeners(self, previous, current):
+        """Tell listeners about a supplier change"""
+        for listener in self.listeners:
+            listener(previous, current)
+    
+    def invalidate(self):
+        """Mark the loaded data as stale so it is reloaded on next use"""
+        with self.lock:
+            self.loaded_at = None
+    
+    def ensure_fresh(self):
+        """Reload suppliers if they were invalidated or are older than max_age"""
+        if not self.is_stale():
+            return
+        with self.lock:
+            if self.is_stale():
+                self.load_suppliers_data()
+    
+    def is_stale(self):
+        """Check whether the loaded data needs to be reloaded"""
+        loaded_at = self.loaded_at
+        if loaded_at is None:
+            return True
+        return self.max_age is not None and time.monotonic() - loaded_at > self.max_age
+    
+    def current_index(self):
+        """Get the published index, reloading first if it is stale; read it at most once per call"""
+        self.ensure_fresh()
+        return self.index
+    
+    def upsert_supplier(self, supplier):
+        """Add a supplier or replace an existing one with the same id"""
+        self.update_suppliers(upserts=[supplier])
+    
+    def remove_supplier(self, supplier_id):
+        """Drop a supplier from the loaded data"""
+        self.update_suppliers(removals=[supplier_id])
+    
+    def update_suppliers(self, upserts=(), removals=(), version=None):
+        """
+        Apply supplier changes to a copy of the index and publish it
+        
+        Args:
+            upserts (list): Supplier dicts to add or replace
+            removals (list): Ids of suppliers to drop
+            version (int): Data version after the changes; the index keeps its
+                version if None
+        """
+        changes = []
+        with self.lock:
+            index = self.index.copy()
+            if version is not None:
+                index.version = version
+            for supplier in upserts:
+                existing = index.upsert(supplier)
+                previous = index.interner.to_dict(existing) if existing is not None and self.listeners else None
+                changes.append((previous, supplier))
+            for supplier_id in removals:
+                record = index.remove(supplier_id)
+                if record is not None:
+                    changes.append((index.interner.to_dict(record), None))
+            self.publish(index)
+        for previous, current in changes:
+            self.notify_listeners(previous, current)
+    
+    def resolve_needs(self, vendor_needs, index=None):
+        """
+        Map vendor needs onto supplier item names with the item matcher, if any
+        
+        Needs resolving to the same item are kept once, so they count as one
+        need rather than matching a supplier item twice.
+        """
+        if self.item_matcher is None:
+            return vendor_needs
+        index = index or self.index
+        if self.fitted_vocabulary is not index.vocabulary:
+            with self.lock:
+                if self.fitted_vocabulary is not index.vocabulary:
+                    self.item_matcher.fit(index.item_index.keys())
+                    self.fitted_vocabulary = index.vocabulary
+        return list(dict.fromkeys(self.item_matcher.resolve_all(vendor_needs)))
     
-    def get_supplier_recommendations(self, vendor_needs, vendor_location, max_recommendations=5):
+    def get_suppliers_near(self, location, radius_km=None):
+        """
+        Get suppliers within radius_km of a location, nearest first
+        
+        Returns:
+            list: (supplier, distance_km) pairs; empty if the location is not in the gazetteer
+        """
+        index = self.current_index()
+        origin = geocode(location)
+        if origin is None:
+            return []
+        nearest = sorted(index.location_grid.within(origin, radius_km or self.radius_km or DEFAULT_RADIUS_KM), key=lambda x: x[1])
+        return [(supplier, distance) for place, distance in nearest
+                for supplier in index.suppliers_for_ids(index.location_index.get(place, ()))]
+    
+    def get_supplier_recommendations(self, vendor_needs, vendor_location, max_recommendations=5, index=None):
         """
         Get supplier recommendations based on vendor needs and location
         
+        Only suppliers sharing at least one need, or in the same or a nearby
+        location, are scored. Ties keep the suppliers' load order. With an
+        item matcher, needs are resolved to supplier items first and
+        matching_items holds the supplier item names.
+        
         Args:
             vendor_needs (list): List of items the vendor needs
             vendor_location (str): Vendor's location
             max_recommendations (int): Maximum number of recommendations to return
+            index (SupplierIndex): Index to score; the published one if None
         
         Returns:
             list: List of recommended suppliers with scores
@@ -164,55 +599,127 @@ class RecommendationEngine:
         if not vendor_needs:
             return []
         
-        recommendations = []
+        index = index or self.current_index()
+        vendor_needs = self.resolve_needs(vendor_needs, index)
+        if self.scoring == 'vectorized':
+            return self.get_supplier_vectors(index).recommend(vendor_needs, vendor_location, max_recommendations)
+        records = index.records
+        interner = index.interner
+        need_ids = [interner.items.get(need) for need in vendor_needs]
+        # How many times each known item is needed; a repeated need counts once per mention
+        need_counts = collections.Counter(item_id for item_id in need_ids if item_id is not None)
+        repeated_needs = len(need_counts) < sum(need_counts.values())
+        need_set = set(need_counts)
+        location_names = interner.locations.names
+        price_scores = [self.get_price_score(name) for name in interner.price_ranges.names]
+        delivery_scores = [self.get_delivery_score(name) for name in interner.delivery_times.names]
+        scored = []
         
-        for supplier in self.suppliers_data:
-            score = self.calculate_supplier_score(supplier, vendor_needs, vendor_location)
+        for supplier_id in index.get_candidate_ids(vendor_needs, vendor_location):
+            record = records.get(supplier_id)
+            if record is None:
+                continue
+            supplier_location_score = location_score(location_names[record.location_id], vendor_location, self.radius_km)
+            if repeated_needs:
+                match_count = sum(need_counts[item_id] for item_id in need_set.intersection(record.item_ids))
+            else:
+                match_count = len(need_set.intersection(record.item_ids))
+            score = self.score_supplier(supplier_location_score, match_count, len(vendor_needs), record.rating,
+                                        price_scores[record.price_id], delivery_scores[record.delivery_id],
+                                        record.total_ratings)
             if score > 0:
-                recommendations.append({
-                    'supplier': supplier,
-                    'score': score,
-                    'matching_items': self.get_matching_items(supplier['items'], vendor_needs)
-                })
+                scored.append((score, -record.order, record))
+        
+        # Keep the top scores, breaking ties by load order like a stable sort would
+        top = heapq.nlargest(max_recommendations, scored, key=lambda x: (x[0], x[1]))
+        return [{
+            'supplier': interner.to_dict(record),
+            'score': score,
+            'matching_items': [need for need, item_id in zip(vendor_needs, need_ids) if record.has_item(item_id)]
+        } for score, _, record in top]
+    
+    def get_supplier_vectors(self, index=None):
+        """Get the column arrays for an index's suppliers, the published one by default, building them if needed"""
+        index = index or self.index
+        vectors = index.vectors
+        if vectors is None:
+            with self.lock:
+                vectors = index.vectors
+                if vectors is None:
+                    # NumPy and SciPy are only imported once vectorized scoring is used
+                    from supplier_vectors import SupplierVectors
+                    vectors = SupplierVectors(index.records.values(), index.interner, self.get_price_score,
+                                              self.get_delivery_score, self.radius_km)
+                    index.vectors = vectors
+        return vectors
+    
+    def get_vectorized_recommendations(self, vendor_needs, vendor_location, max_recommendations=5):
+        """
+        Same contract and results as the scalar path, but scores all suppliers
+        with array operations and selects the top results with argpartition
+        """
+        return self.get_supplier_vectors(self.current_index()).recommend(vendor_needs, vendor_location,
+                                                                         max_recommendations)
+    
+    def get_batch_recommendations(self, vendor_requests, max_recommendations=5, chunk_size=64):
+        """
+        Score many vendors at once as a vendor x supplier matrix
         
-        # Sort by score (highest first)
-        recommendations.sort(key=lambda x: x['score'], reverse=True)
+        Args:
+            vendor_requests (iterable): Dicts with 'needs' and 'location' keys
+            max_recommendations (int): Maximum number of recommendations per vendor
+            chunk_size (int): Number of vendors scored together, bounding memory use
         
-        # Return top recommendations
-        return recommendations[:max_recommendations]
+        Yields:
+            tuple: (vendor_request, recommendations) in input order
+        """
+        index = self.current_index()
+        vectors = self.get_supplier_vectors(index)
+        for chunk in iter_chunks(vendor_requests, chunk_size):
+            resolved = [dict(request, needs=self.resolve_needs(request['needs'], index)) for request in chunk]
+            yield from zip(chunk, vectors.recommend_batch(resolved, max_recommendations))
     
     def calculate_supplier_score(self, supplier, vendor_needs, vendor_location):
         """
-        Calculate a score for a supplier based on various factors
-        """
-        score = 0
+        Calculate a score for a supplier dict based on various factors
         
+        This is the reference implementation the indexed and vectorized
+        paths must agree with.
+        """
         # Location match (highest weight)
-        if supplier['location'].lower() == vendor_location.lower():
-            score += 40
-        elif self.is_nearby_location(supplier['location'], vendor_location):
-            score += 20
+        supplier_location_score = location_score(supplier['location'], vendor_location, self.radius_km)
         
-        # Item availability (high weight)
         matching_items = self.get_matching_items(supplier['items'], vendor_needs)
-        item_coverage = len(matching_items) / len(vendor_needs) if vendor_needs else 0
+        return self.score_supplier(supplier_location_score, len(matching_items), len(vendor_needs), supplier['rating'],
+                                   self.get_price_score(supplier['price_range']),
+                                   self.get_delivery_score(supplier['delivery_time']), supplier['total_ratings'])
+    
+    def score_supplier(self, supplier_location_score, match_count, need_count, rating, price_score, delivery_score,
+                       total_ratings):
+        """
+        Combine a precomputed location score and item matches with the
+        supplier's rating, price score, delivery score and reliability
+        """
+        score = 0
+        score += supplier_location_score
+        
+        # Item availability (high weight)
+        item_coverage = match_count / need_count if need_count else 0
         score += item_coverage * 30
         
         # Rating (medium weight)
-        score += supplier['rating'] * 2
+        score += rating * 2
         
         # Price range (medium weight)
-        price_score = self.get_price_score(supplier['price_range'])
         score += price_score * 3
         
         # Delivery time (low weight)
-        delivery_score = self.get_delivery_score(supplier['delivery_time'])
         score += delivery_score * 2
         
         # Total ratings (reliability indicator)
-        if supplier['total_ratings'] > 20:
+        if total_ratings > 20:
             score += 5
-        elif supplier['total_ratings'] > 10:
+        elif total_ratings > 10:
             score += 3
         
         return score
@@ -223,26 +730,7 @@ class RecommendationEngine:
     
     def is_nearby_location(self, supplier_location, vendor_location):
         """Check if supplier is in a nearby location"""
-        nearby_mappings = {
-            'mumbai': ['thane', 'navi mumbai', 'kalyan'],
-            'delhi': ['noida', 'gurgaon', 'ghaziabad'],
-            'bangalore': ['mysore', 'mandya', 'tumkur'],
-            'siliguri': ['darjeeling', 'jalpaiguri', 'cooch behar', 'alipurduar'],
-            'darjeeling': ['siliguri', 'jalpaiguri', 'kurseong', 'kalimpong'],
-            'jalpaiguri': ['siliguri', 'cooch behar', 'alipurduar', 'darjeeling'],
-            'cooch behar': ['jalpaiguri', 'alipurduar', 'siliguri']
-        }
-        
-        vendor_loc = vendor_location.lower()
-        supplier_loc = supplier_location.lower()
-        
-        for city, nearby in nearby_mappings.items():
-            if vendor_loc == city and supplier_loc in nearby:
-                return True
-            if supplier_loc == city and vendor_loc in nearby:
-                return True
-        
-        return False
+        return supplier_location.lower() in NEARBY_LOCATIONS.get(vendor_location.lower(), ())
     
     def get_price_score(self, price_range):
         """Convert price range to score"""
@@ -264,18 +752,28 @@ class RecommendationEngine:
     
     def get_suppliers_by_location(self, location):
         """Get all suppliers in a specific location"""
-        return [s for s in self.suppliers_data if s['location'].lower() == location.lower()]
+        index = self.current_index()
+        return index.suppliers_for_ids(index.location_index.get(location.lower(), ()))
     
     def get_suppliers_by_item(self, item):
         """Get all suppliers that provide a specific item"""
-        return [s for s in self.suppliers_data if item in s['items']]
+        index = self.current_index()
+        return index.suppliers_for_ids(index.item_index.get(item, ()))
     
     def get_price_recommendations(self, item, location):
-        """Get price recommendations for a specific item in a location"""
-        suppliers = self.get_suppliers_by_item(item)
-        location_suppliers = [s for s in suppliers if s['location'].lower() == location.lower()]
+        """
+        Get price recommendations for a specific item in a location
         
-        if not location_suppliers:
+        Reads the precomputed (item, location) posting list, so the cost is
+        the size of the result.
+        
+        Returns:
+            dict: Suppliers by price range in load order, or None if there are none
+        """
+        index = self.current_index()
+        item = self.resolve_needs([item], index)[0]
+        supplier_ids = index.item_location_index.get((item, location.lower()))
+        if not supplier_ids:
             return None
         
         prices = {
@@ -284,20 +782,58 @@ class RecommendationEngine:
             'high': []
         }
         
-        for supplier in location_suppliers:
-            prices[supplier['price_range']].append(supplier)
+        interner = index.interner
+        for supplier_id in supplier_ids:
+            record = index.records[supplier_id]
+            prices.setdefault(interner.price_range(record), []).append(interner.to_dict(record))
         
         return prices
     
-    def get_quality_recommendations(self, item, location):
-        """Get quality-based recommendations"""
-        suppliers = self.get_suppliers_by_item(item)
-        location_suppliers = [s for s in suppliers if s['location'].lower() == location.lower()]
-        
-        # Sort by rating
-        location_suppliers.sort(key=lambda x: x['rating'], reverse=True)
-        
-        return location_suppliers[:3]  # Top 3 by rating
+    def get_quality_recommendations(self, item, location, limit=3):
+        """Get the best rated suppliers of an item in a location from the precomputed ranking"""
+        index = self.current_index()
+        item = self.resolve_needs([item], index)[0]
+        ranking = index.rating_rankings.get((item, location.lower()), [])
+        return [index.interner.to_dict(index.records[supplier_id]) for supplier_id in ranking[:limit]]
+
+_engine = None
+_engine_lock = threading.Lock()
+_result_cache = None
+
+def configure_engine(loader=None, max_age=None, scoring='scalar', radius_km=DEFAULT_RADIUS_KM, item_matcher=None,
+                     result_cache=None, version_reader=None):
+    """
+    Install the process-wide engine used by get_supplier_recommendations
+    
+    Args:
+        loader (callable): Returns a list of supplier dicts, e.g. from the database
+        max_age (int): Seconds before the engine reloads suppliers from the loader
+        scoring (str): Scoring mode, 'scalar' or 'vectorized'
+        radius_km (float): Distance at which the location score reaches 0
+        item_matcher (ItemMatcher): Resolves vendor needs to supplier items
+        result_cache (RecommendationCache): Caches results of get_supplier_recommendations
+        version_reader (callable): Returns the version of the loader's data
+    
+    Returns:
+        RecommendationEngine: The shared engine
+    """
+    global _engine, _result_cache
+    with _engine_lock:
+        _engine = RecommendationEngine(loader=loader, max_age=max_age, scoring=scoring, radius_km=radius_km,
+                                       item_matcher=item_matcher, version_reader=version_reader)
+        _result_cache = result_cache
+        if result_cache is not None:
+            _engine.add_listener(make_cache_invalidator(result_cache, radius_km))
+    return _engine
+
+def get_engine():
+    """Get the process-wide engine, creating one over sample data if none is configured"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = RecommendationEngine()
+    return _engine
 
 def get_supplier_recommendations(vendor_needs, vendor_location, max_recommendations=5):
     """
@@ -311,22 +847,97 @@ def get_supplier_recommendations(vendor_needs, vendor_location, max_recommendati
     Returns:
         dict: Recommendations with suppliers and scores
     """
-    engine = RecommendationEngine()
-    recommendations = engine.get_supplier_recommendations(vendor_needs, vendor_location, max_recommendations)
+    engine = get_engine()
+    cache = _result_cache
+    if cache is None or not vendor_needs:
+        recommendations = engine.get_supplier_recommendations(vendor_needs, vendor_location, max_recommendations)
+        return format_recommendations(recommendations, vendor_needs, vendor_location)
+    
+    # Read the generation before taking the index, so an invalidation landing in between drops the store
+    # rather than filing a result from the old index under the new generation. Taking the index reloads
+    # it if needed, so a reload's cache clear happens before the lookup
+    generation = cache.generation
+    index = engine.current_index()
+    resolved_needs = engine.resolve_needs(vendor_needs, index)
+    recommendations = cache.get(resolved_needs, vendor_location, max_recommendations)
+    if recommendations is None:
+        recommendations = engine.get_supplier_recommendations(resolved_needs, vendor_location, max_recommendations,
+                                                              index)
+        cache.set(resolved_needs, vendor_location, max_recommendations, recommendations, generation, index.version)
+    else:
+        # Cached entries are shared by every ordering of the same needs
+        recommendations = [
+            dict(rec, matching_items=[need for need in resolved_needs if need in set(rec['matching_items'])])
+            for rec in recommendations
+        ]
+    return format_recommendations(recommendations, vendor_needs, vendor_location)
+
+def make_cache_invalidator(cache, radius_km):
+    """Build an engine listener that drops cache entries affected by a supplier change"""
+    def invalidate(previous, current):
+        if previous is None and current is None:
+            cache.clear()
+            return
+        suppliers = [supplier for supplier in (previous, current) if supplier is not None]
+        cache.invalidate_supplier(
+            suppliers,
+            lambda supplier_location, vendor_location: location_score(supplier_location, vendor_location, radius_km) > 0
+        )
+    return invalidate
+
+def get_cache_stats():
+    """Get the result cache's counters, or None when caching is off"""
+    return _result_cache.stats() if _result_cache is not None else None
+
+def format_supplier(supplier):
+    """Format an engine supplier dict for API responses"""
+    return {
+        'id': supplier['id'],
+        'name': supplier['name'],
+        'location': supplier['location'],
+        'rating': supplier['rating'],
+        'total_ratings': supplier['total_ratings'],
+        'price_range': supplier['price_range'],
+        'delivery_time': supplier['delivery_time'],
+        'description': supplier['description']
+    }
+
+def get_price_recommendations(item, location):
+    """
+    Get suppliers of an item in a location grouped by price range
     
-    # Format the response
+    Returns:
+        dict: The item, location and suppliers for each price range
+    """
+    prices = get_engine().get_price_recommendations(item, location) or {'low': [], 'medium': [], 'high': []}
+    return {
+        'item': item,
+        'location': location,
+        'price_ranges': {price_range: [format_supplier(s) for s in suppliers] for price_range, suppliers in prices.items()},
+        'total_found': sum(len(suppliers) for suppliers in prices.values())
+    }
+
+def get_quality_recommendations(item, location):
+    """
+    Get the best rated suppliers of an item in a location
+    
+    Returns:
+        dict: The item, location and suppliers by rating, highest first
+    """
+    suppliers = get_engine().get_quality_recommendations(item, location)
+    return {
+        'item': item,
+        'location': location,
+        'suppliers': [format_supplier(s) for s in suppliers],
+        'total_found': len(suppliers)
+    }
+
+def format_recommendations(recommendations, vendor_needs, vendor_location):
+    """Format engine recommendations into the API response shape"""
     formatted_recommendations = []
     for rec in recommendations:
-        supplier = rec['supplier']
         formatted_recommendations.append({
-            'id': supplier['id'],
-            'name': supplier['name'],
-            'location': supplier['location'],
-            'rating': supplier['rating'],
-            'total_ratings': supplier['total_ratings'],
-            'price_range': supplier['price_range'],
-            'delivery_time': supplier['delivery_time'],
-            'description': supplier['description'],
+            **format_supplier(rec['supplier']),
             'score': round(rec['score'], 2),
             'matching_items': rec['matching_items'],
             'coverage_percentage': round(len(rec['matching_items']) / len(vendor_needs) * 100, 1) if vendor_needs else 0
@@ -339,6 +950,64 @@ def get_supplier_recommendations(vendor_needs, vendor_location, max_recommendati
         'vendor_location': vendor_location
     }
 
+def format_batch_result(vendor_request, recommendations):
+    """Format one batch result, echoing the request's vendor_id when given"""
+    result = format_recommendations(recommendations, vendor_request['needs'], vendor_request['location'])
+    if 'vendor_id' in vendor_request:
+        result = {'vendor_id': vendor_request['vendor_id'], **result}
+    return result
+
+_batch_engine = None
+
+def _init_batch_worker(interner, records, scoring, radius_km, item_matcher):
+    """Process pool initializer: build a worker-local engine over a snapshot of supplier records"""
+    global _batch_engine
+    _batch_engine = RecommendationEngine(loader=lambda: [interner.to_dict(record) for record in records],
+                                         scoring=scoring, radius_km=radius_km, item_matcher=item_matcher)
+
+def _recommend_batch_chunk(args):
+    """Process pool task: score one chunk of vendor requests"""
+    chunk, max_recommendations = args
+    results = _batch_engine.get_batch_recommendations(chunk, max_recommendations, chunk_size=len(chunk))
+    return [format_batch_result(request, recommendations) for request, recommendations in results]
+
+def get_batch_recommendations(vendor_requests, max_recommendations=5, processes=None, chunk_size=64):
+    """
+    Get supplier recommendations for many vendors at once
+    
+    Args:
+        vendor_requests (iterable): Dicts with 'needs' and 'location', and an
+            optional 'vendor_id' echoed back in the result
+        max_recommendations (int): Maximum number of recommendations per vendor
+        processes (int): Spread chunks over this many worker processes; scores
+            in-process when not set
+        chunk_size (int): Number of vendors scored together as one matrix
+    
+    Yields:
+        dict: One result per request, in input order, shaped like
+            get_supplier_recommendations plus 'vendor_id'
+    """
+    engine = get_engine()
+    if not processes:
+        for request, recommendations in engine.get_batch_recommendations(vendor_requests, max_recommendations, chunk_size):
+            yield format_batch_result(request, recommendations)
+        return
+    
+    index = engine.current_index()
+    # Fit the matcher once here so workers receive it ready to use
+    engine.resolve_needs([], index)
+    initargs = (index.interner, list(index.records.values()), engine.scoring, engine.radius_km, engine.item_matcher)
+    with multiprocessing.Pool(processes, initializer=_init_batch_worker, initargs=initargs) as pool:
+        # Chunks are read from vendor_requests in this thread, which may need the caller's context (a database
+        # session, say), rather than in the pool's task thread as imap would; a few per worker stay in flight
+        pending = collections.deque()
+        for chunk in iter_chunks(vendor_requests, chunk_size):
+            pending.append(pool.apply_async(_recommend_batch_chunk, ((chunk, max_recommendations),)))
+            if len(pending) >= 2 * processes:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
 # Test the recommendation engine
 if __name__ == "__main__":
     # Test scenarios
@@ -373,4 +1042,12 @@ if __name__ == "__main__":
             print(f"   Location: {rec['location']}, Rating: {rec['rating']}")
             print(f"   Matching items: {', '.join(rec['matching_items'])}")
             print(f"   Coverage: {rec['coverage_percentage']}%")
-            print() 
\ No newline at end of file
+            print()
+    
+    # The vectorized path must agree exactly with the scalar reference
+    scalar_engine = RecommendationEngine()
+    vectorized_engine = RecommendationEngine(scoring='vectorized')
+    for test_case in test_cases:
+        matches = scalar_engine.get_supplier_recommendations(test_case['needs'], test_case['location']) == \
+            vectorized_engine.get_supplier_recommendations(test_case['needs'], test_case['location'])
+        print(f"Vectorized parity ({test_case['description']}): {'OK' if matches else 'MISMATCH'}") 
\ No newline at end of file
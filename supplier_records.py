@@ -0,0 +1,139 @@
+import bisect
+import sys
+from array import array
+
+class Interner:
+    """Two-way mapping between strings and small consecutive integer ids"""
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def intern(self, name):
+        """Get the id for name, assigning the next free id if it is new"""
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name = sys.intern(name)
+            name_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def get(self, name):
+        """Get the id for name, or None if it was never interned"""
+        return self.ids.get(name)
+
+    def __len__(self):
+        return len(self.names)
+
+class SupplierRecord:
+    """
+    Compact in-memory form of a supplier.
+
+    Location, price range and delivery time are interned ids and the items
+    are a sorted array of item ids, so a record takes a fraction of the
+    memory of the equivalent dict, whatever the size of the item vocabulary,
+    and item membership is a binary search.
+    """
+
+    __slots__ = ('id', 'order', 'name', 'location', 'location_id', 'item_ids', 'rating', 'total_ratings',
+                 'price_id', 'delivery_id', 'description')
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+    def has_item(self, item_id):
+        """Check whether the supplier carries an interned item"""
+        if item_id is None:
+            return False
+        item_ids = self.item_ids
+        i = bisect.bisect_left(item_ids, item_id)
+        return i < len(item_ids) and item_ids[i] == item_id
+
+class SupplierInterner:
+    """
+    Convert supplier dicts to SupplierRecords and back.
+
+    Item names, lowercased locations, price ranges and delivery times are
+    interned into per-field vocabularies shared by every record, so each
+    distinct string is stored once however many suppliers use it.
+    """
+
+    def __init__(self):
+        self.items = Interner()
+        self.locations = Interner()
+        self.price_ranges = Interner()
+        self.delivery_times = Interner()
+        # Ratings take few distinct values, so equal ratings share one float
+        self.ratings = {}
+
+    def record(self, supplier, order):
+        """
+        Build the record for a supplier dict
+
+        Args:
+            supplier (dict): Supplier in the engine's loader format
+            order (int): The supplier's position in load order, used to break ties
+        """
+        record = SupplierRecord()
+        record.id = supplier['id']
+        record.order = order
+        record.name = supplier['name']
+        record.location = sys.intern(supplier['location'])
+        record.location_id = self.locations.intern(supplier['location'].lower())
+        record.item_ids = self.item_ids(supplier['items'])
+        record.rating = self.ratings.setdefault(supplier['rating'], supplier['rating'])
+        record.total_ratings = supplier['total_ratings']
+        record.price_id = self.price_ranges.intern(supplier['price_range'])
+        record.delivery_id = self.delivery_times.intern(supplier['delivery_time'])
+        record.description = supplier['description']
+        return record
+
+    def to_dict(self, record):
+        """Build the supplier dict for a record, with its items sorted by name"""
+        return {
+            'id': record.id,
+            'name': record.name,
+            'location': record.location,
+            'items': sorted(self.item_names(record.item_ids)),
+            'rating': record.rating,
+            'total_ratings': record.total_ratings,
+            'price_range': self.price_ranges.names[record.price_id],
+            'delivery_time': self.delivery_times.names[record.delivery_id],
+            'description': record.description
+        }
+
+    def item_ids(self, items):
+        """Intern item names into a sorted array of distinct item ids"""
+        return array('I', sorted({self.items.intern(item) for item in items}))
+
+    def item_names(self, item_ids):
+        """Get the item names for an array of item ids"""
+        names = self.items.names
+        return [names[item_id] for item_id in item_ids]
+
+    def location_name(self, record):
+        """Get a record's lowercased location"""
+        return self.locations.names[record.location_id]
+
+    def price_range(self, record):
+        return self.price_ranges.names[record.price_id]
+
+    def delivery_time(self, record):
+        return self.delivery_times.names[record.delivery_id]
+
+def insert_sorted(entries, entry, key):
+    """Insert an entry into a list or array kept sorted by key, appending when it sorts last"""
+    if not entries or key(entries[-1]) <= key(entry):
+        entries.append(entry)
+    else:
+        bisect.insort(entries, entry, key=key)
+
+def remove_sorted(entries, entry, key):
+    """Remove an entry from a list or array kept sorted by key, if present"""
+    i = bisect.bisect_left(entries, key(entry), key=key)
+    if i < len(entries) and entries[i] == entry:
+        del entries[i]
@@ -0,0 +1,153 @@
+import numpy as np
+from scipy import sparse
+from recommendation_engine import DEFAULT_RADIUS_KM, location_score
+
+class SupplierVectors:
+    """
+    Column arrays over a snapshot of supplier records for scoring them all at once.
+    
+    Items are stored as a sparse supplier x item matrix over the interned item
+    ids, so item matches for a vendor are one matrix-vector product. The
+    score terms are added in the same order as score_supplier so the floating
+    point results are identical to the scalar path.
+    """
+    
+    def __init__(self, records, interner, get_price_score, get_delivery_score, radius_km=DEFAULT_RADIUS_KM):
+        self.records = list(records)
+        self.interner = interner
+        self.radius_km = radius_km
+        # Snapshot the vocabularies: later upserts may intern more names
+        self.vocabulary = dict(interner.items.ids)
+        self.locations = list(interner.locations.names)
+        count = len(self.records)
+        
+        price_table = np.array([get_price_score(name) * 3 for name in interner.price_ranges.names] or [0])
+        delivery_table = np.array([get_delivery_score(name) * 2 for name in interner.delivery_times.names] or [0])
+        total_ratings = np.fromiter((record.total_ratings for record in self.records), dtype=np.float64, count=count)
+        self.rating = np.fromiter((record.rating for record in self.records), dtype=np.float64, count=count) * 2
+        self.price = price_table[np.fromiter((record.price_id for record in self.records), dtype=np.int32, count=count)]
+        self.delivery = delivery_table[np.fromiter((record.delivery_id for record in self.records), dtype=np.int32,
+                                                   count=count)]
+        self.reliability = np.where(total_ratings > 20, 5.0, np.where(total_ratings > 10, 3.0, 0.0))
+        self.location_ids = np.fromiter((record.location_id for record in self.records), dtype=np.int32, count=count)
+        
+        indptr = [0]
+        indices = []
+        for record in self.records:
+            indices.extend(record.item_ids)
+            indptr.append(len(indices))
+        self.items = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), np.array(indices, dtype=np.int32), np.array(indptr)),
+            shape=(count, max(len(self.vocabulary), 1))
+        )
+    
+    def needs_vector(self, vendor_needs):
+        """Count how often each vocabulary item appears in the vendor's needs"""
+        needs = np.zeros(self.items.shape[1], dtype=np.int32)
+        for need in vendor_needs:
+            column = self.vocabulary.get(need)
+            if column is not None and column < len(needs):
+                needs[column] += 1
+        return needs
+    
+    def location_scores(self, vendor_location):
+        """
+        Get the location term for every supplier
+        
+        Returns:
+            tuple: (scores, in_range) arrays, where in_range marks suppliers
+                with a positive location score
+        """
+        table = np.array([location_score(location, vendor_location, self.radius_km) for location in self.locations],
+                         dtype=np.float64)
+        scores = table[self.location_ids] if table.size else np.zeros(len(self.records))
+        return scores, scores > 0
+    
+    def add_supplier_terms(self, scores):
+        """Add the vendor-independent score terms in place, in score_supplier's order"""
+        scores += self.rating
+        scores += self.price
+        scores += self.delivery
+        scores += self.reliability
+        return scores
+    
+    def score(self, vendor_needs, vendor_location):
+        """
+        Score every supplier for one vendor
+        
+        Returns:
+            tuple: (scores, candidates) arrays, where candidates marks suppliers
+                sharing a need or in the same or a nearby location
+        """
+        matches = self.items @ self.needs_vector(vendor_needs)
+        location_scores, in_range = self.location_scores(vendor_location)
+        scores = location_scores.copy()
+        scores += matches / len(vendor_needs) * 30
+        return self.add_supplier_terms(scores), (matches > 0) | in_range
+    
+    def score_batch(self, vendor_requests):
+        """
+        Score every supplier for several vendors with one sparse matrix product
+        
+        Returns:
+            tuple: (scores, candidates) arrays of shape vendors x suppliers
+        """
+        needs = np.stack([self.needs_vector(request['needs']) for request in vendor_requests])
+        matches = (self.items @ needs.T).T
+        lengths = np.array([len(request['needs']) for request in vendor_requests], dtype=np.float64)
+        
+        # Vendors in the same city share one location row
+        location_rows = {}
+        for request in vendor_requests:
+            location = request['location']
+            if location not in location_rows:
+                location_rows[location] = self.location_scores(location)
+        scores = np.stack([location_rows[request['location']][0] for request in vendor_requests])
+        in_range = np.stack([location_rows[request['location']][1] for request in vendor_requests])
+        
+        scores += matches / lengths[:, None] * 30
+        return self.add_supplier_terms(scores), (matches > 0) | in_range
+    
+    def top_rows(self, scores, candidates, max_recommendations):
+        """Pick the best rows with argpartition, breaking ties by load order"""
+        rows = np.flatnonzero(candidates & (scores > 0))
+        if rows.size == 0 or max_recommendations <= 0:
+            return rows[:0]
+        row_scores = scores[rows]
+        if rows.size > max_recommendations:
+            # Keep everything tied with the k-th best score so ties can be broken by load order
+            kth = np.partition(row_scores, rows.size - max_recommendations)[rows.size - max_recommendations]
+            keep = row_scores >= kth
+            rows, row_scores = rows[keep], row_scores[keep]
+        return rows[np.lexsort((rows, -row_scores))[:max_recommendations]]
+    
+    def build_recommendations(self, rows, scores, vendor_needs):
+        """Turn selected rows into the engine's recommendation dicts"""
+        need_ids = [self.vocabulary.get(need) for need in vendor_needs]
+        recommendations = []
+        for row in rows:
+            record = self.records[row]
+            recommendations.append({
+                'supplier': self.interner.to_dict(record),
+                'score': float(scores[row]),
+                'matching_items': [need for need, item_id in zip(vendor_needs, need_ids) if record.has_item(item_id)]
+            })
+        return recommendations
+    
+    def recommend(self, vendor_needs, vendor_location, max_recommendations=5):
+        """Get the top recommendations for one vendor"""
+        scores, candidates = self.score(vendor_needs, vendor_location)
+        rows = self.top_rows(scores, candidates, max_recommendations)
+        return self.build_recommendations(rows, scores, vendor_needs)
+    
+    def recommend_batch(self, vendor_requests, max_recommendations=5):
+        """Get the top recommendations for each of several vendors"""
+        results = [[] for _ in vendor_requests]
+        scored = [i for i, request in enumerate(vendor_requests) if request['needs']]
+        if not scored or not self.records:
+            return results
+        scores, candidates = self.score_batch([vendor_requests[i] for i in scored])
+        for row, i in enumerate(scored):
+            rows = self.top_rows(scores[row], candidates[row], max_recommendations)
+            results[i] = self.build_recommendations(rows, scores[row], vendor_requests[i]['needs'])
+        return results
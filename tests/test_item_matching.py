@@ -0,0 +1,16 @@
+from item_matching import ItemMatcher
+from recommendation_engine import RecommendationEngine
+
+def test_close_variants_match_and_unrelated_names_do_not():
+    matcher = ItemMatcher()
+    matcher.fit(['Rice', 'carrot', 'flour', 'onion', 'potato', 'tomato'])
+    assert matcher.resolve_all(['onions', 'Tomatoes', 'rices', 'spices', 'oil']) == \
+        ['onion', 'tomato', 'Rice', 'spices', 'oil']
+
+def test_needs_resolving_to_one_item_count_once():
+    supplier = {'id': 1, 'name': 'Grain Store', 'location': 'Mumbai', 'items': ['Rice', 'flour'], 'rating': 4.0,
+                'total_ratings': 5, 'price_range': 'low', 'delivery_time': 'same_day', 'description': ''}
+    engine = RecommendationEngine(loader=lambda: [supplier], item_matcher=ItemMatcher())
+    [recommendation] = engine.get_supplier_recommendations(['rice', 'Rice', 'rices', 'flour'], 'Mumbai')
+    assert recommendation['matching_items'] == ['Rice', 'flour']
+    assert recommendation['score'] == engine.calculate_supplier_score(supplier, ['Rice', 'flour'], 'Mumbai')
@@ -0,0 +1,51 @@
+"""
+The indexed and vectorized scoring paths must return exactly what the
+reference calculate_supplier_score ranking returns.
+"""
+import pytest
+
+from benchmarks.synthetic import generate_suppliers, generate_vendors
+from recommendation_engine import RecommendationEngine, location_score
+
+SUPPLIER_COUNT = 2000
+VENDOR_COUNT = 200
+MAX_RECOMMENDATIONS = 10
+
+@pytest.fixture(scope='module')
+def suppliers():
+    return generate_suppliers(SUPPLIER_COUNT, seed=7, item_count=200)
+
+@pytest.fixture(scope='module')
+def vendors():
+    return generate_vendors(VENDOR_COUNT, seed=8, item_count=200)
+
+def reference_recommendations(engine, suppliers, vendor):
+    """Score every supplier with calculate_supplier_score and rank them with a stable sort"""
+    scored = []
+    for supplier in suppliers:
+        shares_need = any(need in supplier['items'] for need in vendor['needs'])
+        if not shares_need and location_score(supplier['location'], vendor['location'], engine.radius_km) <= 0:
+            continue
+        score = engine.calculate_supplier_score(supplier, vendor['needs'], vendor['location'])
+        if score > 0:
+            scored.append((supplier['id'], score))
+    scored.sort(key=lambda x: -x[1])
+    return scored[:MAX_RECOMMENDATIONS]
+
+def ranked(recommendations):
+    return [(recommendation['supplier']['id'], recommendation['score']) for recommendation in recommendations]
+
+@pytest.mark.parametrize('scoring', ['scalar', 'vectorized'])
+def test_scoring_matches_reference(scoring, suppliers, vendors):
+    engine = RecommendationEngine(loader=lambda: suppliers, scoring=scoring)
+    for vendor in vendors:
+        expected = reference_recommendations(engine, suppliers, vendor)
+        recommendations = engine.get_supplier_recommendations(vendor['needs'], vendor['location'], MAX_RECOMMENDATIONS)
+        assert ranked(recommendations) == expected, vendor
+
+def test_supplier_vectors_batch_matches_reference(suppliers, vendors):
+    engine = RecommendationEngine(loader=lambda: suppliers, scoring='vectorized')
+    vectors = engine.get_supplier_vectors(engine.current_index())
+    results = vectors.recommend_batch(vendors, MAX_RECOMMENDATIONS)
+    for vendor, recommendations in zip(vendors, results):
+        assert ranked(recommendations) == reference_recommendations(engine, suppliers, vendor), vendor
@@ -0,0 +1,82 @@
+"""
+Supplier writes must mark stale every materialized recommendation the
+engine's candidate rule lets the supplier appear in.
+"""
+import json
+import os
+
+import pytest
+
+@pytest.fixture(scope='module')
+def app_module(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('app')
+    os.environ['DATABASE_URL'] = f'sqlite:///{directory}/test.db'
+    os.environ['ITEM_MATCHER_PATH'] = str(directory / 'item_matcher.pkl')
+    import app
+    with app.app.app_context():
+        app.init_database()
+        yield app
+
+def add_account(app, username, role, location, profile):
+    user = app.User(username=username, email=f'{username}@example.com', password_hash='x', role=role,
+                    location=location)
+    app.db.session.add(user)
+    app.db.session.flush()
+    model = app.Supplier if role == 'supplier' else app.Vendor
+    profile = dict(profile, user_id=user.id)
+    app.db.session.add(model(**profile))
+    app.db.session.commit()
+    return model.query.filter_by(user_id=user.id).one()
+
+def materialize(app, vendor):
+    """Refresh the vendor's stored recommendations and get the recommended supplier names"""
+    app.refresh_stale_vendor_recommendations()
+    row = app.db.session.get(app.VendorRecommendation, vendor.id)
+    assert not row.stale
+    return [recommendation['name'] for recommendation in json.loads(row.recommendations)['recommendations']]
+
+def is_stale(app, vendor):
+    row = app.db.session.get(app.VendorRecommendation, vendor.id)
+    app.db.session.refresh(row)
+    return row.stale
+
+def test_out_of_range_supplier_marks_needing_vendors_stale(app_module):
+    app = app_module
+    vendor = add_account(app, 'siliguri_rice_vendor', 'vendor', 'Siliguri',
+                         {'business_name': 'Siliguri Rice Stall', 'needs': json.dumps(['rice']), 'location': 'Siliguri'})
+    supplier = add_account(app, 'far_rice', 'supplier', 'Mumbai',
+                           {'business_name': 'Far Rice', 'items': json.dumps(['rice'])})
+    assert materialize(app, vendor) == ['Far Rice']
+    
+    supplier.items = json.dumps(['oil'])
+    app.db.session.commit()
+    assert is_stale(app, vendor)
+    assert materialize(app, vendor) == []
+    
+    supplier.items = json.dumps(['rice'])
+    app.db.session.commit()
+    assert is_stale(app, vendor)
+    assert materialize(app, vendor) == ['Far Rice']
+    
+    app.db.session.delete(supplier)
+    app.db.session.commit()
+    assert is_stale(app, vendor)
+    assert materialize(app, vendor) == []
+
+def test_in_range_supplier_marks_vendors_stale_without_shared_items(app_module):
+    app = app_module
+    vendor = add_account(app, 'darjeeling_flour_vendor', 'vendor', 'Darjeeling',
+                         {'business_name': 'Darjeeling Momos', 'needs': json.dumps(['flour']), 'location': 'Darjeeling'})
+    supplier = add_account(app, 'near_oil', 'supplier', 'Kurseong',
+                           {'business_name': 'Near Oil', 'items': json.dumps(['oil'])})
+    assert 'Near Oil' in materialize(app, vendor)
+    
+    supplier.rating = 4.0
+    app.db.session.commit()
+    assert is_stale(app, vendor)
+    
+    materialize(app, vendor)
+    app.db.session.delete(supplier)
+    app.db.session.commit()
+    assert is_stale(app, vendor)
+    assert 'Near Oil' not in materialize(app, vendor)
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+
+class UserCache:
+    """
+    Per-process LRU + TTL cache of user rows for the login user loader.
+
+    Entries hold plain column values, never ORM instances, so they can be
+    shared between requests and threads. Changes committed in this process
+    invalidate their entry straight away; the TTL bounds how long a change
+    made by another worker goes unseen.
+    """
+
+    def __init__(self, ttl=30, max_size=10000):
+        """
+        Args:
+            ttl (float): Seconds an entry stays valid
+            max_size (int): Entries kept before the least recently used is dropped
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, user_id):
+        """Get a user's cached column values, or None on a miss"""
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None:
+                fields, expires_at = entry
+                if expires_at > time.monotonic():
+                    self.entries.move_to_end(user_id)
+                    self.hits += 1
+                    return fields
+                del self.entries[user_id]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def set(self, user_id, fields, generation=None):
+        """
+        Cache a user's column values
+
+        Args:
+            generation (int): The cache generation read before loading the row;
+                the values are dropped if an invalidation happened since
+        """
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.entries[user_id] = (fields, time.monotonic() + self.ttl)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id):
+        """Drop a changed or deleted user"""
+        with self.lock:
+            self.generation += 1
+            if self.entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop every entry"""
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+    def stats(self):
+        """Get hit/miss counters and size; every hit is a user query saved"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'queries_saved': self.hits,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'evictions': self.evictions,
+            'size': len(self.entries)
+        }
@@ -0,0 +1,140 @@
+import atexit
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindBuffer:
+    """
+    Queue rows in memory and write them in batches from a background thread.
+
+    A batch is written once max_batch_size rows are waiting or the oldest
+    waiting row is max_delay seconds old, whichever comes first, so while
+    writes succeed a crash loses at most max_delay seconds of rows. The
+    buffer is drained when the process exits. A failed batch is kept and retried with the next one;
+    past max_pending rows the oldest are dropped and counted.
+    """
+
+    def __init__(self, write, max_batch_size=100, max_delay=0.05, max_pending=10000):
+        """
+        Args:
+            write (callable): write(rows) persists a list of rows in one transaction
+            max_batch_size (int): Rows that trigger a write without waiting for max_delay
+            max_delay (float): Seconds a row may wait before it is written
+            max_pending (int): Rows kept while writes are failing
+        """
+        self.write = write
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.pending = []
+        self.oldest_at = None
+        self.retry_at = 0
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+        self.closed = False
+        self.queued = 0
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = 0
+        atexit.register(self.close)
+
+    def add(self, row):
+        """Queue a row to be written"""
+        with self.condition:
+            self.queued += 1
+            if not self.closed:
+                self._ensure_thread()
+                if not self.pending:
+                    self.oldest_at = time.monotonic()
+                self.pending.append(row)
+                overflow = len(self.pending) - self.max_pending
+                if overflow > 0:
+                    del self.pending[:overflow]
+                    self.dropped += overflow
+                # Wake the thread to start the max_delay clock, or to write a full batch
+                if len(self.pending) == 1 or len(self.pending) >= self.max_batch_size:
+                    self.condition.notify()
+                return
+        # Rows queued while the process exits are written straight away
+        self.write([row])
+        self.written += 1
+        self.batches += 1
+
+    def _ensure_thread(self):
+        # A forked worker (gunicorn --preload) inherits the buffer but not its thread
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.pending = []
+            self.thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self.thread.start()
+
+    def _seconds_until_due(self):
+        """Seconds until the queued rows should be written, or None while there are none"""
+        if not self.pending:
+            return None
+        now = time.monotonic()
+        if now < self.retry_at:
+            return self.retry_at - now
+        if len(self.pending) >= self.max_batch_size:
+            return 0
+        return self.oldest_at + self.max_delay - now
+
+    def _run(self):
+        while True:
+            with self.condition:
+                wait = self._seconds_until_due()
+                while not self.closed and (wait is None or wait > 0):
+                    self.condition.wait(wait)
+                    wait = self._seconds_until_due()
+                if self.closed:
+                    return
+            self.flush()
+
+    def flush(self):
+        """Write every queued row now; returns the number written"""
+        with self.write_lock:
+            with self.condition:
+                rows, self.pending = self.pending, []
+            written = 0
+            try:
+                for start in range(0, len(rows), self.max_batch_size):
+                    batch = rows[start:start + self.max_batch_size]
+                    self.write(batch)
+                    written += len(batch)
+                    self.batches += 1
+            except Exception:
+                self.failures += 1
+                logger.exception('Write-behind batch failed; keeping %d rows for retry', len(rows) - written)
+                with self.condition:
+                    self.pending = rows[written:] + self.pending
+                    # Back off for max_delay rather than retrying a full batch straight away
+                    self.oldest_at = time.monotonic()
+                    self.retry_at = self.oldest_at + self.max_delay
+            self.written += written
+            return written
+
+    def close(self):
+        """Stop the background thread and write whatever is still queued"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        if self.thread is not None and self.pid == os.getpid():
+            self.thread.join()
+        self.flush()
+
+    def stats(self):
+        """Counters of queued, written, failed and dropped rows"""
+        return {
+            'pending': len(self.pending),
+            'queued': self.queued,
+            'written': self.written,
+            'batches': self.batches,
+            'failures': self.failures,
+            'dropped': self.dropped
+        }